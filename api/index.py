@@ -1,9 +1,10 @@
 # FastAPI Imports
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
 from fastapi.requests import Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from starlette.middleware.sessions import SessionMiddleware
 
 
@@ -13,21 +14,61 @@ from app.users.main import router as user_router
 from app.quiz.main import app as quiz_app
 from app.websocket.main import app as websocket_app
 from app.features.main import app as features_app
+from database.connect_db import close_pool, pool_stats
+from database.async_db import async_pool_stats, close_async_pool
+from database.query_stats import route_stats_summary
+from services.query_stats_middleware import QueryStatsMiddleware
+from services.metrics import MetricsMiddleware
+from services.response_handler import verify_metrics_token
+from app.websocket.room_state.room_engine import room_engine
+from app.websocket.room_state.answer_log import answer_log
+from app.websocket.websocket_manager.ws_manager import manager
+from app.websocket.pubsub.backends import create_backend
+from app.websocket.pubsub.room_owner import room_owner
+from app.websocket.helper.helper_functions import question_scheduler
+import api.metrics  # noqa: F401  (registers the runtime collector)
 from helper.config import (
     QUIZIT_URL,
     ANOTHER_URL,
     AUTH_SECRET_KEY,
+    PUBSUB_BACKEND,
+    PUBSUB_URL,
+    PUBSUB_PRESENCE_TTL,
 )
 
 app = FastAPI()
 
 
 app.add_middleware(SessionMiddleware, secret_key=AUTH_SECRET_KEY)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 
 templates = Jinja2Templates(directory="api/templates")
 
 
+@app.on_event("startup")
+async def start_services():
+    await manager.start_bus(
+        create_backend(PUBSUB_BACKEND, PUBSUB_URL, PUBSUB_PRESENCE_TTL)
+    )
+    await room_owner.start()
+    await answer_log.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    # Rooms are scored and the answer log flushed before the claims are
+    # released, so the next owner loads them complete from the database
+    for room_code in list(question_scheduler.timelines):
+        question_scheduler.stop(room_code)
+    await room_engine.drain()
+    await room_owner.stop()
+    await manager.stop_bus()
+    close_pool()
+    await close_async_pool()
+
+
 @app.get("/", response_class=HTMLResponse, tags=["Index"])
 def index_page(request: Request):
     return templates.TemplateResponse(
@@ -59,3 +100,23 @@ app.add_middleware(
 @app.get("/check-auth", response_class=HTMLResponse)
 async def homepage(request: Request):
     return templates.TemplateResponse("check_auth.html", {"request": request})
+
+
+@app.get("/pool-stats", tags=["Index"], dependencies=[Depends(verify_metrics_token)])
+def database_pool_stats():
+    return {
+        "message": "Database Pool Stats",
+        "data": {"sync": pool_stats(), "async": async_pool_stats()},
+    }
+
+
+@app.get(
+    "/query-stats", tags=["Index"], dependencies=[Depends(verify_metrics_token)]
+)
+def database_query_stats():
+    return {"message": "Database Query Stats Per Route", "data": route_stats_summary()}
+
+
+@app.get("/metrics", tags=["Index"], dependencies=[Depends(verify_metrics_token)])
+def prometheus_metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,114 @@
+from prometheus_client import REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Project Imports
+from database.connect_db import pool_stats
+from database.async_db import async_pool_stats
+from services.lru_cache import caches
+from app.websocket.websocket_manager.ws_manager import manager
+from app.websocket.room_state.room_engine import room_engine
+from app.websocket.room_state.answer_log import answer_log
+
+
+class RuntimeCollector:
+    """Reads live websocket, room, pool and cache state at scrape time."""
+
+    def collect(self):
+        # Worker-wide aggregates only: a room label would publish every live
+        # room code and add a series per room
+        rooms = list(manager.active_connections.values())
+        yield GaugeMetricFamily(
+            "quizit_websocket_connections",
+            "Open websocket connections on this worker",
+            value=sum(len(sockets) for sockets in rooms),
+        )
+        yield GaugeMetricFamily(
+            "quizit_websocket_rooms",
+            "Rooms with at least one open connection on this worker",
+            value=sum(1 for sockets in rooms if sockets),
+        )
+
+        depths = manager.queue_depths()
+        yield GaugeMetricFamily(
+            "quizit_websocket_send_queue_depth",
+            "Frames waiting in per-connection send queues on this worker",
+            value=sum(depths),
+        )
+        yield GaugeMetricFamily(
+            "quizit_websocket_send_queue_depth_max",
+            "Deepest per-connection send queue on this worker",
+            value=max(depths, default=0),
+        )
+
+        yield GaugeMetricFamily(
+            "quizit_live_rooms",
+            "Rooms held in memory by the room engine",
+            value=len(room_engine.rooms),
+        )
+        yield GaugeMetricFamily(
+            "quizit_answer_log_pending",
+            "Scored answers waiting to be written",
+            value=answer_log.pending,
+        )
+        yield CounterMetricFamily(
+            "quizit_answer_log_flushed",
+            "Answers written by the write-behind log",
+            value=answer_log.flushed,
+        )
+        yield CounterMetricFamily(
+            "quizit_answer_log_failed_flushes",
+            "Write-behind flushes that failed and were retried",
+            value=answer_log.failed_flushes,
+        )
+        yield CounterMetricFamily(
+            "quizit_answer_log_dead_lettered",
+            "Answers set aside after failing to write",
+            value=answer_log.dead_lettered,
+        )
+
+        pool_connections = GaugeMetricFamily(
+            "quizit_db_pool_connections",
+            "Database pool connections by state",
+            labels=["pool", "state"],
+        )
+        pool_max = GaugeMetricFamily(
+            "quizit_db_pool_max_connections",
+            "Database pool size limit",
+            labels=["pool"],
+        )
+        for pool, stats in (("sync", pool_stats()), ("async", async_pool_stats())):
+            if not stats.get("initialized"):
+                continue
+            pool_connections.add_metric([pool, "idle"], stats["idle"])
+            pool_connections.add_metric([pool, "in_use"], stats["in_use"])
+            pool_max.add_metric([pool], stats["max_size"])
+            if "waiting" in stats:
+                pool_connections.add_metric([pool, "waiting"], stats["waiting"])
+        yield pool_connections
+        yield pool_max
+
+        hits = CounterMetricFamily(
+            "quizit_cache_hits", "Cache hits", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "quizit_cache_misses", "Cache misses", labels=["cache"]
+        )
+        hit_ratio = GaugeMetricFamily(
+            "quizit_cache_hit_ratio", "Cache hit ratio since start", labels=["cache"]
+        )
+        size = GaugeMetricFamily(
+            "quizit_cache_entries", "Entries held by the cache", labels=["cache"]
+        )
+        for name, cache in caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            hit_ratio.add_metric([name], stats["hit_ratio"])
+            size.add_metric([name], stats["size"])
+        yield hits
+        yield misses
+        yield hit_ratio
+        yield size
+
+
+REGISTRY.register(RuntimeCollector())
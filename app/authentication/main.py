@@ -21,6 +21,7 @@ from services.jwt_handler import (
     renew_access_token,
 )
 from database.connect_db import connect_database
+from database.async_db import async_transaction, execute, fetch_one
 from services.password_hashing import hash_password, match_password
 from services.response_handler import verify_bearer_token
 from services.email_send import send_email
@@ -55,9 +56,6 @@ def auth_index_page():
 @app.post("/signup")
 async def signup_user(user: SignUpSchema):
     """Signup API"""
-    connection = connect_database()
-    cursor = connection.cursor()
-
     try:
         full_name = user.full_name
         username = user.username
@@ -66,22 +64,23 @@ async def signup_user(user: SignUpSchema):
         hashed_password = hash_password(password)
         created_at = datetime.now(timezone.utc)
 
-        cursor.execute("SELECT * from Users WHERE email=%s", (email,))
-        email_exist = cursor.fetchone()
+        async with async_transaction() as cursor:
+            await cursor.execute("SELECT * from Users WHERE email=%s", (email,))
+            email_exist = await cursor.fetchone()
 
-        cursor.execute("SELECT * FROM Users WHERE username=%s", (username,))
-        username_exist = cursor.fetchone()
+            await cursor.execute("SELECT * FROM Users WHERE username=%s", (username,))
+            username_exist = await cursor.fetchone()
 
-        if email_exist or username_exist:
-            raise HTTPException(
-                status_code=409, detail="Email or Username already exist"
-            )
-
-        query = "INSERT INTO Users (full_name,username, email, hashed_password,created_at) VALUES (%s, %s, %s,%s,%s) RETURNING id"
-        cursor.execute(query, (full_name, username, email, hashed_password, created_at))
-        user_id = cursor.fetchone()[0]
+            if email_exist or username_exist:
+                raise HTTPException(
+                    status_code=409, detail="Email or Username already exist"
+                )
 
-        connection.commit()
+            query = "INSERT INTO Users (full_name,username, email, hashed_password,created_at) VALUES (%s, %s, %s,%s,%s) RETURNING id"
+            await cursor.execute(
+                query, (full_name, username, email, hashed_password, created_at)
+            )
+            user_id = (await cursor.fetchone())[0]
 
         otp = generate_otp()
 
@@ -94,19 +93,13 @@ async def signup_user(user: SignUpSchema):
         )
 
         verify_mail_query = "INSERT INTO verify_email_token (user_id , token , expiry) VALUES (%s,%s,%s)"
-        cursor.execute(verify_mail_query, (user_id, otp, verify_mail_expiry_time))
-        connection.commit()
+        await execute(verify_mail_query, (user_id, otp, verify_mail_expiry_time))
 
         return {"message": "Signup Successful. Please verify your email."}
 
     except Exception as e:
-        connection.rollback()
         raise HTTPException(status_code=404, detail=str(e))
 
-    finally:
-        cursor.close()
-        connection.close()
-
 
 @app.post("/email-token-verify")
 def email_token_verify(data: EmailTokenVerifySchema):
@@ -161,15 +154,13 @@ def email_token_verify(data: EmailTokenVerifySchema):
 @app.post("/renew-verify-email-token")
 async def renew_verify_email_token(data: RenewVerifyEmailToken):
     try:
-        connection = connect_database()
-        cursor = connection.cursor()
-
         email = data.email
 
         otp = generate_otp()
 
-        cursor.execute("SELECT id , is_verified FROM Users WHERE email=%s", (email,))
-        result = cursor.fetchone()
+        result = await fetch_one(
+            "SELECT id , is_verified FROM Users WHERE email=%s", (email,)
+        )
 
         if result is None:
             raise HTTPException(
@@ -181,8 +172,7 @@ async def renew_verify_email_token(data: RenewVerifyEmailToken):
         if is_verified:
             raise HTTPException(status_code=409, detail="Email already Verified")
 
-        cursor.execute("DELETE FROM verify_email_token WHERE user_id=%s", (user_id,))
-        connection.commit()
+        await execute("DELETE FROM verify_email_token WHERE user_id=%s", (user_id,))
 
         email_body = otp_email_body(otp)
         subject = "Verify Your Email"
@@ -193,24 +183,13 @@ async def renew_verify_email_token(data: RenewVerifyEmailToken):
         )
 
         verify_mail_query = "INSERT INTO verify_email_token (user_id , token , expiry) VALUES (%s,%s,%s)"
-        cursor.execute(verify_mail_query, (user_id, otp, verify_mail_expiry_time))
-        connection.commit()
+        await execute(verify_mail_query, (user_id, otp, verify_mail_expiry_time))
 
         return {"message": "Verify Mail Token has Resend"}
 
     except Exception as e:
-        if connection:
-            connection.rollback()
-
         raise HTTPException(status_code=400, detail=str(e))
 
-    finally:
-        if cursor:
-            cursor.close()
-
-        if connection:
-            connection.close()
-
 
 @app.post("/login")
 def login_user(user: LoginSchema):
@@ -275,31 +254,26 @@ async def new_access_token(refresh_token: str):
 @app.post("/forgot-password")
 async def forgot_password(data: ForgotPasswordSchema):
     try:
-        connection = connect_database()
-        cursor = connection.cursor()
-
         email = data.email
-        query = "SELECT * FROM Users WHERE email=%s"
-        cursor.execute(query, (email,))
-        existing_email = cursor.fetchone()
 
-        if not existing_email:
-            raise HTTPException(status_code=404, detail="Invalid Email")
+        async with async_transaction() as cursor:
+            await cursor.execute("SELECT id FROM Users WHERE email=%s", (email,))
+            existing_user = await cursor.fetchone()
 
-        otp = generate_otp()
-        token_expiry = datetime.now(timezone.utc) + timedelta(
-            minutes=FORGOT_PASSWORD_EXPIRY
-        )
+            if not existing_user:
+                raise HTTPException(status_code=404, detail="Invalid Email")
 
-        cursor.execute("SELECT id FROM Users WHERE email=%s", (email,))
-        user_id = cursor.fetchone()[0]
+            user_id = existing_user[0]
 
-        cursor.execute(
-            "INSERT INTO forgot_password_token (user_id, token, expiry) VALUES (%s, %s, %s)",
-            (user_id, otp, token_expiry),
-        )
+            otp = generate_otp()
+            token_expiry = datetime.now(timezone.utc) + timedelta(
+                minutes=FORGOT_PASSWORD_EXPIRY
+            )
 
-        connection.commit()
+            await cursor.execute(
+                "INSERT INTO forgot_password_token (user_id, token, expiry) VALUES (%s, %s, %s)",
+                (user_id, otp, token_expiry),
+            )
 
         email_body = reset_password_email_body(token=otp)
         subject = "Reset Your Password"
@@ -307,11 +281,7 @@ async def forgot_password(data: ForgotPasswordSchema):
 
         return {"message": "Token Has Sent to Your Email"}
     except Exception as e:
-        connection.rollback()
         raise HTTPException(status_code=404, detail=str(e))
-    finally:
-        cursor.close()
-        connection.close()
 
 
 @app.post("/forgot-password-token")
@@ -510,41 +480,36 @@ async def auth_google(request: Request):
             status_code=500, detail=f"Failed to upload to Cloudinary: {str(e)}"
         )
 
-    connection = connect_database()
-    cursor = connection.cursor()
-
-    cursor.execute("SELECT id, username FROM users WHERE email=%s", (email,))
-    user = cursor.fetchone()
+    async with async_transaction() as cursor:
+        await cursor.execute("SELECT id, username FROM users WHERE email=%s", (email,))
+        user = await cursor.fetchone()
 
-    if not user:
-        random_password = os.urandom(16).hex()
-        hashed_password = hash_password(random_password)
-
-        cursor.execute(
-            """
-            INSERT INTO users (email, full_name, username, photo, auth_provider, is_verified, hashed_password, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
-            RETURNING id
-            """,
-            (
-                email,
-                full_name,
-                email.split("@")[0],
-                photo_url,
-                "google",
-                True,
-                hashed_password,
-            ),
-        )
-        user_id = cursor.fetchone()[0]
-        connection.commit()
-    else:
-        user_id = user[0]
-        cursor.execute("UPDATE users SET photo=%s WHERE id=%s", (photo_url, user_id))
-        connection.commit()
-
-    cursor.close()
-    connection.close()
+        if not user:
+            random_password = os.urandom(16).hex()
+            hashed_password = hash_password(random_password)
+
+            await cursor.execute(
+                """
+                INSERT INTO users (email, full_name, username, photo, auth_provider, is_verified, hashed_password, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, NOW())
+                RETURNING id
+                """,
+                (
+                    email,
+                    full_name,
+                    email.split("@")[0],
+                    photo_url,
+                    "google",
+                    True,
+                    hashed_password,
+                ),
+            )
+            user_id = (await cursor.fetchone())[0]
+        else:
+            user_id = user[0]
+            await cursor.execute(
+                "UPDATE users SET photo=%s WHERE id=%s", (photo_url, user_id)
+            )
 
     access_token = get_access_token({"id": user_id}, expiry_minutes=ACCESS_TOKEN_EXPIRY)
     refresh_token = get_refresh_token({"id": user_id}, expiry_time=REFRESH_TOKEN_EXPIRY)
@@ -5,6 +5,7 @@ from cryptography.fernet import Fernet
 # FastAPI Projects Import
 from services.response_handler import verify_bearer_token
 from database.connect_db import connect_database
+from database.async_db import async_cursor, execute, fetch_all, fetch_one
 from services.email_send import send_email
 from app.features.models.response_model import (
     InviteOutputSchema,
@@ -21,7 +22,11 @@ from app.features.models.input_schema import (
     AboutUsSchema,
 )
 from messages.invited_user_email import invite_message
-from helper.config import FERNET_KEY
+from app.websocket.room_state.room_resolver import room_resolver
+from app.quiz.quiz_detail import invalidate_quiz_detail
+from app.features.user_search import find_users
+from services.pagination import decode_cursor, keyset, split_page
+from helper.config import FERNET_KEY, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 
 app = APIRouter()
@@ -154,28 +159,26 @@ async def invite_friends(
     invited_to_id = data.invited_to_id
     quiz_id = data.quiz_id
 
-    connect = connect_database()
-    cursor = connect.cursor()
-
     try:
         if str(invitor_id) == str(invited_to_id):
             raise HTTPException(status_code=400, detail="You cannot invite yourself")
 
-        cursor.execute("SELECT id FROM rooms WHERE room_code=%s", (room_code,))
-
-        fetch_room_id = cursor.fetchone()
-        if not fetch_room_id:
+        room = await room_resolver.resolve(room_code)
+        if not room:
             raise HTTPException(status_code=404, detail="Invalid Room Code")
 
-        room_id = fetch_room_id[0]
+        room_id = room.room_id
 
-        cursor.execute("SELECT full_name FROM users WHERE id=%s", (invitor_id,))
+        async with async_cursor() as cursor:
+            await cursor.execute("SELECT full_name FROM users WHERE id=%s", (invitor_id,))
 
-        invitor_name = cursor.fetchone()[0]
+            invitor_name = (await cursor.fetchone())[0]
 
-        cursor.execute("SELECT email FROM users WHERE id=%s", (invited_to_id))
+            await cursor.execute(
+                "SELECT email FROM users WHERE id=%s", (invited_to_id,)
+            )
 
-        invited_to_email = cursor.fetchone()[0]
+            invited_to_email = (await cursor.fetchone())[0]
 
         email_body = invite_message(invitor_name, room_code, quiz_id)
         subject = """You’ve Been Invited to a Quiz Room!"""
@@ -184,28 +187,20 @@ async def invite_friends(
             subject=subject, to_whom=invited_to_email, body=email_body, is_html=True
         )
 
-        cursor.execute(
+        fetch_invite_id = await fetch_one(
             """INSERT INTO room_invites (room_id , invited_by , invited_user_id , email_sent)
             VALUES (%s,%s,%s,%s) RETURNING id
             """,
             (room_id, invitor_id, invited_to_id, True),
         )
-
-        fetch_invite_id = cursor.fetchone()
         if not fetch_invite_id:
             raise HTTPException(status_code=400, detail="Something Went Wrong")
 
-        connect.commit()
         return {"message": "Invite Sent"}
 
     except Exception as e:
-        connect.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        cursor.close()
-        connect.close()
-
 
 @app.get("/top-authors")
 def get_top_authors(auth: dict = Depends(verify_bearer_token)):
@@ -367,6 +362,7 @@ def post_favourite_quiz(
             raise HTTPException(status_code=400, detail="Something went wrong")
 
         connection.commit()
+        invalidate_quiz_detail(quiz_id)
         return {"message": "Added Favourite Quiz"}
 
     except Exception as e:
@@ -389,6 +385,7 @@ def remove_favourite_quiz(quiz_id: str, auth: dict = Depends(verify_bearer_token
         """
         cursor.execute(delete_query, (user_id, quiz_id))
         connection.commit()
+        invalidate_quiz_detail(quiz_id)
         return {"message": "Removed from favourites"}
     except Exception as e:
         connection.rollback()
@@ -403,7 +400,12 @@ def get_favourite_quizzes(
     auth: dict = Depends(verify_bearer_token),
     filter: str = Query("newest", description="Filter by criteria, e.g. newest"),
     order: str = Query("asc", description="Order direction: asc or desc"),
+    page_cursor: str = Query(
+        None, alias="cursor", description="next_cursor of the previous page"
+    ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
 ):
+    after = decode_cursor(page_cursor)
     connection = connect_database()
     cursor = connection.cursor()
     user_id = auth.get("id")
@@ -417,35 +419,27 @@ def get_favourite_quizzes(
         if order.lower() not in ordering_list:
             raise HTTPException(status_code=400, detail="Invalid order value")
 
-        if filter == "newest":
-            filtering_criteria = "q.created_at"
+        condition, params, order_by = keyset(order, after)
 
         query = f"""
             SELECT 
                 q.id, q.title, q.description, q.cover_photo,
                 u.full_name, u.photo,
-                COALESCE(plays.play_count, 0) AS plays_count,
-                COALESCE(questions.question_count, 0) AS question_count,
+                (SELECT COUNT(*) FROM rooms r WHERE r.quiz_id = q.id) AS plays_count,
+                (
+                    SELECT COUNT(*) FROM quiz_questions qq WHERE qq.quiz_id = q.id
+                ) AS question_count,
                 q.created_at
             FROM user_favourites uf
             JOIN quizzes q ON uf.quiz_id = q.id
             JOIN users u ON q.creator_id = u.id
-            LEFT JOIN (
-                SELECT quiz_id, COUNT(*) AS play_count
-                FROM rooms
-                GROUP BY quiz_id
-            ) plays ON q.id = plays.quiz_id
-            LEFT JOIN (
-                SELECT quiz_id, COUNT(*) AS question_count
-                FROM quiz_questions
-                GROUP BY quiz_id
-            ) questions ON q.id = questions.quiz_id
-            WHERE uf.user_id = %s
-            ORDER BY {filtering_criteria} {order.upper()}
+            WHERE uf.user_id = %s AND {condition}
+            ORDER BY {order_by}
+            LIMIT %s
         """
 
-        cursor.execute(query, (user_id,))
-        rows = cursor.fetchall()
+        cursor.execute(query, (user_id, *params, limit + 1))
+        rows, next_cursor = split_page(cursor.fetchall(), limit, 8)
 
         quizzes = [
             {
@@ -462,7 +456,11 @@ def get_favourite_quizzes(
             for row in rows
         ]
 
-        return {"message": "Successfull Response", "data": quizzes}
+        return {
+            "message": "Successfull Response",
+            "data": quizzes,
+            "next_cursor": next_cursor,
+        }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -487,41 +485,19 @@ def decrypt_data(data: EncryptedDataSchema):
 @app.get("/search-users", response_model=UserSearchResponse)
 def search_users(
     search: str = Query(
-        ..., min_length=1, description="Search term to match inside full_name"
+        ..., min_length=1, description="Search term to match in username or full_name"
     ),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     auth: dict = Depends(verify_bearer_token),
 ):
     connection = connect_database()
     cursor = connection.cursor()
     try:
+        result = find_users(cursor, search, limit)
 
-        pattern = f"%{search}%"
-
-        sql = """
-            SELECT id, username, full_name, photo
-            FROM users
-            WHERE LOWER(full_name) LIKE LOWER(%s)
-            ORDER BY full_name ASC
-        """
-
-        cursor.execute(sql, (pattern,))
-        rows = cursor.fetchall()
-
-        if not rows:
+        if not result:
             return {"message": "Response", "data": []}
 
-        result = []
-        for r in rows:
-            (id, username, full_name, image) = r
-            result.append(
-                {
-                    "id": str(id),
-                    "username": username,
-                    "full_name": full_name,
-                    "image": image,
-                }
-            )
-
         return {"message": "Search Successfull", "data": result}
 
     except Exception as e:
@@ -536,24 +512,17 @@ def search_users(
 async def submit_contact_us(
     payload: ContactUsSchema, auth: dict = Depends(verify_bearer_token)
 ):
-    connection = connect_database()
-    cursor = connection.cursor()
     user_id = auth.get("id")
     try:
-        cursor.execute(
+        await execute(
             """
             INSERT INTO contact_us (user_id, name, email, question)
             VALUES (%s, %s, %s, %s)
             """,
             (user_id, payload.name, payload.email, payload.question),
         )
-        connection.commit()
     except Exception as e:
-        connection.rollback()
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
-    finally:
-        cursor.close()
-        connection.close()
 
     return {"message": "Contact us submitted successfully."}
 
@@ -562,34 +531,25 @@ async def submit_contact_us(
 async def submit_feedback(
     payload: FeedbackSchema, auth: dict = Depends(verify_bearer_token)
 ):
-    connection = connect_database()
-    cursor = connection.cursor()
     user_id = auth.get("id")
     try:
-        cursor.execute(
+        await execute(
             """
             INSERT INTO feedback (user_id, reaction, feedback_message)
             VALUES (%s, %s, %s)
             """,
             (user_id, payload.reaction, payload.feedback_message),
         )
-        connection.commit()
     except Exception as e:
-        connection.rollback()
         raise HTTPException(status_code=500, detail="Database error: " + str(e))
-    finally:
-        cursor.close()
-        connection.close()
 
     return {"message": "Feedback submitted successfully."}
 
 
 @app.post("/about-us")
 async def create_about_us(payload: AboutUsSchema):
-    connection = connect_database()
-    cursor = connection.cursor()
     try:
-        cursor.execute(
+        await execute(
             """
             INSERT INTO about_us (photo_url, full_name, position, faculty, github_link, linkedin_link)
             VALUES (%s, %s, %s, %s, %s, %s)
@@ -603,26 +563,18 @@ async def create_about_us(payload: AboutUsSchema):
                 payload.linkedin_link,
             ),
         )
-        connection.commit()
     except Exception as e:
-        connection.rollback()
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        cursor.close()
-        connection.close()
 
     return {"message": "Data Inserted Successfully"}
 
 
 @app.get("/about-us")
 async def get_about_us():
-    connection = connect_database()
-    cursor = connection.cursor()
     try:
-        cursor.execute(
+        rows = await fetch_all(
             "SELECT photo_url, full_name, position, faculty, github_link, linkedin_link FROM about_us ORDER BY id"
         )
-        rows = cursor.fetchall()
         results = []
         for row in rows:
             results.append(
@@ -637,8 +589,5 @@ async def get_about_us():
             )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
-    finally:
-        cursor.close()
-        connection.close()
 
     return {"message": "Response Successfull", "data": results}
@@ -28,6 +28,7 @@ class FavouriteQuizOutputSchema(BaseModel):
 class FavouriteQuizResponseSchema(BaseModel):
     message: str
     data: List[FavouriteQuizOutputSchema]
+    next_cursor: Optional[str]
 
 
 class UserSearchOutput(BaseModel):
@@ -0,0 +1,92 @@
+import re
+
+# Project Imports
+from services.lru_cache import LRUCache, MISSING
+from helper.config import (
+    USER_SEARCH_CACHE_SIZE,
+    USER_SEARCH_CACHE_TTL,
+    USER_SEARCH_PREFIX_LENGTH,
+)
+
+# Keyed by (term, limit). Results are the same for every viewer; new or
+# renamed users show up once the short TTL runs out
+user_searches = LRUCache(USER_SEARCH_CACHE_SIZE, USER_SEARCH_CACHE_TTL, name="user_searches")
+
+# Terms too short for trigrams: anchored prefix match, served by the
+# text_pattern_ops btree indexes
+PREFIX_SEARCH_QUERY = """
+    SELECT id, username, full_name, photo
+    FROM users
+    WHERE LOWER(username) LIKE %(prefix)s OR LOWER(full_name) LIKE %(prefix)s
+    ORDER BY
+        LOWER(username) = %(term)s DESC,
+        LOWER(username) LIKE %(prefix)s DESC,
+        LENGTH(full_name),
+        full_name,
+        id
+    LIMIT %(limit)s
+"""
+
+# Substring and fuzzy match over the pg_trgm GIN indexes, ranked exact
+# username, then prefix, then trigram similarity
+TRIGRAM_SEARCH_QUERY = """
+    SELECT id, username, full_name, photo
+    FROM users
+    WHERE LOWER(username) LIKE %(contains)s
+       OR LOWER(full_name) LIKE %(contains)s
+       OR LOWER(full_name) %% %(term)s
+    ORDER BY
+        LOWER(username) = %(term)s DESC,
+        (LOWER(username) LIKE %(prefix)s OR LOWER(full_name) LIKE %(prefix)s) DESC,
+        GREATEST(
+            similarity(LOWER(username), %(term)s),
+            similarity(LOWER(full_name), %(term)s)
+        ) DESC,
+        full_name,
+        id
+    LIMIT %(limit)s
+"""
+
+
+def normalize_term(search: str) -> str:
+    return " ".join(search.lower().split())
+
+
+def escape_like(term: str) -> str:
+    return re.sub(r"([\\%_])", r"\\\1", term)
+
+
+def find_users(cursor, search: str, limit: int) -> list:
+    """Users whose username or full name match search, best match first."""
+    term = normalize_term(search)
+    if not term:
+        return []
+
+    key = (term, limit)
+    result = user_searches.get(key)
+    if result is not MISSING:
+        return result
+
+    escaped = escape_like(term)
+    params = {
+        "term": term,
+        "prefix": f"{escaped}%",
+        "contains": f"%{escaped}%",
+        "limit": limit,
+    }
+    if len(term) <= USER_SEARCH_PREFIX_LENGTH:
+        cursor.execute(PREFIX_SEARCH_QUERY, params)
+    else:
+        cursor.execute(TRIGRAM_SEARCH_QUERY, params)
+
+    result = [
+        {
+            "id": str(id),
+            "username": username,
+            "full_name": full_name,
+            "image": image,
+        }
+        for (id, username, full_name, image) in cursor.fetchall()
+    ]
+    user_searches.set(key, result)
+    return result
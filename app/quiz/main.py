@@ -11,8 +11,18 @@ import json
 from .quiz_models.quiz_model import QuizTag
 from services.response_handler import verify_bearer_token
 from database.connect_db import connect_database
+from database.async_db import async_transaction
+from app.websocket.room_state.answer_keys import answer_keys
+from app.quiz.quiz_detail import fetch_quiz_detail, invalidate_quiz_detail
+from app.quiz.question_loader import load_questions
 from services.cloudinary_config import configure_cloudinary
-from helper.config import ENCRYPTION_KEY, DEFAULT_COVER_PHOTO_URL
+from services.pagination import decode_cursor, keyset, split_page
+from helper.config import (
+    ENCRYPTION_KEY,
+    DEFAULT_COVER_PHOTO_URL,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+)
 
 
 app = APIRouter()
@@ -30,8 +40,6 @@ async def upload_quiz(
     tags: str = Form(...),
     auth: dict = Depends(verify_bearer_token),
 ):
-    connection = connect_database()
-    cursor = connection.cursor()
     user_id = auth.get("id")
 
     try:
@@ -55,66 +63,65 @@ async def upload_quiz(
             cover_photo_url = DEFAULT_COVER_PHOTO_URL
 
         created_at = datetime.now(timezone.utc)
+        questions_data = json.loads(questions)
+        tags_data = json.loads(tags)
 
-        insert_quiz_query = """
-            INSERT INTO quizzes (cover_photo, title, description, is_published, created_at, creator_id)
-            VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
-            """
-
-        cursor.execute(
-            insert_quiz_query,
-            (
-                cover_photo_url,
-                title,
-                description,
-                is_published,
-                created_at,
-                user_id,
-            ),
-        )
-        returned_quiz_id = cursor.fetchone()
-        if not returned_quiz_id:
-            raise HTTPException(status_code=500, detail="Unable to insert quiz")
-
-        quiz_id = returned_quiz_id[0]
+        async with async_transaction() as cursor:
+            insert_quiz_query = """
+                INSERT INTO quizzes (cover_photo, title, description, is_published, created_at, creator_id)
+                VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
+                """
 
-        questions_data = json.loads(questions)
-        for q in questions_data:
-            question_query = """
-                INSERT INTO quiz_questions (question, question_index, options, correct_option, points, duration, quiz_id)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """
-            cursor.execute(
-                question_query,
+            await cursor.execute(
+                insert_quiz_query,
                 (
-                    q.get("question"),
-                    q.get("question_index"),
-                    json.dumps(q.get("options")),
-                    q.get("correct_option"),
-                    q.get("points"),
-                    q.get("duration"),
-                    quiz_id,
+                    cover_photo_url,
+                    title,
+                    description,
+                    is_published,
+                    created_at,
+                    user_id,
                 ),
             )
-
-        tags_data = json.loads(tags)
-        for tag in tags_data:
-            cursor.execute("SELECT id FROM tags WHERE name=%s", (tag,))
-            existing_tag = cursor.fetchone()
-            if existing_tag:
-                tag_id = existing_tag[0]
-            else:
-                cursor.execute(
-                    "INSERT INTO tags (name) VALUES (%s) RETURNING id", (tag,)
+            returned_quiz_id = await cursor.fetchone()
+            if not returned_quiz_id:
+                raise HTTPException(status_code=500, detail="Unable to insert quiz")
+
+            quiz_id = returned_quiz_id[0]
+
+            for q in questions_data:
+                question_query = """
+                    INSERT INTO quiz_questions (question, question_index, options, correct_option, points, duration, quiz_id)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """
+                await cursor.execute(
+                    question_query,
+                    (
+                        q.get("question"),
+                        q.get("question_index"),
+                        json.dumps(q.get("options")),
+                        q.get("correct_option"),
+                        q.get("points"),
+                        q.get("duration"),
+                        quiz_id,
+                    ),
                 )
-                tag_id = cursor.fetchone()[0]
 
-            cursor.execute(
-                "INSERT INTO quiz_tags (quiz_id, tag_id) VALUES (%s, %s)",
-                (quiz_id, tag_id),
-            )
-
-        connection.commit()
+            for tag in tags_data:
+                await cursor.execute("SELECT id FROM tags WHERE name=%s", (tag,))
+                existing_tag = await cursor.fetchone()
+                if existing_tag:
+                    tag_id = existing_tag[0]
+                else:
+                    await cursor.execute(
+                        "INSERT INTO tags (name) VALUES (%s) RETURNING id", (tag,)
+                    )
+                    tag_id = (await cursor.fetchone())[0]
+
+                await cursor.execute(
+                    "INSERT INTO quiz_tags (quiz_id, tag_id) VALUES (%s, %s)",
+                    (quiz_id, tag_id),
+                )
 
         return {
             "message": "Quiz Uploaded Successfully",
@@ -123,16 +130,8 @@ async def upload_quiz(
         }
 
     except Exception as e:
-        if connection:
-            connection.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
-
 
 @app.get("/tags-option")
 def quiz_tags_option(auth: dict = Depends(verify_bearer_token)):
@@ -141,25 +140,32 @@ def quiz_tags_option(auth: dict = Depends(verify_bearer_token)):
 
 
 @app.get("/")
-def get_all_quizzes(auth: dict = Depends(verify_bearer_token)):
+def get_all_quizzes(
+    auth: dict = Depends(verify_bearer_token),
+    page_cursor: str = Query(None, alias="cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    after = decode_cursor(page_cursor)
     connection = connect_database()
     cursor = connection.cursor()
 
     try:
-        query = """
+        condition, params, order_by = keyset("desc", after)
+
+        query = f"""
         SELECT q.id, q.title, q.description, q.cover_photo,
                u.full_name, u.photo, q.created_at,
-               COUNT(qq.id)
+               (SELECT COUNT(*) FROM quiz_questions qq WHERE qq.quiz_id = q.id)
         FROM quizzes q
         JOIN users u ON u.id = q.creator_id
-        LEFT JOIN quiz_questions qq ON qq.quiz_id = q.id
-        GROUP BY q.id, q.title, q.description, q.cover_photo,
-                 u.full_name, u.photo, q.created_at
+        WHERE {condition}
+        ORDER BY {order_by}
+        LIMIT %s
         """
-        cursor.execute(query)
-        all_fetched_data = cursor.fetchall()
+        cursor.execute(query, (*params, limit + 1))
+        all_fetched_data, next_cursor = split_page(cursor.fetchall(), limit, 6)
 
-        if not all_fetched_data:
+        if not all_fetched_data and after is None:
             raise HTTPException(status_code=404, detail="No quizzes found.")
 
         result = []
@@ -179,7 +185,11 @@ def get_all_quizzes(auth: dict = Depends(verify_bearer_token)):
                 }
             )
 
-        return {"message": "Response Successful", "data": result}
+        return {
+            "message": "Response Successful",
+            "data": result,
+            "next_cursor": next_cursor,
+        }
 
     except Exception as e:
         if connection:
@@ -198,7 +208,10 @@ def my_quizzes(
     auth: dict = Depends(verify_bearer_token),
     filter: str = Query(None),
     order: str = Query(None),
+    page_cursor: str = Query(None, alias="cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
 ):
+    after = decode_cursor(page_cursor)
     connection = connect_database()
     cursor = connection.cursor()
     creator_id = auth.get("id")
@@ -217,72 +230,45 @@ def my_quizzes(
         if filter not in filtering_list:
             raise HTTPException(status_code=400, detail="Invalid filtering value")
 
-        if filter == "newest":
-            filtering_criteria = "created_at"
+        condition, params, order_by = keyset(order, after)
 
         get_quiz_description_query = f"""
         SELECT q.id , q.cover_photo, q.title , q.description, q.created_at
         FROM quizzes AS q
-        WHERE q.creator_id = %s
-        ORDER BY {filtering_criteria} {order.upper()}
+        WHERE q.creator_id = %s AND {condition}
+        ORDER BY {order_by}
+        LIMIT %s
         """
 
-        cursor.execute(get_quiz_description_query, (creator_id,))
-        fetch_all_data = cursor.fetchall()
+        cursor.execute(get_quiz_description_query, (creator_id, *params, limit + 1))
+        fetch_all_data, next_cursor = split_page(cursor.fetchall(), limit, 4)
 
         if not fetch_all_data:
-            return {"data": []}
+            return {"data": [], "next_cursor": None}
 
         result = []
 
+        questions = load_questions(cursor, [data[0] for data in fetch_all_data])
+
         for data in fetch_all_data:
             (quiz_id, cover_photo, title, description, created_at) = data
 
-            get_all_questions_query = """
-            SELECT qq.id, qq.question, qq.question_index, qq.options,
-                   qq.correct_option, qq.points, qq.duration
-            FROM quiz_questions AS qq
-            WHERE qq.quiz_id = %s
-            """
-
-            cursor.execute(get_all_questions_query, (quiz_id,))
-            fetch_all_questions = cursor.fetchall()
-
-            question_result = []
-            for qq in fetch_all_questions:
-                (
-                    id,
-                    question,
-                    question_index,
-                    options,
-                    correct_option,
-                    points,
-                    duration,
-                ) = qq
-                question_result.append(
-                    {
-                        "question_id": id,
-                        "question": question,
-                        "question_index": question_index,
-                        "options": options,
-                        "correct_option": correct_option,
-                        "points": points,
-                        "duration": duration,
-                    }
-                )
-
             result.append(
                 {
                     "quiz_id": quiz_id,
                     "cover_photo": cover_photo,
                     "title": title,
                     "description": description,
-                    "questions": question_result,
+                    "questions": questions[quiz_id],
                     "created_at": created_at,
                 }
             )
 
-        return {"message": "Successful Response", "data": result}
+        return {
+            "message": "Successful Response",
+            "data": result,
+            "next_cursor": next_cursor,
+        }
 
     except Exception as e:
         if connection:
@@ -303,93 +289,29 @@ def get_quiz_by_id(quiz_id: str, auth: dict = Depends(verify_bearer_token)):
     user_id = auth.get("id")
 
     try:
-        query = """
-            SELECT q.id, u.id, q.title, q.description, q.cover_photo,
-            u.full_name, u.photo, q.created_at,
-            COUNT(qq.id),u.username
-            FROM quizzes q
-            JOIN users u ON u.id = q.creator_id
-            LEFT JOIN quiz_questions qq ON qq.quiz_id = q.id
-            WHERE q.id = %s
-            GROUP BY q.id, u.id, q.title, q.description, q.cover_photo,
-            u.full_name, u.photo, q.created_at
-        """
-        cursor.execute(query, (quiz_id,))
-        row = cursor.fetchone()
+        detail = fetch_quiz_detail(cursor, quiz_id, user_id)
 
-        if not row:
+        if not detail:
             raise HTTPException(status_code=404, detail="Quiz not found.")
 
-        (
-            id,
-            player_id,
-            title,
-            description,
-            cover_photo,
-            name,
-            image,
-            date,
-            count,
-            username,
-        ) = row
-
-        is_this_me = player_id == user_id
-
-        plays_query = """
-            SELECT COUNT(rp.id)
-            FROM rooms r
-            JOIN room_participants rp ON rp.room_id = r.id
-            WHERE r.quiz_id = %s
-        """
-        cursor.execute(plays_query, (quiz_id,))
-        plays = cursor.fetchone()[0]
-
-        fav_count_query = """
-            SELECT COUNT(*) FROM user_favourites WHERE quiz_id = %s
-        """
-        cursor.execute(fav_count_query, (quiz_id,))
-        favourite_count = cursor.fetchone()[0]
-
-        cursor.execute(
-            "SELECT COUNT(*) FROM follows WHERE following_id = %s", (user_id,)
-        )
-        follower_count = cursor.fetchone()[0]
-
-        cursor.execute(
-            "SELECT COUNT(*) FROM follows WHERE follower_id = %s", (user_id,)
-        )
-        following_count = cursor.fetchone()[0]
-
-        cursor.execute(
-            "SELECT 1 FROM follows WHERE follower_id = %s AND following_id = %s",
-            (user_id, player_id),
-        )
-        is_followed = cursor.fetchone() is not None
-
-        cursor.execute(
-            "SELECT 1 FROM user_favourites WHERE user_id = %s AND quiz_id = %s",
-            (user_id, quiz_id),
-        )
-        is_favourite = cursor.fetchone() is not None
-
         result = {
-            "id": id,
-            "title": title,
-            "description": description,
-            "cover_photo": cover_photo,
-            "author": name,
-            "username": username,
-            "image": image,
-            "plays": plays,
-            "date": date,
-            "is_this_me": is_this_me,
-            "count": count,
-            "follower": follower_count,
-            "following": following_count,
-            "is_followed": is_followed,
-            "quiz_creator_id": player_id,
-            "is_favourite": is_favourite,
-            "favourite_count": favourite_count,
+            "id": detail["id"],
+            "title": detail["title"],
+            "description": detail["description"],
+            "cover_photo": detail["cover_photo"],
+            "author": detail["author"],
+            "username": detail["username"],
+            "image": detail["image"],
+            "plays": detail["plays"],
+            "date": detail["date"],
+            "is_this_me": detail["creator_id"] == user_id,
+            "count": detail["count"],
+            "follower": detail["follower"],
+            "following": detail["following"],
+            "is_followed": detail["is_followed"],
+            "quiz_creator_id": detail["creator_id"],
+            "is_favourite": detail["is_favourite"],
+            "favourite_count": detail["favourite_count"],
         }
 
         return {"message": "Response Successful", "data": result}
@@ -431,6 +353,8 @@ def delete_question(
             raise HTTPException(status_code=404, detail="Question not found")
 
         connection.commit()
+        answer_keys.invalidate(quiz_id)
+        invalidate_quiz_detail(quiz_id)
 
         return {"message": f"Question Id : {question_id} Deleted Successfully"}
 
@@ -0,0 +1,44 @@
+QUESTIONS_FOR_QUIZZES_QUERY = """
+    SELECT qq.quiz_id, qq.id, qq.question, qq.question_index, qq.options,
+           qq.correct_option, qq.points, qq.duration
+    FROM quiz_questions AS qq
+    WHERE qq.quiz_id = ANY(%s)
+    ORDER BY qq.quiz_id, qq.question_index, qq.id
+"""
+
+
+def load_questions(cursor, quiz_ids) -> dict:
+    """Questions for every quiz in quiz_ids, fetched in one statement.
+
+    Returns {quiz_id: [question, ...]}; every requested quiz has an entry,
+    so quizzes without questions map to an empty list.
+    """
+    quiz_ids = list(quiz_ids)
+    questions = {quiz_id: [] for quiz_id in quiz_ids}
+    if not quiz_ids:
+        return questions
+
+    cursor.execute(QUESTIONS_FOR_QUIZZES_QUERY, (quiz_ids,))
+    for row in cursor.fetchall():
+        (
+            quiz_id,
+            id,
+            question,
+            question_index,
+            options,
+            correct_option,
+            points,
+            duration,
+        ) = row
+        questions.setdefault(quiz_id, []).append(
+            {
+                "question_id": id,
+                "question": question,
+                "question_index": question_index,
+                "options": options,
+                "correct_option": correct_option,
+                "points": points,
+                "duration": duration,
+            }
+        )
+    return questions
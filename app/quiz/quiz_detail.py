@@ -0,0 +1,101 @@
+# Project Imports
+from services.lru_cache import LRUCache, MISSING
+from helper.config import QUIZ_DETAIL_CACHE_SIZE, QUIZ_DETAIL_CACHE_TTL
+
+# Viewer-independent part of the quiz detail page. Counters such as plays
+# and favourites may lag by up to the cache TTL
+quiz_details = LRUCache(QUIZ_DETAIL_CACHE_SIZE, QUIZ_DETAIL_CACHE_TTL, name="quiz_details")
+
+QUIZ_COLUMNS = (
+    "id",
+    "creator_id",
+    "title",
+    "description",
+    "cover_photo",
+    "author",
+    "image",
+    "date",
+    "count",
+    "username",
+    "plays",
+    "favourite_count",
+)
+
+VIEWER_COLUMNS = ("follower", "following", "is_followed", "is_favourite")
+
+QUIZ_PROJECTION = """
+    q.id, u.id, q.title, q.description, q.cover_photo,
+    u.full_name, u.photo, q.created_at,
+    (SELECT COUNT(*) FROM quiz_questions qq WHERE qq.quiz_id = q.id),
+    u.username,
+    (
+        SELECT COUNT(rp.id)
+        FROM rooms r
+        JOIN room_participants rp ON rp.room_id = r.id
+        WHERE r.quiz_id = q.id
+    ),
+    (SELECT COUNT(*) FROM user_favourites uf WHERE uf.quiz_id = q.id)
+"""
+
+VIEWER_PROJECTION = """
+    (SELECT COUNT(*) FROM follows WHERE following_id = %(viewer_id)s),
+    (SELECT COUNT(*) FROM follows WHERE follower_id = %(viewer_id)s),
+    EXISTS (
+        SELECT 1 FROM follows
+        WHERE follower_id = %(viewer_id)s AND following_id = q.creator_id
+    ),
+    EXISTS (
+        SELECT 1 FROM user_favourites
+        WHERE user_id = %(viewer_id)s AND quiz_id = q.id
+    )
+"""
+
+QUIZ_DETAIL_QUERY = f"""
+    SELECT {QUIZ_PROJECTION}, {VIEWER_PROJECTION}
+    FROM quizzes q
+    JOIN users u ON u.id = q.creator_id
+    WHERE q.id = %(quiz_id)s
+"""
+
+QUIZ_VIEWER_QUERY = f"""
+    SELECT {VIEWER_PROJECTION}
+    FROM quizzes q
+    WHERE q.id = %(quiz_id)s
+"""
+
+
+def fetch_quiz_detail(cursor, quiz_id, viewer_id):
+    """Quiz detail for one viewer in a single statement.
+
+    On a cache hit only the viewer's own follow/favourite state is queried;
+    on a miss the whole page comes back in one row and the quiz part is
+    cached. Returns None when the quiz does not exist.
+    """
+    quiz_id = int(quiz_id)
+    params = {"quiz_id": quiz_id, "viewer_id": viewer_id}
+
+    quiz = quiz_details.get(quiz_id)
+    if quiz is MISSING:
+        cursor.execute(QUIZ_DETAIL_QUERY, params)
+        row = cursor.fetchone()
+        if not row:
+            return None
+
+        quiz = dict(zip(QUIZ_COLUMNS, row[: len(QUIZ_COLUMNS)]))
+        quiz_details.set(quiz_id, quiz)
+        viewer = row[len(QUIZ_COLUMNS) :]
+    else:
+        cursor.execute(QUIZ_VIEWER_QUERY, params)
+        viewer = cursor.fetchone()
+        if not viewer:
+            quiz_details.invalidate(quiz_id)
+            return None
+
+    return {**quiz, **dict(zip(VIEWER_COLUMNS, viewer))}
+
+
+def invalidate_quiz_detail(quiz_id):
+    try:
+        quiz_details.invalidate(int(quiz_id))
+    except (TypeError, ValueError):
+        pass
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Query, Depends, UploadFile, File, Form
 from database.connect_db import connect_database
+from database.async_db import async_transaction, execute, fetch_one
 from services.response_handler import verify_bearer_token
 import json
 from cloudinary.uploader import upload as cloudinary_upload
@@ -9,47 +10,65 @@ import uuid
 
 # Project Imports
 from app.users.models.quiz_model import QuestionUpdate, QuizUpdateSchema
+from app.websocket.room_state.answer_keys import answer_keys
+from app.quiz.quiz_detail import invalidate_quiz_detail
+from app.quiz.question_loader import load_questions
+from app.features.user_search import user_searches
+from services.pagination import decode_cursor, keyset, split_page
+from helper.config import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter()
 configure_cloudinary()
 
 
 @router.get("/")
-def get_all_users(auth: dict = Depends(verify_bearer_token)):
+def get_all_users(
+    auth: dict = Depends(verify_bearer_token),
+    page_cursor: str = Query(None, alias="cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+):
+    after = decode_cursor(page_cursor)
     user_id = auth.get("id")
     connection = connect_database()
     cursor = connection.cursor()
     try:
-        get_all_users_query = """
-        SELECT id , full_name , username,photo FROM users
-        """
-        cursor.execute(get_all_users_query)
-
-        all_fetched_data = cursor.fetchall()
+        condition, params, order_by = keyset(
+            "desc", after, created_column="u.created_at", id_column="u.id"
+        )
 
-        if not all_fetched_data:
-            raise HTTPException(status_code=400, detail="Something went wrong")
+        get_all_users_query = f"""
+        SELECT u.id, u.full_name, u.username, u.photo, u.created_at,
+               EXISTS (
+                   SELECT 1 FROM follows f
+                   WHERE f.follower_id = %s AND f.following_id = u.id
+               )
+        FROM users AS u
+        WHERE {condition}
+        ORDER BY {order_by}
+        LIMIT %s
+        """
+        cursor.execute(get_all_users_query, (user_id, *params, limit + 1))
+        all_fetched_data, next_cursor = split_page(cursor.fetchall(), limit, 4)
 
-        all_fetched_data = list(all_fetched_data)
         result = []
         for data in all_fetched_data:
-            id, name, username, image = data
-            if user_id != id:
-                is_this_me = False
-            if user_id == id:
-                is_this_me = True
+            id, name, username, image, _, is_followed = data
             result.append(
                 {
                     "id": id,
                     "name": name,
                     "username": username,
                     "image": image,
-                    "is_this_me": is_this_me,
-                    "is_followed": False,
+                    "is_this_me": user_id == id,
+                    "is_followed": is_followed,
                 }
             )
 
-        return {"message": "Successful Response", "data": result}
+        return {
+            "message": "Successful Response",
+            "data": result,
+            "next_cursor": next_cursor,
+        }
 
     except Exception as e:
         if connection:
@@ -113,12 +132,12 @@ def check_username_uniqueness(
         str, Query(..., description="Enter Username to Check Uniqueness")
     ],
 ):
-    connection = connect_database()
-    cursor = connection.cursor()
-
     if username is None:
         raise HTTPException(status_code=400, detail="Enter Username")
 
+    connection = connect_database()
+    cursor = connection.cursor()
+
     try:
         cursor.execute("SELECT * FROM Users WHERE username=%s", (username,))
         existing_data = cursor.fetchone()
@@ -240,13 +259,12 @@ async def edit_user_quiz(
     user: dict = Depends(verify_bearer_token),
 ):
     user_id = user.get("id")
-    connection = connect_database()
-    cursor = connection.cursor()
 
     try:
         questions_data = json.loads(questions)
         tags_data = json.loads(tags)
 
+        cover_photo_url = None
         if cover_photo:
             file_bytes = await cover_photo.read()
             unique_public_id = f"quiz_cover_{user_id}_{uuid.uuid4().hex}"
@@ -257,113 +275,112 @@ async def edit_user_quiz(
                 overwrite=False,
             )
             cover_photo_url = upload_result.get("secure_url")
-        else:
-            cursor.execute("SELECT cover_photo FROM quizzes WHERE id=%s", (quiz_id,))
-            result = cursor.fetchone()
-            cover_photo_url = result[0] if result else None
-
-        update_query = """
-            UPDATE quizzes
-            SET cover_photo = %s,
-                title = %s,
-                description = %s
-            WHERE id = %s AND creator_id = %s
-        """
-        cursor.execute(
-            update_query, (cover_photo_url, title, description, quiz_id, user_id)
-        )
 
-        existing_question_ids = []
-        for q in questions_data:
-            if q.get("id"):
-                cursor.execute(
-                    """
-                    UPDATE quiz_questions
-                    SET question = %s,
-                        question_index = %s,
-                        options = %s,
-                        correct_option = %s,
-                        points = %s,
-                        duration = %s
-                    WHERE id = %s AND quiz_id = %s
-                    """,
-                    (
-                        q["question"],
-                        q["question_index"],
-                        json.dumps(q["options"]),
-                        q["correct_option"],
-                        q.get("points", 1),
-                        q.get("duration", 30),
-                        q["id"],
-                        quiz_id,
-                    ),
-                )
-                existing_question_ids.append(q["id"])
-            else:
-                cursor.execute(
-                    """
-                    INSERT INTO quiz_questions
-                    (question, question_index, options, correct_option, points, duration, quiz_id)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                    """,
-                    (
-                        q["question"],
-                        q["question_index"],
-                        json.dumps(q["options"]),
-                        q["correct_option"],
-                        q.get("points", 1),
-                        q.get("duration", 30),
-                        quiz_id,
-                    ),
+        async with async_transaction() as cursor:
+            if not cover_photo:
+                await cursor.execute(
+                    "SELECT cover_photo FROM quizzes WHERE id=%s", (quiz_id,)
                 )
-                new_id = cursor.fetchone()[0]
-                existing_question_ids.append(new_id)
-
-        if existing_question_ids:
-            cursor.execute(
-                "DELETE FROM quiz_questions WHERE quiz_id = %s AND id NOT IN %s",
-                (quiz_id, tuple(existing_question_ids)),
+                result = await cursor.fetchone()
+                cover_photo_url = result[0] if result else None
+
+            update_query = """
+                UPDATE quizzes
+                SET cover_photo = %s,
+                    title = %s,
+                    description = %s
+                WHERE id = %s AND creator_id = %s
+            """
+            await cursor.execute(
+                update_query, (cover_photo_url, title, description, quiz_id, user_id)
             )
-        else:
-            cursor.execute("DELETE FROM quiz_questions WHERE quiz_id = %s", (quiz_id,))
-
-        tag_ids = []
-        for tag_name in tags_data:
-            cursor.execute("SELECT id FROM tags WHERE name = %s", (tag_name,))
-            tag_row = cursor.fetchone()
-            if tag_row:
-                tag_ids.append(tag_row[0])
+
+            existing_question_ids = []
+            for q in questions_data:
+                if q.get("id"):
+                    await cursor.execute(
+                        """
+                        UPDATE quiz_questions
+                        SET question = %s,
+                            question_index = %s,
+                            options = %s,
+                            correct_option = %s,
+                            points = %s,
+                            duration = %s
+                        WHERE id = %s AND quiz_id = %s
+                        """,
+                        (
+                            q["question"],
+                            q["question_index"],
+                            json.dumps(q["options"]),
+                            q["correct_option"],
+                            q.get("points", 1),
+                            q.get("duration", 30),
+                            q["id"],
+                            quiz_id,
+                        ),
+                    )
+                    existing_question_ids.append(q["id"])
+                else:
+                    await cursor.execute(
+                        """
+                        INSERT INTO quiz_questions
+                        (question, question_index, options, correct_option, points, duration, quiz_id)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s)
+                        RETURNING id
+                        """,
+                        (
+                            q["question"],
+                            q["question_index"],
+                            json.dumps(q["options"]),
+                            q["correct_option"],
+                            q.get("points", 1),
+                            q.get("duration", 30),
+                            quiz_id,
+                        ),
+                    )
+                    new_id = (await cursor.fetchone())[0]
+                    existing_question_ids.append(new_id)
+
+            if existing_question_ids:
+                await cursor.execute(
+                    "DELETE FROM quiz_questions WHERE quiz_id = %s AND id NOT IN %s",
+                    (quiz_id, tuple(existing_question_ids)),
+                )
             else:
-                cursor.execute(
-                    "INSERT INTO tags (name) VALUES (%s) RETURNING id", (tag_name,)
+                await cursor.execute(
+                    "DELETE FROM quiz_questions WHERE quiz_id = %s", (quiz_id,)
                 )
-                new_tag_id = cursor.fetchone()[0]
-                tag_ids.append(new_tag_id)
-
-        cursor.execute("DELETE FROM quiz_tags WHERE quiz_id = %s", (quiz_id,))
 
-        for tid in tag_ids:
-            cursor.execute(
-                "INSERT INTO quiz_tags (quiz_id, tag_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-                (quiz_id, tid),
-            )
+            tag_ids = []
+            for tag_name in tags_data:
+                await cursor.execute("SELECT id FROM tags WHERE name = %s", (tag_name,))
+                tag_row = await cursor.fetchone()
+                if tag_row:
+                    tag_ids.append(tag_row[0])
+                else:
+                    await cursor.execute(
+                        "INSERT INTO tags (name) VALUES (%s) RETURNING id", (tag_name,)
+                    )
+                    new_tag_id = (await cursor.fetchone())[0]
+                    tag_ids.append(new_tag_id)
+
+            await cursor.execute("DELETE FROM quiz_tags WHERE quiz_id = %s", (quiz_id,))
+
+            for tid in tag_ids:
+                await cursor.execute(
+                    "INSERT INTO quiz_tags (quiz_id, tag_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                    (quiz_id, tid),
+                )
 
-        connection.commit()
+        answer_keys.invalidate(quiz_id)
+        invalidate_quiz_detail(quiz_id)
 
         return {"message": "Quiz, questions and tags updated successfully"}
 
     except Exception as e:
-        if connection:
-            connection.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
-
 
 @router.delete("/me/{quiz_id}/delete")
 def delete_quiz(quiz_id: str, auth: dict = Depends(verify_bearer_token)):
@@ -399,6 +416,8 @@ def delete_quiz(quiz_id: str, auth: dict = Depends(verify_bearer_token)):
         cursor.execute("DELETE FROM quizzes WHERE id = %s", (quiz_id,))
 
         connection.commit()
+        answer_keys.invalidate(quiz_id)
+        invalidate_quiz_detail(quiz_id)
 
         return {"message": "Quiz and related data deleted successfully"}
 
@@ -469,49 +488,18 @@ def profile_of_user(
 
         result = []
 
+        questions = load_questions(cursor, [data[0] for data in fetch_all_data])
+
         for data in fetch_all_data:
             (quiz_id, cover_photo, title, description, created_at) = data
 
-            get_all_questions_query = """
-            SELECT qq.id, qq.question, qq.question_index, qq.options,
-                   qq.correct_option, qq.points, qq.duration
-            FROM quiz_questions AS qq
-            WHERE qq.quiz_id = %s
-            """
-
-            cursor.execute(get_all_questions_query, (quiz_id,))
-            fetch_all_questions = cursor.fetchall()
-
-            question_result = []
-            for qq in fetch_all_questions:
-                (
-                    id,
-                    question,
-                    question_index,
-                    options,
-                    correct_option,
-                    points,
-                    duration,
-                ) = qq
-                question_result.append(
-                    {
-                        "question_id": id,
-                        "question": question,
-                        "question_index": question_index,
-                        "options": options,
-                        "correct_option": correct_option,
-                        "points": points,
-                        "duration": duration,
-                    }
-                )
-
             result.append(
                 {
                     "quiz_id": quiz_id,
                     "cover_photo": cover_photo,
                     "title": title,
                     "description": description,
-                    "questions": question_result,
+                    "questions": questions[quiz_id],
                     "created_at": created_at,
                 }
             )
@@ -678,19 +666,16 @@ async def edit_profile_page(
     photo: Optional[UploadFile] = File(None),
     auth: dict = Depends(verify_bearer_token),
 ):
-    connection = connect_database()
-    cursor = connection.cursor()
     creator_id = auth.get("id")
 
     photo_url = None
 
     try:
         if username:
-            cursor.execute(
+            existing_username = await fetch_one(
                 "SELECT * FROM users WHERE username=%s AND id != %s",
                 (username, creator_id),
             )
-            existing_username = cursor.fetchone()
             if existing_username:
                 raise HTTPException(status_code=400, detail="Username already exists")
 
@@ -736,8 +721,9 @@ async def edit_profile_page(
         WHERE id = %s
         """
 
-        cursor.execute(update_query, tuple(values))
-        connection.commit()
+        await execute(update_query, tuple(values))
+        # Cached search results carry the old name and photo
+        user_searches.clear()
 
         return {
             "message": "Updated User Data Successfully",
@@ -745,16 +731,8 @@ async def edit_profile_page(
         }
 
     except Exception as e:
-        if connection:
-            connection.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        if cursor:
-            cursor.close()
-        if connection:
-            connection.close()
-
 
 @router.get("/{user_id}/quizzes")
 def my_quizzes(
@@ -762,7 +740,10 @@ def my_quizzes(
     auth: dict = Depends(verify_bearer_token),
     filter: str = Query(None),
     order: str = Query(None),
+    page_cursor: str = Query(None, alias="cursor"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
 ):
+    after = decode_cursor(page_cursor)
     connection = connect_database()
     cursor = connection.cursor()
 
@@ -780,7 +761,7 @@ def my_quizzes(
         if filter not in filtering_list:
             raise HTTPException(status_code=400, detail="Invalid filtering value")
 
-        filtering_criteria = "q.created_at" if filter == "newest" else "q.created_at"
+        condition, params, order_by = keyset(order, after)
 
         get_quiz_description_query = f"""
         SELECT 
@@ -791,23 +772,27 @@ def my_quizzes(
             q.created_at,
             u.photo AS author_photo,
             u.full_name AS author_name,
-            COUNT(DISTINCT rp.id) AS total_plays,
-            COUNT(DISTINCT qq.id) AS question_count
+            (
+                SELECT COUNT(rp.id)
+                FROM rooms r
+                JOIN room_participants rp ON rp.room_id = r.id
+                WHERE r.quiz_id = q.id
+            ) AS total_plays,
+            (
+                SELECT COUNT(*) FROM quiz_questions qq WHERE qq.quiz_id = q.id
+            ) AS question_count
         FROM quizzes AS q
         JOIN users AS u ON u.id = q.creator_id
-        LEFT JOIN rooms r ON r.quiz_id = q.id
-        LEFT JOIN room_participants rp ON rp.room_id = r.id
-        LEFT JOIN quiz_questions qq ON qq.quiz_id = q.id
-        WHERE q.creator_id = %s
-        GROUP BY q.id, q.cover_photo, q.title, q.description, q.created_at, u.photo, u.full_name
-        ORDER BY {filtering_criteria} {order.upper()}
+        WHERE q.creator_id = %s AND {condition}
+        ORDER BY {order_by}
+        LIMIT %s
         """
 
-        cursor.execute(get_quiz_description_query, (user_id,))
-        fetch_all_data = cursor.fetchall()
+        cursor.execute(get_quiz_description_query, (user_id, *params, limit + 1))
+        fetch_all_data, next_cursor = split_page(cursor.fetchall(), limit, 4)
 
         if not fetch_all_data:
-            return {"data": []}
+            return {"data": [], "next_cursor": None}
 
         result = []
         for data in fetch_all_data:
@@ -837,7 +822,11 @@ def my_quizzes(
                 }
             )
 
-        return {"message": "Successful Response", "data": result}
+        return {
+            "message": "Successful Response",
+            "data": result,
+            "next_cursor": next_cursor,
+        }
 
     except Exception as e:
         if connection:
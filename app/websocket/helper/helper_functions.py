@@ -1,122 +1,255 @@
 from datetime import datetime, timezone
-from app.websocket.websocket_manager.ws_manager import ConnectionManager
-from database.connect_db import connect_database
-
-manager = ConnectionManager()
+from app.websocket.websocket_manager.ws_manager import manager
+from app.websocket.room_state.room_engine import (
+    room_engine,
+    RoomState,
+    RoomParticipant,
+)
+from app.websocket.room_state.answer_log import answer_log
+from app.websocket.pubsub.room_owner import room_owner
+from app.websocket.room_state.leaderboard_flusher import LeaderboardFlusher
+from app.websocket.room_state.question_scheduler import QuestionScheduler
+from helper.config import (
+    LEADERBOARD_FLUSH_INTERVAL_MS,
+    QUESTION_INTERMISSION_MS,
+    ANSWER_GRACE_PERIOD_MS,
+)
+
+
+async def publish_leaderboard(room_state: RoomState):
+    leaderboard_update = room_state.next_leaderboard_update()
+    if leaderboard_update is None:
+        return
+
+    room_code = room_state.room_code
+    leaderboard_data = (
+        room_state.leaderboard()
+        if manager.has_full_leaderboard_clients(room_code)
+        else []
+    )
+    await manager.send_leaderboard(room_code, leaderboard_data, leaderboard_update)
+
+
+leaderboard_flusher = LeaderboardFlusher(
+    publish_leaderboard, LEADERBOARD_FLUSH_INTERVAL_MS / 1000
+)
+room_engine.on_scored = leaderboard_flusher.schedule
+
+
+async def announce_question(room_code: str, question: dict):
+    await manager.broadcast("question", room_code, question)
+
+
+async def announce_question_closed(room_code: str, question):
+    room_state = room_engine.rooms.get(room_code)
+    if room_state is not None:
+        await leaderboard_flusher.flush(room_state)
+
+    await manager.broadcast(
+        "question_closed",
+        room_code,
+        {
+            "question_id": question.id,
+            "question_index": question.index,
+            "correct_option": question.correct_option,
+        },
+    )
+
+
+async def announce_quiz_finished(room_code: str):
+    room_state = room_engine.rooms.get(room_code)
+    if room_state is not None:
+        await leaderboard_flusher.flush(room_state)
+    await room_engine.mark_finished(room_code)
+    await manager.broadcast("quiz_finished", room_code)
+
+
+question_scheduler = QuestionScheduler(
+    room_engine,
+    room_engine.timer_wheel,
+    QUESTION_INTERMISSION_MS / 1000,
+    ANSWER_GRACE_PERIOD_MS / 1000,
+    announce_question,
+    announce_question_closed,
+    announce_quiz_finished,
+)
+room_engine.on_loaded = question_scheduler.resume
+
+
+def _as_int(value, field: str) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lstrip("-").isdigit():
+        return int(value)
+    raise ValueError(f"{field} must be an integer")
+
+
+def parse_answer(answer_data) -> tuple[int, int]:
+    # Websocket answers get the checks REST answers get from AnswerSchema;
+    # raises ValueError for anything that is not an integer pair
+    if not isinstance(answer_data, dict) or None in (
+        answer_data.get("question_id"),
+        answer_data.get("selected_option"),
+    ):
+        raise ValueError("Incomplete answer data")
+    return (
+        _as_int(answer_data["question_id"], "question_id"),
+        _as_int(answer_data["selected_option"], "selected_option"),
+    )
 
 
 async def process_answer_and_update_leaderboard(
-    user_id: int, room_code: str, answer_data: dict
+    user_id: int,
+    room_code: str,
+    selected_option: int,
+    received_at: datetime,
+    question_id: int = None,
+    question_index: int = None,
 ):
-    connection = connect_database()
-    cursor = connection.cursor()
-
     try:
-        cursor.execute(
-            "SELECT id, quiz_id FROM rooms WHERE room_code = %s", (room_code,)
-        )
-        room = cursor.fetchone()
-        if not room:
-            return {"error": "Invalid room code"}
-        room_id, quiz_id = room
-
-        cursor.execute(
-            "SELECT id FROM room_participants WHERE user_id = %s AND room_id = %s",
-            (user_id, room_id),
+        return await room_owner.call(
+            room_code,
+            "answer",
+            {
+                "user_id": user_id,
+                "selected_option": selected_option,
+                "received_at": received_at.isoformat(),
+                "question_id": question_id,
+                "question_index": question_index,
+            },
         )
-        participant = cursor.fetchone()
-        if not participant:
-            return {"error": "User not participant in room"}
-        participant_id = participant[0]
-
-        question_id = answer_data.get("question_id")
-        selected_option = answer_data.get("selected_option")
-        point = answer_data.get("point", 0)
-        answered_at_str = answer_data.get("answered_at")
 
-        if not (question_id and selected_option is not None and answered_at_str):
-            return {"error": "Incomplete answer data"}
-
-        answered_at = datetime.fromisoformat(answered_at_str.replace("Z", "+00:00"))
-
-        cursor.execute(
-            "SELECT correct_option FROM quiz_questions WHERE id = %s AND quiz_id = %s",
-            (question_id, quiz_id),
-        )
-        result = cursor.fetchone()
-        if not result:
-            return {"error": "Question not found"}
-        correct_option = result[0]
+    except Exception as e:
+        return {"error": str(e)}
 
-        is_correct = str(correct_option) == str(selected_option)
 
-        if is_correct:
-            cursor.execute(
-                "UPDATE room_participants SET score = score + %s WHERE id = %s",
-                (point, participant_id),
+# Everything below runs on the room's owner; see RoomOwnerRouter
+
+
+@room_owner.handler("answer")
+async def _answer(room_code: str, payload: dict):
+    return await room_engine.submit_answer(
+        room_code,
+        payload["user_id"],
+        payload["selected_option"],
+        datetime.fromisoformat(payload["received_at"]),
+        question_id=payload.get("question_id"),
+        question_index=payload.get("question_index"),
+    )
+
+
+@room_owner.handler("join")
+async def _join(room_code: str, payload: dict):
+    # A live room picks up a late joiner now rather than on their first
+    # answer; the snapshot lets a delta client start from the current board.
+    # Loading here also resumes a scheduled quiz after a restart
+    room_state = await room_engine.get(room_code)
+    if room_state is None:
+        return {}
+    if payload.get("participant_id") is not None:
+        room_state.add_participant(
+            RoomParticipant(
+                payload["participant_id"],
+                payload["user_id"],
+                payload["full_name"],
+                payload["photo"],
             )
-
-        cursor.execute(
-            "INSERT INTO room_questions (room_id, question_id, shown_at) VALUES (%s, %s, %s) RETURNING id",
-            (room_id, question_id, datetime.now(timezone.utc)),
-        )
-        question_show_id = cursor.fetchone()[0]
-
-        cursor.execute(
-            """
-            INSERT INTO room_answers (
-                room_id, participant_id, question_id,
-                selected_option, is_correct, answered_at
-            ) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
-            """,
-            (
-                room_id,
-                participant_id,
-                question_id,
-                selected_option,
-                is_correct,
-                answered_at,
-            ),
         )
-        answer_id = cursor.fetchone()[0]
-
-        connection.commit()
-
-        cursor.execute(
-            """
-            SELECT u.id, u.full_name, rp.score, u.photo
-            FROM room_participants rp
-            JOIN users u ON rp.user_id = u.id
-            WHERE rp.room_id = %s
-            ORDER BY rp.score DESC
-            """,
-            (room_id,),
+    return {"snapshot": room_state.leaderboard_snapshot()}
+
+
+@room_owner.handler("snapshot")
+async def _snapshot(room_code: str, payload: dict):
+    room_state = await room_engine.get(room_code)
+    if room_state is None:
+        return {}
+    return {"snapshot": room_state.leaderboard_snapshot()}
+
+
+@room_owner.handler("start")
+async def _start(room_code: str, payload: dict):
+    room_state = await room_engine.get(room_code)
+    if room_state is not None:
+        if question_scheduler.start(room_state):
+            await room_engine.mark_scheduled(room_state, datetime.now(timezone.utc))
+        # Delta clients that connected before the room loaded learn
+        # every member's name and photo from this
+        await manager.broadcast_leaderboard_snapshot(
+            room_code, room_state.resync_snapshot()
         )
-        leaderboard_raw = cursor.fetchall()
-
-        leaderboard_data = [
-            {
-                "id": uid,
-                "name": name,
-                "image": photo,
-                "rank": idx + 1,
-                "totalPoints": score,
-            }
-            for idx, (uid, name, score, photo) in enumerate(leaderboard_raw)
-        ]
-
-        await manager.send_leaderboard(room_code, leaderboard_data)
-
-        return {
-            "answer_id": answer_id,
-            "question_show_id": question_show_id,
-            "is_correct": is_correct,
-        }
-
-    except Exception as e:
-        connection.rollback()
-        return {"error": str(e)}
-
-    finally:
-        cursor.close()
-        connection.close()
+    await manager.broadcast(
+        "quiz_started",
+        room_code,
+        {"starts_in": question_scheduler.intermission},
+    )
+    return {}
+
+
+@room_owner.handler("show_question")
+async def _show_question(room_code: str, payload: dict):
+    room_state = await room_engine.get(room_code)
+    if room_state is None or room_state.host_id != payload["user_id"]:
+        return {}
+    if question_scheduler.is_running(room_code):
+        return {"error": "Quiz is running on a schedule"}
+
+    result = await room_engine.show_question(room_code, payload.get("question_index"))
+    if "error" in result:
+        return result
+    await manager.broadcast("question", room_code, result)
+    return {}
+
+
+@room_owner.handler("close_question")
+async def _close_question(room_code: str, payload: dict):
+    room_state = await room_engine.get(room_code)
+    if room_state is None or room_state.host_id != payload["user_id"]:
+        return {}
+    if question_scheduler.is_running(room_code):
+        await question_scheduler.close_now(room_code)
+        return {}
+
+    await room_engine.close_question(
+        room_code,
+        question_id=payload.get("question_id"),
+        question_index=payload.get("question_index"),
+    )
+    await leaderboard_flusher.flush(room_state)
+    await manager.broadcast("question_closed", room_code, payload.get("data"))
+    return {}
+
+
+@room_owner.handler("drop")
+async def _drop(room_code: str, payload: dict):
+    # Last socket for the room has gone, on every worker
+    question_scheduler.stop(room_code)
+    room_engine.drop(room_code)
+    leaderboard_flusher.discard(room_code)
+    # The next owner loads the room from the database
+    await answer_log.flush()
+    await room_owner.release(room_code)
+    return {}
+
+
+async def _acquired_room(room_code: str):
+    # Taken over from a worker that released or lost it: loading rebuilds
+    # totals and answers from the database and resumes a running schedule
+    await room_engine.get(room_code)
+
+
+async def _lost_room(room_code: str):
+    # The claim ran out while this worker still held the room (a stalled
+    # event loop or a partition), so another worker loaded it without this
+    # worker's unflushed answers. Not a supported handover
+    print(
+        f"Room Owner Error: lost room {room_code} to another worker; "
+        "its scores may lag until this worker's answer log is flushed"
+    )
+    question_scheduler.stop(room_code)
+    leaderboard_flusher.discard(room_code)
+    room_engine.forget(room_code)
+    await answer_log.flush()
+
+
+room_owner.on_acquired = _acquired_room
+room_owner.on_lost = _lost_room
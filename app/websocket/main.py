@@ -9,21 +9,29 @@ from fastapi import (
 from datetime import datetime, timezone
 from starlette.websockets import WebSocketState
 import json
+import time
 
 # Project Imports
 from services.response_handler import verify_bearer_token, verify_bearer_token_manual
 from database.connect_db import connect_database
+from database.async_db import fetch_one
 from services.room_code import room_code_generator
-from app.websocket.websocket_manager.ws_manager import ConnectionManager
+from services.metrics import observe_answer
+from app.websocket.websocket_manager.ws_manager import manager
 from app.websocket.models.models import AnswerSchema
 from app.websocket.models.output_response import (
     AnswerResponseSchema,
     LeaderboardResponse,
 )
-from app.websocket.helper.helper_functions import process_answer_and_update_leaderboard
+from app.websocket.helper.helper_functions import (
+    parse_answer,
+    process_answer_and_update_leaderboard,
+)
+from app.websocket.pubsub.room_owner import room_owner
+from app.websocket.room_state.room_resolver import room_resolver
+from app.websocket.room_state.membership import membership
 
 app = APIRouter()
-manager = ConnectionManager()
 
 
 @app.get("/room-code")
@@ -40,12 +48,12 @@ def room_code_transfer(
         query = """
             INSERT INTO rooms (room_code, quiz_id, created_by)
             VALUES (%s, %s, %s)
-            RETURNING id
+            RETURNING id, quiz_id, created_by
         """
         cursor.execute(query, (room_code, quiz_id, creator_id))
-        fetched_id = cursor.fetchone()[0]
+        created_room = cursor.fetchone()
 
-        if not fetched_id:
+        if not created_room:
             raise HTTPException(status_code=500, detail="Something went wrong")
 
         cursor.execute("SELECT username FROM users WHERE id=%s", (creator_id,))
@@ -58,6 +66,8 @@ def room_code_transfer(
         (room_host_name,) = fetched_username
 
         connection.commit()
+        room_resolver.prime(room_code, *created_room)
+
         return {
             "room_code": room_code,
             "room_host": room_host_name,
@@ -83,26 +93,19 @@ def check_user(
     user_id = auth.get("id")
 
     try:
-        cursor.execute(
-            "SELECT id, quiz_id FROM rooms WHERE room_code = %s", (room_code,)
-        )
-        room = cursor.fetchone()
+        room = room_resolver.resolve_sync(cursor, room_code)
 
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
 
-        room_id, quiz_id = room
+        room_id, quiz_id = room.room_id, room.quiz_id
 
-        cursor.execute(
-            "SELECT id FROM room_participants WHERE room_id = %s AND user_id = %s",
-            (room_id, user_id),
-        )
-        existing = cursor.fetchone()
+        existing = membership.lookup_sync(cursor, room_id, user_id)
 
         if existing:
             return {
                 "message": "Already Joined",
-                "participant_id": existing[0],
+                "participant_id": existing,
                 "is_joined": True,
                 "quiz_id": quiz_id,
             }
@@ -114,6 +117,7 @@ def check_user(
         )
         participant_id = cursor.fetchone()[0]
         connection.commit()
+        membership.add(room_id, user_id, participant_id)
 
         return {
             "message": "Joined",
@@ -133,8 +137,9 @@ def check_user(
 @app.websocket("/{room_code}")
 async def websocket_endpoint(websocket: WebSocket, room_code: str):
     token = websocket.query_params.get("token")
+    leaderboard_mode = websocket.query_params.get("leaderboard", "full")
 
-    if not token:
+    if not token or leaderboard_mode not in ("full", "delta"):
         await websocket.close(code=1008)
         return
 
@@ -146,18 +151,37 @@ async def websocket_endpoint(websocket: WebSocket, room_code: str):
             await websocket.close(code=1008)
             return
 
-        conn = connect_database()
-        cursor = conn.cursor()
-        cursor.execute("SELECT username, photo FROM users WHERE id = %s", (user_id,))
-        result = cursor.fetchone()
+        result = await fetch_one(
+            "SELECT username, photo, full_name FROM users WHERE id = %s", (user_id,)
+        )
 
         if not result:
             await websocket.close(code=1008)
             return
 
-        username, photo = result
+        username, photo, full_name = result
+
+        await manager.connect(
+            websocket, room_code, username, user_id, photo, leaderboard_mode
+        )
 
-        await manager.connect(websocket, room_code, username, user_id, photo)
+        # Warm the membership index, and tell the room's owner about the
+        # late joiner
+        room = await room_resolver.resolve(room_code)
+        if room is not None:
+            participant_id = await membership.lookup(room.room_id, user_id)
+            joined = await room_owner.call(
+                room_code,
+                "join",
+                {
+                    "participant_id": participant_id,
+                    "user_id": user_id,
+                    "full_name": full_name,
+                    "photo": photo,
+                },
+            )
+            if leaderboard_mode == "delta" and joined.get("snapshot"):
+                await manager.send_leaderboard_snapshot(websocket, joined["snapshot"])
 
         while True:
             data = await websocket.receive_text()
@@ -174,10 +198,56 @@ async def websocket_endpoint(websocket: WebSocket, room_code: str):
                 await manager.broadcast("chat", room_code, f"{username}: {msg_data}")
 
             elif msg_type == "answer":
-                result = await process_answer_and_update_leaderboard(
-                    user_id, room_code, msg_data
+                started = time.perf_counter()
+                received_at = datetime.now(timezone.utc)
+                try:
+                    question_id, selected_option = parse_answer(msg_data)
+                except ValueError as e:
+                    result = {"error": str(e)}
+                    await manager.send(websocket, "error", result)
+                else:
+                    result = await process_answer_and_update_leaderboard(
+                        user_id,
+                        room_code,
+                        selected_option,
+                        received_at,
+                        question_id=question_id,
+                    )
+                    await manager.send(websocket, "answer_ack", result)
+                observe_answer("websocket", started, result)
+
+            elif msg_type == "question":
+                question_data = msg_data if isinstance(msg_data, dict) else {}
+                result = await room_owner.call(
+                    room_code,
+                    "show_question",
+                    {
+                        "user_id": user_id,
+                        "question_index": question_data.get("question_index"),
+                    },
                 )
-                await websocket.send_json({"type": "answer_ack", "data": result})
+                if "error" in result:
+                    await manager.send(websocket, "error", result)
+
+            elif msg_type == "question_closed":
+                question_data = msg_data if isinstance(msg_data, dict) else {}
+                await room_owner.call(
+                    room_code,
+                    "close_question",
+                    {
+                        "user_id": user_id,
+                        "question_id": question_data.get("question_id"),
+                        "question_index": question_data.get("question_index"),
+                        "data": msg_data,
+                    },
+                )
+
+            elif msg_type == "leaderboard_sync":
+                result = await room_owner.call(room_code, "snapshot")
+                if result.get("snapshot"):
+                    await manager.send_leaderboard_snapshot(
+                        websocket, result["snapshot"]
+                    )
 
             else:
                 pass
@@ -185,6 +255,8 @@ async def websocket_endpoint(websocket: WebSocket, room_code: str):
     except WebSocketDisconnect:
         manager.disconnect(websocket)
         await manager.broadcast_user_list(room_code)
+        if await manager.room_is_empty(room_code):
+            await room_owner.call(room_code, "drop")
 
     except Exception as e:
         print("WebSocket Error:", e)
@@ -196,38 +268,26 @@ async def websocket_endpoint(websocket: WebSocket, room_code: str):
 async def start_quiz(room_code: str, auth: dict = Depends(verify_bearer_token)):
     user_id = auth.get("id")
 
-    connection = connect_database()
-    cursor = connection.cursor()
-
     try:
-        cursor.execute(
-            "SELECT id, created_by FROM rooms WHERE room_code = %s",
-            (room_code,),
-        )
-        room = cursor.fetchone()
+        room = await room_resolver.resolve(room_code)
 
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
 
-        room_id, room_host_id = room
-
-        if user_id != room_host_id:
+        if user_id != room.created_by:
             raise HTTPException(
                 status_code=403, detail="Only room host can start the quiz"
             )
 
-        await manager.broadcast("quiz_started", room_code)
+        result = await room_owner.call(room_code, "start")
+        if "error" in result:
+            raise HTTPException(status_code=500, detail=result["error"])
 
         return {"message": "Quiz Started By Room Host"}
 
     except Exception as e:
-        connection.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-    finally:
-        cursor.close()
-        connection.close()
-
 
 @app.post("/{room_code}/game")
 async def submit_answer(
@@ -235,114 +295,26 @@ async def submit_answer(
     answer_data: AnswerSchema,
     auth: dict = Depends(verify_bearer_token),
 ):
-    connection = connect_database()
-    cursor = connection.cursor()
     user_id = auth.get("id")
+    started = time.perf_counter()
+    received_at = datetime.now(timezone.utc)
 
     try:
-        cursor.execute(
-            "SELECT id, quiz_id FROM rooms WHERE room_code = %s", (room_code,)
-        )
-        room = cursor.fetchone()
-        if not room:
-            raise HTTPException(status_code=400, detail="Invalid room code")
-        room_id, quiz_id = room
-
-        cursor.execute(
-            "SELECT id FROM room_participants WHERE user_id = %s AND room_id = %s",
-            (user_id, room_id),
-        )
-        participant = cursor.fetchone()
-        if not participant:
-            raise HTTPException(status_code=400, detail="User not in this room")
-        participant_id = participant[0]
-
-        cursor.execute(
-            """
-            SELECT id, correct_option 
-            FROM quiz_questions 
-            WHERE question_index = %s AND quiz_id = %s
-            """,
-            (answer_data.question_index, quiz_id),
-        )
-        question = cursor.fetchone()
-        if not question:
-            raise HTTPException(status_code=400, detail="Question not found")
-        question_id, correct_option = question
-
-        selected_option = answer_data.selected_option
-        is_correct = str(correct_option) == str(selected_option)
-
-        if is_correct:
-            cursor.execute(
-                "UPDATE room_participants SET score = score + %s WHERE id = %s",
-                (answer_data.point, participant_id),
-            )
-
-        cursor.execute(
-            "INSERT INTO room_questions (room_id, question_id, shown_at) VALUES (%s, %s, %s) RETURNING id",
-            (room_id, question_id, datetime.now(timezone.utc)),
-        )
-        question_show_id = cursor.fetchone()[0]
-
-        answered_at = answer_data.answered_at
-        cursor.execute(
-            """
-            INSERT INTO room_answers (
-                room_id, participant_id, question_id,
-                selected_option, is_correct, answered_at
-            ) VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
-            """,
-            (
-                room_id,
-                participant_id,
-                question_id,
-                selected_option,
-                is_correct,
-                answered_at,
-            ),
+        result = await process_answer_and_update_leaderboard(
+            user_id,
+            room_code,
+            answer_data.selected_option,
+            received_at,
+            question_index=answer_data.question_index,
         )
-        answer_id = cursor.fetchone()[0]
+        observe_answer("http", started, result)
+        if "error" in result:
+            raise HTTPException(status_code=400, detail=result["error"])
 
-        connection.commit()
-
-        cursor.execute(
-            """
-            SELECT u.id, u.full_name, rp.score, u.photo
-            FROM room_participants rp
-            JOIN users u ON rp.user_id = u.id
-            WHERE rp.room_id = %s
-            ORDER BY rp.score DESC
-            """,
-            (room_id,),
-        )
-        leaderboard_raw = cursor.fetchall()
-
-        leaderboard_data = [
-            {
-                "id": uid,
-                "name": name,
-                "image": photo,
-                "rank": idx + 1,
-                "totalPoints": score,
-            }
-            for idx, (uid, name, score, photo) in enumerate(leaderboard_raw)
-        ]
-
-        await manager.send_leaderboard(room_code, leaderboard_data)
-
-        return {
-            "answer_id": answer_id,
-            "question_show_id": question_show_id,
-            "is_correct": is_correct,
-        }
+        return result
 
     except Exception as e:
-        connection.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        cursor.close()
-        connection.close()
 
 
 @app.get("/{room_code}/{quiz_id}/{user_id}/result", response_model=AnswerResponseSchema)
@@ -356,11 +328,10 @@ def each_user_result(
     cursor = connection.cursor()
 
     try:
-        cursor.execute("SELECT id FROM rooms WHERE room_code = %s", (room_code,))
-        room = cursor.fetchone()
+        room = room_resolver.resolve_sync(cursor, room_code)
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
-        room_id = room[0]
+        room_id = room.room_id
 
         cursor.execute(
             """
@@ -440,11 +411,10 @@ def leaderboard(
     cursor = connection.cursor()
 
     try:
-        cursor.execute("SELECT id FROM rooms WHERE room_code = %s", (room_code,))
-        room = cursor.fetchone()
+        room = room_resolver.resolve_sync(cursor, room_code)
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
-        room_id = room[0]
+        room_id = room.room_id
 
         cursor.execute(
             """
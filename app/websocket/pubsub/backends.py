@@ -0,0 +1,314 @@
+import asyncio
+import json
+import time
+
+
+def room_channel(room_code: str) -> str:
+    return f"quizit:room:{room_code}"
+
+
+def worker_channel(worker_id: str) -> str:
+    return f"quizit:worker:{worker_id}"
+
+
+class InProcessBackend:
+    """Pub/sub broker shared by every ConnectionManager in this process.
+
+    Enough for a single worker, and lets several managers in one process
+    stand in for separate workers.
+    """
+
+    _subscribers: dict[str, set] = {}
+    # room_code -> worker_id -> user_id -> info
+    _presence: dict[str, dict[str, dict[int, dict]]] = {}
+    # room_code -> (owner worker_id, monotonic expiry)
+    _owners: dict[str, tuple[str, float]] = {}
+    _handlers: set = set()
+
+    def __init__(self, presence_ttl: float = 30.0):
+        self.presence_ttl = presence_ttl
+        self.worker_id = None
+        self._on_message = None
+
+    @property
+    def distributed(self) -> bool:
+        return len(self._handlers) > 1
+
+    async def start(self, on_message, worker_id: str):
+        self._on_message = on_message
+        self.worker_id = worker_id
+        self._handlers.add(self)
+
+    async def close(self):
+        self._handlers.discard(self)
+        for subscribers in self._subscribers.values():
+            subscribers.discard(self)
+        for room_code in list(self._presence):
+            self._drop_worker_presence(room_code)
+
+    async def subscribe(self, channel: str):
+        self._subscribers.setdefault(channel, set()).add(self)
+
+    async def unsubscribe(self, channel: str):
+        subscribers = self._subscribers.get(channel)
+        if subscribers is not None:
+            subscribers.discard(self)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    async def publish(self, channel: str, message: str):
+        for subscriber in list(self._subscribers.get(channel, ())):
+            if subscriber._on_message is not None:
+                await subscriber._on_message(channel, message)
+
+    def _drop_worker_presence(self, room_code: str):
+        workers = self._presence.get(room_code, {})
+        workers.pop(self.worker_id, None)
+        if not workers:
+            self._presence.pop(room_code, None)
+
+    async def add_presence(self, room_code: str, user_id: int, info: dict):
+        workers = self._presence.setdefault(room_code, {})
+        workers.setdefault(self.worker_id, {})[user_id] = info
+
+    async def remove_presence(self, room_code: str, user_id: int):
+        users = self._presence.get(room_code, {}).get(self.worker_id)
+        if users is not None:
+            users.pop(user_id, None)
+            if not users:
+                self._drop_worker_presence(room_code)
+
+    async def refresh_presence(self, room_codes):
+        # Nothing expires in process: a dead worker takes the broker with it
+        pass
+
+    async def get_presence(self, room_code: str) -> list[dict]:
+        users = {}
+        for worker_users in self._presence.get(room_code, {}).values():
+            users.update(worker_users)
+        return list(users.values())
+
+    async def claim_owner(self, room_code: str, ttl: float) -> str:
+        now = time.monotonic()
+        owner = self._owners.get(room_code)
+        if owner is None or owner[1] <= now or owner[0] == self.worker_id:
+            self._owners[room_code] = (self.worker_id, now + ttl)
+            return self.worker_id
+        return owner[0]
+
+    async def release_owner(self, room_code: str):
+        owner = self._owners.get(room_code)
+        if owner is not None and owner[0] == self.worker_id:
+            del self._owners[room_code]
+
+
+class RedisBackend:
+    """Pub/sub and room presence over any Redis-compatible server.
+
+    Each worker keeps its own presence hash per room with an expiry that its
+    heartbeat refreshes, so the users of a worker that dies without cleaning
+    up drop out of the room once the TTL passes.
+    """
+
+    distributed = True
+
+    def __init__(self, client, presence_ttl: float = 30.0):
+        self.client = client
+        self.presence_ttl = presence_ttl
+        self.worker_id = None
+        self._pubsub = client.pubsub()
+        self._reader = None
+        self._on_message = None
+        self._presence_rooms: set[str] = set()
+
+    async def start(self, on_message, worker_id: str):
+        self._on_message = on_message
+        self.worker_id = worker_id
+        self._reader = asyncio.ensure_future(self._read_loop())
+
+    async def _read_loop(self):
+        while True:
+            try:
+                if not self._pubsub.subscribed:
+                    await asyncio.sleep(0.1)
+                    continue
+                message = await self._pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=1.0
+                )
+                if message is None:
+                    continue
+
+                channel = message["channel"]
+                data = message["data"]
+                if isinstance(channel, bytes):
+                    channel = channel.decode()
+                if isinstance(data, bytes):
+                    data = data.decode()
+                await self._on_message(channel, data)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("PubSub Read Error:", e)
+                await asyncio.sleep(1.0)
+
+    async def close(self):
+        if self._reader is not None:
+            self._reader.cancel()
+        try:
+            await self._clear_presence()
+        except Exception as e:
+            print("PubSub Presence Cleanup Error:", e)
+        await self._pubsub.aclose()
+        await self.client.aclose()
+
+    async def _clear_presence(self):
+        # Clean shutdown; a crashed worker's entries expire instead
+        if not self._presence_rooms:
+            return
+        async with self.client.pipeline(transaction=False) as pipe:
+            for room_code in self._presence_rooms:
+                workers_key, users_key = self._presence_keys(room_code)
+                pipe.delete(users_key)
+                pipe.srem(workers_key, self.worker_id)
+            await pipe.execute()
+        self._presence_rooms.clear()
+
+    async def subscribe(self, channel: str):
+        await self._pubsub.subscribe(channel)
+
+    async def unsubscribe(self, channel: str):
+        await self._pubsub.unsubscribe(channel)
+
+    async def publish(self, channel: str, message: str):
+        await self.client.publish(channel, message)
+
+    def _presence_keys(self, room_code: str, worker_id: str | None = None):
+        key = room_channel(room_code)
+        return f"{key}:workers", f"{key}:users:{worker_id or self.worker_id}"
+
+    async def add_presence(self, room_code: str, user_id: int, info: dict):
+        workers_key, users_key = self._presence_keys(room_code)
+        ttl = int(self.presence_ttl * 1000)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.hset(users_key, user_id, json.dumps(info))
+            pipe.pexpire(users_key, ttl)
+            pipe.sadd(workers_key, self.worker_id)
+            pipe.pexpire(workers_key, ttl)
+            await pipe.execute()
+        self._presence_rooms.add(room_code)
+
+    async def remove_presence(self, room_code: str, user_id: int):
+        _, users_key = self._presence_keys(room_code)
+        await self.client.hdel(users_key, user_id)
+
+    async def refresh_presence(self, room_codes):
+        ttl = int(self.presence_ttl * 1000)
+        async with self.client.pipeline(transaction=False) as pipe:
+            for room_code in room_codes:
+                workers_key, users_key = self._presence_keys(room_code)
+                pipe.pexpire(users_key, ttl)
+                pipe.sadd(workers_key, self.worker_id)
+                pipe.pexpire(workers_key, ttl)
+            await pipe.execute()
+
+    async def claim_owner(self, room_code: str, ttl: float) -> str:
+        # Takes the room if nobody holds it, renews it if this worker does,
+        # and otherwise returns the current owner. The renewal is checked
+        # and applied in one transaction, so a claim that expired and went
+        # to another worker meanwhile is never extended by this one
+        from redis.exceptions import WatchError
+
+        key = f"{room_channel(room_code)}:owner"
+        ttl_ms = int(ttl * 1000)
+        if await self.client.set(key, self.worker_id, nx=True, px=ttl_ms):
+            return self.worker_id
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    owner = await pipe.get(key)
+                    if isinstance(owner, bytes):
+                        owner = owner.decode()
+                    if owner is not None and owner != self.worker_id:
+                        await pipe.unwatch()
+                        return owner
+                    pipe.multi()
+                    pipe.set(key, self.worker_id, px=ttl_ms)
+                    await pipe.execute()
+                    return self.worker_id
+                except WatchError:
+                    continue  # Changed under us; read it again
+
+    async def release_owner(self, room_code: str):
+        from redis.exceptions import WatchError
+
+        key = f"{room_channel(room_code)}:owner"
+        async with self.client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                owner = await pipe.get(key)
+                if isinstance(owner, bytes):
+                    owner = owner.decode()
+                if owner != self.worker_id:
+                    await pipe.unwatch()
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+            except WatchError:
+                pass  # Claimed by another worker meanwhile; theirs now
+
+    async def get_presence(self, room_code: str) -> list[dict]:
+        workers_key, _ = self._presence_keys(room_code)
+        workers = [
+            worker.decode() if isinstance(worker, bytes) else worker
+            for worker in await self.client.smembers(workers_key)
+        ]
+        if not workers:
+            return []
+
+        async with self.client.pipeline(transaction=False) as pipe:
+            for worker in workers:
+                pipe.hgetall(self._presence_keys(room_code, worker)[1])
+            worker_users = await pipe.execute()
+
+        users = {}
+        for worker, entries in zip(workers, worker_users):
+            if not entries:
+                # Expired or emptied; a live worker re-adds itself on its
+                # next heartbeat
+                await self.client.srem(workers_key, worker)
+                continue
+            for user_id, info in entries.items():
+                users[int(user_id)] = json.loads(info)
+        return list(users.values())
+
+
+def create_backend(name: str, url: str | None = None, presence_ttl: float = 30.0):
+    if name == "memory":
+        return InProcessBackend(presence_ttl)
+
+    if name == "redis":
+        import redis.asyncio as redis_asyncio
+
+        return RedisBackend(redis_asyncio.from_url(url), presence_ttl)
+
+    if name == "fakeredis":
+        # Redis-compatible stand-in for local runs and tests; every backend
+        # created in this process shares one fake server
+        import fakeredis
+        import fakeredis.aioredis
+
+        global _fake_server
+        if _fake_server is None:
+            _fake_server = fakeredis.FakeServer()
+        return RedisBackend(
+            fakeredis.aioredis.FakeRedis(server=_fake_server), presence_ttl
+        )
+
+    raise ValueError(f"Unknown PUBSUB_BACKEND: {name}")
+
+
+_fake_server = None
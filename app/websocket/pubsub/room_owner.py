@@ -0,0 +1,173 @@
+import asyncio
+import uuid
+
+# Project Imports
+from app.websocket.websocket_manager.ws_manager import manager
+from helper.config import ROOM_OWNER_TTL, ROOM_OWNER_CALL_TIMEOUT
+
+
+class RoomOwnerRouter:
+    """Runs live-room operations on the one worker that owns the room.
+
+    With a distributed bus the first worker to touch a room claims it on the
+    backend and renews the claim while it holds the room. Every other worker
+    forwards answers and host actions to the owner over its worker channel
+    and relays the reply, so totals, the answered set and the leaderboard
+    sequence exist once and only the owner publishes leaderboards. Without a
+    distributed bus every call runs locally.
+
+    An owner scores its rooms and flushes its answer log before releasing
+    them, and the next owner loads them from the database. A crashed
+    owner's unflushed answers only arrive once another worker adopts its
+    spool, so until then the room it took over lacks them.
+    """
+
+    def __init__(self, manager, ttl: float, timeout: float):
+        self.manager = manager
+        self.ttl = ttl
+        self.timeout = timeout
+        self.handlers = {}
+        # Coroutine functions called with a room_code when this worker takes
+        # a room over, and when another worker has taken one of its rooms
+        self.on_acquired = None
+        self.on_lost = None
+        self._owned: set[str] = set()
+        self._calls: dict[str, asyncio.Future] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._heartbeat = None
+        manager.on_direct_message = self.on_message
+
+    def handler(self, op: str):
+        def register(function):
+            self.handlers[op] = function
+            return function
+
+        return register
+
+    def _bus(self):
+        bus = self.manager.bus
+        return bus if bus is not None and bus.distributed else None
+
+    async def start(self):
+        self._heartbeat = asyncio.ensure_future(self._renew())
+
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        for room_code in list(self._owned):
+            await self.release(room_code)
+
+    async def call(self, room_code: str, op: str, payload: dict = None) -> dict:
+        payload = payload or {}
+        bus = self._bus()
+        if bus is None:
+            return await self._run(room_code, op, payload)
+
+        owner = await bus.claim_owner(room_code, self.ttl)
+        if owner == self.manager.worker_id:
+            await self._acquired(room_code)
+            return await self._run(room_code, op, payload)
+
+        call_id = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self._calls[call_id] = future
+        try:
+            await self.manager.send_to_worker(
+                owner,
+                {
+                    "kind": "call",
+                    "id": call_id,
+                    "reply_to": self.manager.worker_id,
+                    "room_code": room_code,
+                    "op": op,
+                    "payload": payload,
+                },
+            )
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            return {"error": "Room owner did not respond"}
+        finally:
+            self._calls.pop(call_id, None)
+
+    async def _acquired(self, room_code: str):
+        if room_code in self._owned:
+            return
+        self._owned.add(room_code)
+        if self.on_acquired is not None:
+            try:
+                await self.on_acquired(room_code)
+            except Exception as e:
+                print("Room Owner Takeover Error:", e)
+
+    async def release(self, room_code: str):
+        self._owned.discard(room_code)
+        bus = self._bus()
+        if bus is not None:
+            await bus.release_owner(room_code)
+
+    async def _run(self, room_code: str, op: str, payload: dict) -> dict:
+        handler = self.handlers.get(op)
+        if handler is None:
+            return {"error": f"Unknown room operation: {op}"}
+        try:
+            return await handler(room_code, payload)
+        except Exception as e:
+            return {"error": str(e)}
+
+    async def on_message(self, message: dict):
+        if message.get("kind") == "reply":
+            future = self._calls.get(message["id"])
+            if future is not None and not future.done():
+                future.set_result(message["result"])
+            return
+
+        # Served off the bus reader so one slow call does not hold up others
+        task = asyncio.ensure_future(self._serve(message))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _serve(self, message: dict):
+        # call() again rather than _run(): if the claim moved on since the
+        # caller looked, the request follows it to the new owner
+        try:
+            result = await self.call(
+                message["room_code"], message["op"], message["payload"]
+            )
+        except Exception as e:
+            result = {"error": str(e)}
+        try:
+            await self.manager.send_to_worker(
+                message["reply_to"],
+                {"kind": "reply", "id": message["id"], "result": result},
+            )
+        except Exception as e:
+            print("Room Owner Reply Error:", e)
+
+    async def _renew(self):
+        # Keeps this worker's rooms claimed, and takes over rooms it has
+        # sockets in whose owner stopped renewing (a crashed worker), so a
+        # scheduled quiz carries on without waiting for a client message.
+        # A room whose claim was taken over while this worker was
+        # unreachable is handed back via on_lost
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            bus = self._bus()
+            if bus is None:
+                continue
+            rooms = set(self._owned) | set(self.manager.active_connections)
+            for room_code in rooms:
+                try:
+                    owner = await bus.claim_owner(room_code, self.ttl)
+                except Exception as e:
+                    print("Room Owner Heartbeat Error:", e)
+                    continue
+                if owner == self.manager.worker_id:
+                    await self._acquired(room_code)
+                elif room_code in self._owned:
+                    self._owned.discard(room_code)
+                    if self.on_lost is not None:
+                        await self.on_lost(room_code)
+
+
+room_owner = RoomOwnerRouter(manager, ROOM_OWNER_TTL, ROOM_OWNER_CALL_TIMEOUT)
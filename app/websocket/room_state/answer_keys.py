@@ -0,0 +1,62 @@
+import asyncio
+
+# Project Imports
+from database.async_db import fetch_all
+from services.lru_cache import LRUCache, MISSING
+from helper.config import ANSWER_KEY_CACHE_SIZE, ANSWER_KEY_CACHE_TTL
+
+
+class AnswerKeyCache:
+    """Answer keys per quiz, shared by every room playing that quiz.
+
+    Each entry is a tuple of (question_id, question_index, correct_option,
+    points, duration) rows. This worker drops an entry when it edits or
+    deletes the quiz; edits made on other workers are picked up once the
+    entry's TTL runs out.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None):
+        self.cache = LRUCache(max_size, ttl, name="answer_keys")
+        self._loading: dict[int, asyncio.Task] = {}
+        # Quizzes invalidated while a load was in flight: that load's rows
+        # may predate the edit, so they are not cached
+        self._stale: set[int] = set()
+
+    async def _load(self, quiz_id: int):
+        rows = await fetch_all(
+            """
+            SELECT id, question_index, correct_option, points, duration
+            FROM quiz_questions
+            WHERE quiz_id = %s
+            ORDER BY question_index
+            """,
+            (quiz_id,),
+        )
+        answer_key = tuple(tuple(row) for row in rows)
+        if quiz_id in self._stale:
+            self._stale.discard(quiz_id)
+        else:
+            self.cache.set(quiz_id, answer_key)
+        return answer_key
+
+    async def get(self, quiz_id: int) -> tuple:
+        quiz_id = int(quiz_id)
+        answer_key = self.cache.get(quiz_id)
+        if answer_key is not MISSING:
+            return answer_key
+
+        task = self._loading.get(quiz_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load(quiz_id))
+            self._loading[quiz_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(quiz_id, None))
+        return await asyncio.shield(task)
+
+    def invalidate(self, quiz_id):
+        quiz_id = int(quiz_id)
+        if quiz_id in self._loading:
+            self._stale.add(quiz_id)
+        self.cache.invalidate(quiz_id)
+
+
+answer_keys = AnswerKeyCache(ANSWER_KEY_CACHE_SIZE, ANSWER_KEY_CACHE_TTL)
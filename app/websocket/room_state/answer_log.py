@@ -0,0 +1,499 @@
+import asyncio
+import fcntl
+import glob
+import json
+import os
+import psycopg2
+from datetime import datetime
+
+# Project Imports
+from database.async_db import async_transaction
+from helper.config import (
+    ANSWER_LOG_BATCH_SIZE,
+    ANSWER_LOG_FLUSH_INTERVAL_MS,
+    ANSWER_LOG_SPOOL_PATH,
+    ANSWER_LOG_SPOOL_FSYNC,
+    ANSWER_LOG_MAX_RETRIES,
+    ANSWER_LOG_MAX_PENDING,
+    ANSWER_LOG_DEAD_LETTER_PATH,
+)
+
+# Failures that say nothing about the records themselves; batches hit by
+# these are retried whole
+TRANSIENT_ERRORS = (
+    psycopg2.OperationalError,
+    psycopg2.InterfaceError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+
+class AnswerRecord:
+    __slots__ = (
+        "room_id",
+        "participant_id",
+        "question_id",
+        "selected_option",
+        "is_correct",
+        "awarded",
+        "answered_at",
+        "attempts",
+    )
+
+    def __init__(
+        self,
+        room_id,
+        participant_id,
+        question_id,
+        selected_option,
+        is_correct,
+        awarded,
+        answered_at,
+        attempts=0,
+    ):
+        self.room_id = room_id
+        self.participant_id = participant_id
+        self.question_id = question_id
+        self.selected_option = selected_option
+        self.is_correct = is_correct
+        self.awarded = awarded
+        self.answered_at = answered_at
+        self.attempts = attempts
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.__slots__}
+        if isinstance(data["answered_at"], datetime):
+            data["answered_at"] = data["answered_at"].isoformat()
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict())
+
+    @classmethod
+    def from_json(cls, line: str):
+        data = json.loads(line)
+        if data["answered_at"]:
+            data["answered_at"] = datetime.fromisoformat(data["answered_at"])
+        return cls(**data)
+
+
+# Each answer is logged twice: unscored (is_correct and awarded NULL) when
+# it is accepted, and scored when its question closes. The scored record
+# fills in the stored row, or inserts it if the first one has not landed.
+# ON CONFLICT against the unique (room_id, participant_id, question_id)
+# index (migration 005) keeps replays and concurrent flushes from storing
+# or scoring an answer twice; only rows that became scored here add to the
+# participant's score
+INSERT_ANSWERS_QUERY = """
+    WITH v (room_id, participant_id, question_id, selected_option,
+            is_correct, awarded, answered_at) AS (
+        VALUES {values}
+    ),
+    latest AS (
+        SELECT DISTINCT ON (room_id, participant_id, question_id) *
+        FROM v
+        ORDER BY room_id, participant_id, question_id, is_correct IS NULL
+    ),
+    written AS (
+        INSERT INTO room_answers (
+            room_id, participant_id, question_id,
+            selected_option, is_correct, answered_at
+        )
+        SELECT room_id, participant_id, question_id,
+               selected_option, is_correct, answered_at
+        FROM latest
+        ON CONFLICT (room_id, participant_id, question_id) DO UPDATE
+            SET is_correct = EXCLUDED.is_correct
+            WHERE room_answers.is_correct IS NULL
+              AND EXCLUDED.is_correct IS NOT NULL
+        RETURNING room_id, participant_id, question_id, is_correct
+    )
+    UPDATE room_participants AS rp
+    SET score = rp.score + s.total
+    FROM (
+        SELECT l.participant_id, SUM(l.awarded) AS total
+        FROM written w
+        JOIN latest l USING (room_id, participant_id, question_id)
+        WHERE w.is_correct IS NOT NULL
+        GROUP BY l.participant_id
+    ) AS s
+    WHERE rp.id = s.participant_id AND s.total <> 0
+"""
+
+INSERT_ANSWER_VALUES = "(%s::int, %s::int, %s::int, %s::int, %s::boolean, %s::int, %s::timestamptz)"
+
+
+class AnswerWriteBehind:
+    """Write-behind log for accepted and scored answers.
+
+    Answers are acknowledged once they are buffered (and spooled to disk when
+    a spool path is configured); a background task writes them to Postgres
+    in multi-row batches when the batch fills up or the interval elapses.
+
+    Each process spools under its own pid and holds a lock on that name
+    while it runs. On start it replays its own leftovers and adopts the
+    segments of workers whose lock nobody holds any more.
+
+    A batch the database rejects is retried one record at a time, so one bad
+    record cannot hold up the rest. Records that fail on their own, run out
+    of retries or overflow the buffer go to the dead-letter log.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        flush_interval: float,
+        spool_path: str | None = None,
+        spool_fsync: bool = True,
+        max_retries: int = 10,
+        max_pending: int = 100000,
+        dead_letter_path: str | None = None,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path or None
+        self.spool_fsync = spool_fsync
+        self.max_retries = max(1, max_retries)
+        self.max_pending = max(self.batch_size, max_pending)
+        self.dead_letter_path = dead_letter_path or None
+
+        self._buffer: list[AnswerRecord] = []
+        self._spool_prefix = None
+        self._spool_lock = None
+        self._spool_file = None
+        self._spool_segments: list[str] = []
+        self._segment_counter = 0
+        self._fsync_task = None
+        self._syncing = None  # (file, executor future) of the fsync in flight
+        self._unsynced = False
+        self._wakeup = asyncio.Event()
+        self._flusher = None
+        self._flush_lock = asyncio.Lock()
+        self._consecutive_failures = 0
+
+        self.flushed = 0
+        self.failed_flushes = 0
+        self.dead_lettered = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    async def start(self):
+        self._ensure_started()
+
+    def _ensure_started(self):
+        # Replays before this process spools anything, so only segments left
+        # by a previous run are picked up
+        if self._flusher is not None:
+            return
+        if self.spool_path:
+            self._lock_spool()
+            self._replay_spool()
+        self._flusher = asyncio.ensure_future(self._run())
+
+    def _lock_spool(self):
+        self._spool_prefix = f"{self.spool_path}.{os.getpid()}"
+        self._spool_lock = open(f"{self._spool_prefix}.lock", "a")
+        fcntl.flock(self._spool_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock_spool(self):
+        if self._spool_lock is None:
+            return
+        # Segments still on disk are left, lock file and all, for the next
+        # worker to adopt
+        if not self._spool_segments:
+            try:
+                os.remove(self._spool_lock.name)
+            except FileNotFoundError:
+                pass
+        self._spool_lock.close()
+        self._spool_lock = None
+
+    def _orphaned_segments(self):
+        # This worker's leftovers (a reused pid), segments of workers that
+        # died without releasing their lock, and unnamespaced segments from
+        # before spooling was per worker. Returns the segments and the dead
+        # workers' locks, held until their segments are adopted
+        segments = glob.glob(f"{self.spool_path}." + "[0-9]" * 12)
+        dead_locks = []
+        for lock_path in glob.glob(f"{self.spool_path}.*.lock"):
+            prefix = lock_path[: -len(".lock")]
+            if prefix != self._spool_prefix:
+                lock = open(lock_path, "a")
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    lock.close()
+                    continue  # Still running
+                dead_locks.append(lock)
+            segments.extend(glob.glob(f"{prefix}.[0-9]*"))
+        return sorted(segments), dead_locks
+
+    def _replay_spool(self):
+        segments, dead_locks = self._orphaned_segments()
+        own = f"{self._spool_prefix}."
+        for segment in segments:
+            if segment.startswith(own):
+                self._segment_counter = max(
+                    self._segment_counter, int(segment.rsplit(".", 1)[-1]) + 1
+                )
+
+        for segment in segments:
+            adopted = segment
+            if not segment.startswith(own):
+                # Renaming first means a segment is adopted by one worker only
+                adopted = self._next_segment()
+                try:
+                    os.rename(segment, adopted)
+                except FileNotFoundError:
+                    continue
+            with open(adopted) as spool:
+                for line in spool:
+                    if line.strip():
+                        self._buffer.append(AnswerRecord.from_json(line))
+            self._spool_segments.append(adopted)
+
+        for lock in dead_locks:
+            try:
+                os.remove(lock.name)
+            except FileNotFoundError:
+                pass
+            lock.close()
+        self._enforce_bound()
+
+    def _next_segment(self) -> str:
+        segment = f"{self._spool_prefix}.{self._segment_counter:012d}"
+        self._segment_counter += 1
+        return segment
+
+    def _open_spool_segment(self):
+        segment = self._next_segment()
+        self._spool_file = open(segment, "a")
+        self._spool_segments.append(segment)
+
+    def _spool(self, record: AnswerRecord):
+        if self._spool_file is None:
+            self._open_spool_segment()
+        self._spool_file.write(record.to_json() + "\n")
+        self._spool_file.flush()
+        if self.spool_fsync:
+            self._unsynced = True
+            if self._fsync_task is None:
+                self._fsync_task = asyncio.ensure_future(self._sync_spool())
+
+    async def _sync_spool(self):
+        # One fsync at a time, off the event loop; answers spooled while it
+        # runs are covered by the next round
+        loop = asyncio.get_running_loop()
+        try:
+            while self._unsynced and self._spool_file is not None:
+                self._unsynced = False
+                spool_file = self._spool_file
+                self._syncing = (
+                    spool_file,
+                    loop.run_in_executor(None, os.fsync, spool_file.fileno()),
+                )
+                await self._syncing[1]
+        except (OSError, ValueError) as e:
+            print("Answer Log Spool Sync Error:", e)
+        finally:
+            self._syncing = None
+            self._fsync_task = None
+
+    def _detach_spool_segment(self):
+        # Synchronous, so an answer submitted while the caller awaits goes to
+        # a fresh segment rather than one about to be closed and deleted
+        spool_file, self._spool_file = self._spool_file, None
+        return spool_file
+
+    async def _close_spool_file(self, spool_file):
+        if spool_file is None:
+            return
+        try:
+            syncing = self._syncing
+            if syncing is not None and syncing[0] is spool_file:
+                await syncing[1]
+            if self.spool_fsync:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, os.fsync, spool_file.fileno())
+        except (OSError, ValueError) as e:
+            print("Answer Log Spool Sync Error:", e)
+        finally:
+            spool_file.close()
+
+    def submit(self, record: AnswerRecord):
+        self._ensure_started()
+        if self.spool_path:
+            self._spool(record)
+
+        self._buffer.append(record)
+        self._enforce_bound()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _enforce_bound(self):
+        overflow = len(self._buffer) - self.max_pending
+        if overflow > 0:
+            self._dead_letter(self._buffer[:overflow], "buffer full")
+            del self._buffer[:overflow]
+
+    def _dead_letter(self, records: list[AnswerRecord], reason):
+        # Dead-lettered answers may still sit in a spool segment; replaying
+        # both is safe because inserts skip answers that are already stored
+        self.dead_lettered += len(records)
+        print(f"Answer Log Dead Letter ({reason}): {len(records)} answer(s)")
+        lines = [
+            json.dumps({"error": str(reason), "record": record.to_dict()}, default=str)
+            for record in records
+        ]
+        if not self.dead_letter_path:
+            for line in lines:
+                print(line)
+            return
+        try:
+            with open(self.dead_letter_path, "a") as dead_letter:
+                dead_letter.write("\n".join(lines) + "\n")
+        except OSError as e:
+            print("Answer Log Dead Letter Error:", e)
+            for line in lines:
+                print(line)
+
+    def _retry_delay(self) -> float:
+        # Backs off while the database is unreachable, up to half a minute
+        return min(self.flush_interval * 2 ** self._consecutive_failures, 30.0)
+
+    async def _run(self):
+        while True:
+            if self._consecutive_failures:
+                await asyncio.sleep(self._retry_delay())
+            else:
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.flush_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+
+            records = self._buffer
+            self._buffer = []
+
+            # Everything spooled so far is covered by this flush; new answers
+            # go to a fresh segment so the old ones can be deleted afterwards
+            segments = self._spool_segments
+            self._spool_segments = []
+            await self._close_spool_file(self._detach_spool_segment())
+
+            retry = []
+            for start in range(0, len(records), self.batch_size):
+                batch = records[start : start + self.batch_size]
+                try:
+                    await self._write_batch(batch)
+                    self.flushed += len(batch)
+                except TRANSIENT_ERRORS as e:
+                    print("Answer Log Flush Error:", e)
+                    self.failed_flushes += 1
+                    retry = records[start:]
+                    break
+                except Exception as e:
+                    print("Answer Log Flush Error:", e)
+                    self.failed_flushes += 1
+                    retry = await self._write_each(batch)
+                    if retry:
+                        retry.extend(records[start + self.batch_size :])
+                        break
+
+            self._consecutive_failures = self._consecutive_failures + 1 if retry else 0
+            self._requeue(retry)
+
+            if self.spool_path and self.spool_fsync:
+                # Requeued answers must be safely in the new segment before
+                # the old ones go
+                while self._fsync_task is not None:
+                    await self._fsync_task
+            for segment in segments:
+                try:
+                    os.remove(segment)
+                except FileNotFoundError:
+                    pass
+
+    async def _write_each(self, batch: list[AnswerRecord]) -> list[AnswerRecord]:
+        # The batch was rejected: write its records one by one so only the
+        # bad ones are set aside. Returns what is left to retry
+        for position, record in enumerate(batch):
+            try:
+                await self._write_batch([record])
+                self.flushed += 1
+            except TRANSIENT_ERRORS as e:
+                print("Answer Log Flush Error:", e)
+                return batch[position:]
+            except Exception as e:
+                self._dead_letter([record], e)
+        return []
+
+    def _requeue(self, records: list[AnswerRecord]):
+        keep = []
+        exhausted = []
+        for record in records:
+            record.attempts += 1
+            if record.attempts >= self.max_retries:
+                exhausted.append(record)
+            else:
+                keep.append(record)
+
+        if exhausted:
+            self._dead_letter(exhausted, f"gave up after {self.max_retries} attempts")
+        if self.spool_path:
+            for record in keep:
+                self._spool(record)
+        self._buffer = keep + self._buffer
+        self._enforce_bound()
+
+    async def _write_batch(self, records: list[AnswerRecord]):
+        answer_params = []
+        for record in records:
+            answer_params.extend(
+                (
+                    record.room_id,
+                    record.participant_id,
+                    record.question_id,
+                    record.selected_option,
+                    record.is_correct,
+                    record.awarded,
+                    record.answered_at,
+                )
+            )
+
+        async with async_transaction() as cursor:
+            await cursor.execute(
+                INSERT_ANSWERS_QUERY.format(
+                    values=", ".join([INSERT_ANSWER_VALUES] * len(records))
+                ),
+                tuple(answer_params),
+            )
+
+    async def drain(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        await self._close_spool_file(self._detach_spool_segment())
+        self._unlock_spool()
+
+
+answer_log = AnswerWriteBehind(
+    ANSWER_LOG_BATCH_SIZE,
+    ANSWER_LOG_FLUSH_INTERVAL_MS / 1000,
+    ANSWER_LOG_SPOOL_PATH,
+    ANSWER_LOG_SPOOL_FSYNC,
+    ANSWER_LOG_MAX_RETRIES,
+    ANSWER_LOG_MAX_PENDING,
+    ANSWER_LOG_DEAD_LETTER_PATH,
+)
@@ -0,0 +1,109 @@
+from sortedcontainers import SortedList
+
+
+class RankedLeaderboard:
+    """Order-statistic index over participant scores.
+
+    Entries are kept sorted by (score desc, participant_id), so a score
+    change and a rank lookup are both O(log n).
+    """
+
+    def __init__(self):
+        self._index = SortedList()
+        self._keys: dict[int, tuple[int, int]] = {}
+
+        # Rank window touched since the last changes() call, and what each
+        # participant looked like in the last emitted update
+        self._dirty_start: int | None = None
+        self._dirty_stop = 0
+        self._last_sent: dict[int, tuple[int, int]] = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, participant_id: int):
+        return participant_id in self._keys
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty_start is not None
+
+    def _mark_dirty(self, start: int, stop: int):
+        if self._dirty_start is None or start < self._dirty_start:
+            self._dirty_start = start
+        self._dirty_stop = max(self._dirty_stop, stop)
+
+    def add(self, participant_id: int, score: int):
+        if participant_id in self._keys:
+            self.update(participant_id, score)
+            return
+        key = (-score, participant_id)
+        self._keys[participant_id] = key
+        self._index.add(key)
+        self._mark_dirty(self._index.index(key), len(self._index))
+
+    def update(self, participant_id: int, score: int):
+        old_key = self._keys.get(participant_id)
+        if old_key is None:
+            self.add(participant_id, score)
+            return
+        if old_key[0] == -score:
+            return
+
+        old_position = self._index.index(old_key)
+        self._index.remove(old_key)
+        key = (-score, participant_id)
+        self._keys[participant_id] = key
+        self._index.add(key)
+        new_position = self._index.index(key)
+
+        # Only entries between the old and new position change rank
+        self._mark_dirty(
+            min(old_position, new_position), max(old_position, new_position) + 1
+        )
+
+    def remove(self, participant_id: int):
+        key = self._keys.pop(participant_id, None)
+        if key is not None:
+            self._mark_dirty(self._index.index(key), len(self._index))
+            self._index.remove(key)
+            self._last_sent.pop(participant_id, None)
+
+    def changes(self) -> list[tuple[int, int, int]]:
+        # (rank, participant_id, score) for entries whose rank or score differ
+        # from the last update handed out
+        if self._dirty_start is None:
+            return []
+
+        changed = []
+        for rank, participant_id, score in self.ranked(
+            self._dirty_start, self._dirty_stop
+        ):
+            if self._last_sent.get(participant_id) != (rank, score):
+                self._last_sent[participant_id] = (rank, score)
+                changed.append((rank, participant_id, score))
+
+        self._dirty_start = None
+        self._dirty_stop = 0
+        return changed
+
+    def mark_synced(self):
+        self._last_sent = {
+            participant_id: (rank, score)
+            for rank, participant_id, score in self.ranked()
+        }
+        self._dirty_start = None
+        self._dirty_stop = 0
+
+    def rank(self, participant_id: int) -> int | None:
+        key = self._keys.get(participant_id)
+        if key is None:
+            return None
+        return self._index.index(key) + 1
+
+    def ranked(self, start: int = 0, stop: int | None = None):
+        # Yields (rank, participant_id, score) in leaderboard order
+        for offset, (negative_score, participant_id) in enumerate(
+            self._index.islice(start, stop)
+        ):
+            yield start + offset + 1, participant_id, -negative_score
@@ -0,0 +1,48 @@
+import asyncio
+
+
+class LeaderboardFlusher:
+    """Coalesces leaderboard pushes per room.
+
+    The first score change in a room opens a window; every change that lands
+    inside it is folded into a single publish when the window ends.
+    """
+
+    def __init__(self, publish, interval: float):
+        self._publish = publish
+        self.interval = interval
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def schedule(self, room_state):
+        room_code = room_state.room_code
+        if room_code in self._pending:
+            return
+
+        task = asyncio.ensure_future(self._delayed_publish(room_state))
+        self._pending[room_code] = task
+
+    async def _delayed_publish(self, room_state):
+        try:
+            if self.interval > 0:
+                await asyncio.sleep(self.interval)
+        except asyncio.CancelledError:
+            return
+        self._pending.pop(room_state.room_code, None)
+
+        try:
+            await self._publish(room_state)
+        except Exception as e:
+            print("Leaderboard Flush Error:", e)
+
+    async def flush(self, room_state):
+        # Final flush, e.g. when a question closes: publish now instead of
+        # waiting for the window to end
+        task = self._pending.pop(room_state.room_code, None)
+        if task is not None:
+            task.cancel()
+        await self._publish(room_state)
+
+    def discard(self, room_code: str):
+        task = self._pending.pop(room_code, None)
+        if task is not None:
+            task.cancel()
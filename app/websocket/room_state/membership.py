@@ -0,0 +1,53 @@
+# Project Imports
+from database.async_db import fetch_one
+from services.lru_cache import LRUCache, MISSING
+from helper.config import MEMBERSHIP_CACHE_SIZE
+
+PARTICIPANT_LOOKUP_QUERY = (
+    "SELECT id FROM room_participants WHERE room_id = %s AND user_id = %s"
+)
+
+
+class RoomMembership:
+    """(room_id, user_id) -> participant_id for everyone who joined a room.
+
+    Filled in by the join endpoint, websocket connects and room loads.
+    Misses always go to the database and are not cached, so a user who
+    joins on another worker is found on the next lookup.
+    """
+
+    def __init__(self, max_size: int):
+        self.cache = LRUCache(max_size, name="room_membership")
+
+    def add(self, room_id: int, user_id: int, participant_id: int):
+        self.cache.set((room_id, int(user_id)), participant_id)
+
+    def get(self, room_id: int, user_id: int):
+        participant_id = self.cache.get((room_id, int(user_id)))
+        return None if participant_id is MISSING else participant_id
+
+    async def lookup(self, room_id: int, user_id: int):
+        participant_id = self.get(room_id, user_id)
+        if participant_id is not None:
+            return participant_id
+
+        row = await fetch_one(PARTICIPANT_LOOKUP_QUERY, (room_id, user_id))
+        if not row:
+            return None
+        self.add(room_id, user_id, row[0])
+        return row[0]
+
+    def lookup_sync(self, cursor, room_id: int, user_id: int):
+        participant_id = self.get(room_id, user_id)
+        if participant_id is not None:
+            return participant_id
+
+        cursor.execute(PARTICIPANT_LOOKUP_QUERY, (room_id, user_id))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        self.add(room_id, user_id, row[0])
+        return row[0]
+
+
+membership = RoomMembership(MEMBERSHIP_CACHE_SIZE)
@@ -0,0 +1,155 @@
+from datetime import datetime, timezone
+
+# Project Imports
+from app.websocket.room_state.timer_wheel import TimerWheel
+
+
+class RoomTimeline:
+    __slots__ = ("room_code", "question_indexes", "position", "handle", "open")
+
+    def __init__(self, room_code: str, question_indexes: list[int]):
+        self.room_code = room_code
+        self.question_indexes = question_indexes
+        self.position = -1
+        self.handle = None
+        self.open = False
+
+
+class QuestionScheduler:
+    """Drives a room through its questions on the server's clock.
+
+    Each question is shown, closed after its duration (plus the answer
+    grace period) and followed by the next one after an intermission.
+    All rooms share one timer wheel. ``on_question``, ``on_close`` and
+    ``on_finish`` are coroutine functions that do the broadcasting.
+    """
+
+    def __init__(
+        self,
+        engine,
+        wheel: TimerWheel,
+        intermission: float,
+        grace: float,
+        on_question,
+        on_close,
+        on_finish,
+    ):
+        self.engine = engine
+        self.wheel = wheel
+        self.intermission = intermission
+        self.grace = grace
+        self._on_question = on_question
+        self._on_close = on_close
+        self._on_finish = on_finish
+        self.timelines: dict[str, RoomTimeline] = {}
+
+    def is_running(self, room_code: str) -> bool:
+        return room_code in self.timelines
+
+    def start(self, room_state, delay: float | None = None) -> bool:
+        if room_state.room_code in self.timelines:
+            return False
+
+        timeline = RoomTimeline(
+            room_state.room_code, sorted(room_state.questions_by_index)
+        )
+        self.timelines[timeline.room_code] = timeline
+        timeline.handle = self.wheel.schedule(
+            self.intermission if delay is None else delay,
+            self._show_next,
+            timeline,
+        )
+        return True
+
+    def resume(self, room_state, now: datetime | None = None) -> bool:
+        # Picks a scheduled quiz back up on a worker that has just loaded
+        # the room, from the questions already shown and the server's clock
+        started_at = room_state.schedule_started_at
+        if started_at is None or room_state.room_code in self.timelines:
+            return False
+        now = now or datetime.now(timezone.utc)
+
+        timeline = RoomTimeline(
+            room_state.room_code, sorted(room_state.questions_by_index)
+        )
+        shown = [
+            position
+            for position, index in enumerate(timeline.question_indexes)
+            if room_state.questions_by_index[index].id in room_state.question_shown_at
+        ]
+        self.timelines[timeline.room_code] = timeline
+
+        if not shown:
+            elapsed = (now - started_at).total_seconds()
+            timeline.handle = self.wheel.schedule(
+                max(0.0, self.intermission - elapsed), self._show_next, timeline
+            )
+            return True
+
+        timeline.position = shown[-1]
+        question = room_state.questions_by_index[
+            timeline.question_indexes[timeline.position]
+        ]
+        elapsed = (now - room_state.question_shown_at[question.id]).total_seconds()
+        remaining = (question.duration or 0) + self.grace - elapsed
+        if remaining > 0:
+            timeline.open = True
+            room_state.current_question = question
+            timeline.handle = self.wheel.schedule(remaining, self._close, timeline)
+        else:
+            timeline.handle = self.wheel.schedule(
+                max(0.0, remaining + self.intermission), self._show_next, timeline
+            )
+        return True
+
+    def stop(self, room_code: str):
+        timeline = self.timelines.pop(room_code, None)
+        if timeline is not None and timeline.handle is not None:
+            timeline.handle.cancel()
+
+    async def close_now(self, room_code: str):
+        # Host ends the current question early
+        timeline = self.timelines.get(room_code)
+        if timeline is None or not timeline.open:
+            return
+        if timeline.handle is not None:
+            timeline.handle.cancel()
+        await self._close(timeline)
+
+    async def _show_next(self, timeline: RoomTimeline):
+        if self.timelines.get(timeline.room_code) is not timeline:
+            return
+
+        timeline.position += 1
+        if timeline.position >= len(timeline.question_indexes):
+            self.timelines.pop(timeline.room_code, None)
+            await self._on_finish(timeline.room_code)
+            return
+
+        question = await self.engine.show_question(
+            timeline.room_code, timeline.question_indexes[timeline.position]
+        )
+        if "error" in question:
+            self.timelines.pop(timeline.room_code, None)
+            return
+
+        timeline.open = True
+        timeline.handle = self.wheel.schedule(
+            (question["duration"] or 0) + self.grace, self._close, timeline
+        )
+        await self._on_question(timeline.room_code, question)
+
+    async def _close(self, timeline: RoomTimeline):
+        if self.timelines.get(timeline.room_code) is not timeline or not timeline.open:
+            return
+
+        timeline.open = False
+        question = await self.engine.close_question(
+            timeline.room_code,
+            question_index=timeline.question_indexes[timeline.position],
+        )
+        timeline.handle = self.wheel.schedule(
+            self.intermission, self._show_next, timeline
+        )
+        if question is not None:
+            await self._on_close(timeline.room_code, question)
@@ -0,0 +1,580 @@
+import asyncio
+from datetime import datetime, timezone
+
+# Project Imports
+from database.async_db import execute, fetch_all, fetch_one
+from app.websocket.room_state.answer_log import AnswerRecord, answer_log
+from app.websocket.room_state.answer_keys import answer_keys
+from app.websocket.room_state.room_resolver import room_resolver
+from app.websocket.room_state.membership import membership
+from app.websocket.room_state.scoring import (
+    answer_window_open,
+    as_utc,
+    score_answers,
+)
+from app.websocket.room_state.leaderboard import RankedLeaderboard
+from app.websocket.room_state.timer_wheel import TimerWheel
+from helper.config import (
+    LEADERBOARD_SNAPSHOT_INTERVAL,
+    SCHEDULER_TICK_MS,
+    ANSWER_GRACE_PERIOD_MS,
+)
+
+
+class RoomQuestion:
+    def __init__(self, question_id, question_index, correct_option, points, duration):
+        self.id = question_id
+        self.index = question_index
+        self.correct_option = correct_option
+        self.points = points
+        self.duration = duration
+
+
+class RoomParticipant:
+    def __init__(self, participant_id, user_id, name, photo, score=0):
+        self.participant_id = participant_id
+        self.user_id = user_id
+        self.name = name
+        self.photo = photo
+        self.score = score or 0
+
+
+class RoomState:
+    """Authoritative in-memory state of a live room.
+
+    Questions, answer keys and participants are loaded once. Accepted
+    answers go to the write-behind answer log straight away and are held
+    back per question; when the question closes they are scored together
+    against the room's own question clock and applied to the in-memory
+    totals.
+    """
+
+    def __init__(
+        self,
+        room_id,
+        room_code,
+        quiz_id,
+        host_id,
+        questions,
+        participants,
+        question_shown_at=None,
+        schedule_started_at=None,
+    ):
+        self.room_id = room_id
+        self.room_code = room_code
+        self.quiz_id = quiz_id
+        self.host_id = host_id
+
+        self.questions_by_id: dict[int, RoomQuestion] = {q.id: q for q in questions}
+        self.questions_by_index: dict[int, RoomQuestion] = {
+            q.index: q for q in questions
+        }
+        self.participants: dict[int, RoomParticipant] = {}
+        self.participants_by_id: dict[int, RoomParticipant] = {}
+        self.ranking = RankedLeaderboard()
+        self.answered: set[tuple[int, int]] = set()
+
+        # Server-side question clock: when each question was first shown,
+        # and which ones no longer accept answers
+        self.question_shown_at: dict[int, datetime] = dict(question_shown_at or {})
+        self.closed_questions: set[int] = set()
+        self.current_question: RoomQuestion | None = None
+        # Set while the quiz runs on the server's schedule
+        self.schedule_started_at: datetime | None = schedule_started_at
+
+        # question_id -> (participant, selected_option, received_at) held
+        # back until the question closes and is scored, and the timers that
+        # close it on this worker
+        self.pending_answers: dict[int, list[tuple]] = {}
+        self.close_timers: dict[int, object] = {}
+
+        self.leaderboard_seq = 0
+        self._updates_since_snapshot = 0
+        self._new_members: list[RoomParticipant] = []
+        # Delta clients may have connected before the room was loaded and
+        # know none of its members yet, so the first update is a snapshot
+        self._snapshot_due = True
+
+        for participant in participants:
+            self.add_participant(participant)
+        self._new_members.clear()
+        self.ranking.mark_synced()
+
+    def get_question(self, question_id=None, question_index=None):
+        try:
+            if question_id is not None:
+                return self.questions_by_id.get(int(question_id))
+            if question_index is not None:
+                return self.questions_by_index.get(int(question_index))
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    def show_question(self, question: RoomQuestion, shown_at: datetime) -> bool:
+        # The clock starts once; showing a question again keeps its time
+        self.current_question = question
+        if question.id in self.question_shown_at:
+            return False
+        self.question_shown_at[question.id] = shown_at
+        return True
+
+    def close_question(self, question: RoomQuestion):
+        self.closed_questions.add(question.id)
+        if self.current_question is question:
+            self.current_question = None
+
+    def add_participant(self, participant: RoomParticipant):
+        existing = self.participants.get(participant.user_id)
+        if existing is not None:
+            return existing
+
+        self.participants[participant.user_id] = participant
+        self.participants_by_id[participant.participant_id] = participant
+        self.ranking.add(participant.participant_id, participant.score)
+        self._new_members.append(participant)
+        return participant
+
+    def buffer_answer(
+        self,
+        participant: RoomParticipant,
+        question: RoomQuestion,
+        selected_option: int,
+        received_at: datetime,
+    ) -> bool:
+        key = (participant.participant_id, question.id)
+        if key in self.answered:
+            return False
+
+        self.answered.add(key)
+        self.pending_answers.setdefault(question.id, []).append(
+            (participant, selected_option, received_at)
+        )
+        return True
+
+    def restore_answers(self, rows):
+        # (participant_id, question_id, selected_option, answered_at,
+        # is_correct) rows already stored for the room. Every one counts as
+        # answered; those not yet scored are held back again
+        for row in rows:
+            participant_id, question_id, selected_option, answered_at, is_correct = row
+            self.answered.add((participant_id, question_id))
+            participant = self.participants_by_id.get(participant_id)
+            if is_correct is not None or participant is None:
+                continue
+            if question_id not in self.questions_by_id:
+                continue
+            self.pending_answers.setdefault(question_id, []).append(
+                (participant, selected_option, as_utc(answered_at))
+            )
+
+    def score_question(self, question: RoomQuestion) -> list[AnswerRecord]:
+        # Scores everything held back for the question in one pass, applies
+        # the points to the totals and the ranking, and returns the scored
+        # answers for the answer log
+        pending = self.pending_answers.pop(question.id, None)
+        if not pending:
+            return []
+
+        results = score_answers(
+            question,
+            self.question_shown_at[question.id],
+            [answer[1:] for answer in pending],
+        )
+
+        scored = []
+        for answer, (is_correct, awarded) in zip(pending, results):
+            participant, selected_option, received_at = answer
+            if awarded:
+                participant.score += awarded
+                self.ranking.update(participant.participant_id, participant.score)
+            scored.append(
+                AnswerRecord(
+                    self.room_id,
+                    participant.participant_id,
+                    question.id,
+                    selected_option,
+                    is_correct,
+                    awarded,
+                    received_at,
+                )
+            )
+        return scored
+
+    def leaderboard(self) -> list:
+        result = []
+        for rank, participant_id, score in self.ranking.ranked():
+            participant = self.participants_by_id[participant_id]
+            result.append(
+                {
+                    "id": participant.user_id,
+                    "name": participant.name,
+                    "image": participant.photo,
+                    "rank": rank,
+                    "totalPoints": score,
+                }
+            )
+        return result
+
+    def leaderboard_snapshot(self) -> dict:
+        return {"seq": self.leaderboard_seq, "entries": self.leaderboard()}
+
+    def resync_snapshot(self) -> dict:
+        # A snapshot pushed to every delta subscriber at once. It takes the
+        # place of the next delta, so pending changes are folded into it
+        self.leaderboard_seq += 1
+        self._updates_since_snapshot = 0
+        self._snapshot_due = False
+        self._new_members.clear()
+        self.ranking.mark_synced()
+        return self.leaderboard_snapshot()
+
+    def next_leaderboard_update(self):
+        # Returns the (message_type, data) to push to delta subscribers, or
+        # None when nothing changed since the previous update
+        if not self.ranking.dirty and not self._new_members:
+            return None
+
+        if (
+            self._snapshot_due
+            or self._updates_since_snapshot + 1 >= LEADERBOARD_SNAPSHOT_INTERVAL
+        ):
+            return "leaderboard_snapshot", self.resync_snapshot()
+
+        self.leaderboard_seq += 1
+        self._updates_since_snapshot += 1
+
+        members = [
+            {"id": p.user_id, "name": p.name, "image": p.photo}
+            for p in self._new_members
+        ]
+        self._new_members.clear()
+
+        changes = []
+        for rank, participant_id, score in self.ranking.changes():
+            changes.append(
+                {
+                    "id": self.participants_by_id[participant_id].user_id,
+                    "totalPoints": score,
+                    "rank": rank,
+                }
+            )
+
+        return "leaderboard_delta", {
+            "seq": self.leaderboard_seq,
+            "members": members,
+            "changes": changes,
+        }
+
+
+class RoomEngine:
+    def __init__(self, timer_wheel: TimerWheel):
+        self.rooms: dict[str, RoomState] = {}
+        self._loading: dict[str, asyncio.Task] = {}
+        self.timer_wheel = timer_wheel
+        # Called with the room state after a question's answers are scored
+        self.on_scored = None
+        # Called with the room state once it has been loaded on this worker
+        self.on_loaded = None
+
+    async def _load_room(self, room_code: str):
+        room = await room_resolver.resolve(room_code)
+        if not room:
+            return None
+        room_id, quiz_id, host_id = room
+
+        question_rows = await answer_keys.get(quiz_id)
+        participant_rows = await fetch_all(
+            """
+            SELECT rp.id, u.id, u.full_name, u.photo, rp.score
+            FROM room_participants rp
+            JOIN users u ON rp.user_id = u.id
+            WHERE rp.room_id = %s
+            """,
+            (room_id,),
+        )
+
+        shown_rows = await fetch_all(
+            """
+            SELECT question_id, MIN(shown_at)
+            FROM room_questions
+            WHERE room_id = %s
+            GROUP BY question_id
+            """,
+            (room_id,),
+        )
+
+        # Answers taken by a worker that held the room before this one
+        answer_rows = await fetch_all(
+            """
+            SELECT participant_id, question_id, selected_option, answered_at,
+                   is_correct
+            FROM room_answers
+            WHERE room_id = %s
+            """,
+            (room_id,),
+        )
+        schedule_row = await fetch_one(
+            "SELECT schedule_started_at FROM rooms WHERE id = %s", (room_id,)
+        )
+
+        participants = [RoomParticipant(*row) for row in participant_rows]
+        for participant in participants:
+            membership.add(room_id, participant.user_id, participant.participant_id)
+
+        room_state = RoomState(
+            room_id,
+            room_code,
+            quiz_id,
+            host_id,
+            [RoomQuestion(*row) for row in question_rows],
+            participants,
+            {question_id: as_utc(shown_at) for question_id, shown_at in shown_rows},
+            as_utc(schedule_row[0]) if schedule_row else None,
+        )
+        room_state.restore_answers(answer_rows)
+
+        # A room that went live while this load was reading keeps its state;
+        # replacing it would lose pending answers and in-memory totals
+        loaded = self.rooms.setdefault(room_code, room_state)
+        if loaded is room_state:
+            for question_id in list(room_state.pending_answers):
+                question = room_state.questions_by_id[question_id]
+                shown_at = room_state.question_shown_at.get(question_id)
+                if shown_at is not None:
+                    self._schedule_close(room_state, question, shown_at)
+            if self.on_loaded is not None:
+                self.on_loaded(room_state)
+        return loaded
+
+    async def load(self, room_code: str):
+        task = self._loading.get(room_code)
+        if task is None:
+            task = asyncio.ensure_future(self._load_room(room_code))
+            self._loading[room_code] = task
+            task.add_done_callback(lambda _: self._loading.pop(room_code, None))
+        return await asyncio.shield(task)
+
+    async def get(self, room_code: str):
+        room_state = self.rooms.get(room_code)
+        if room_state is not None:
+            return room_state
+        return await self.load(room_code)
+
+    def drop(self, room_code: str):
+        room_state = self.rooms.pop(room_code, None)
+        if room_state is None:
+            return
+
+        for timer in room_state.close_timers.values():
+            timer.cancel()
+        room_state.close_timers.clear()
+        # Points still held back are applied rather than lost
+        for question_id in list(room_state.pending_answers):
+            self._score_question(room_state, room_state.questions_by_id[question_id])
+
+    async def mark_scheduled(self, room_state: RoomState, started_at: datetime):
+        # Stored so that a worker taking the room over can resume the schedule
+        room_state.schedule_started_at = started_at
+        await execute(
+            "UPDATE rooms SET schedule_started_at = %s WHERE id = %s",
+            (started_at, room_state.room_id),
+        )
+
+    async def mark_finished(self, room_code: str):
+        room_state = self.rooms.get(room_code)
+        if room_state is None:
+            return
+        room_state.schedule_started_at = None
+        await execute(
+            "UPDATE rooms SET schedule_started_at = NULL WHERE id = %s",
+            (room_state.room_id,),
+        )
+
+    def forget(self, room_code: str):
+        # Another worker owns the room now: its answers are already logged,
+        # so the local copy is dropped without applying anything
+        room_state = self.rooms.pop(room_code, None)
+        if room_state is None:
+            return
+
+        for timer in room_state.close_timers.values():
+            timer.cancel()
+        room_state.close_timers.clear()
+
+    async def get_participant(self, room_state: RoomState, user_id: int):
+        participant = room_state.participants.get(user_id)
+        if participant is not None:
+            return participant
+
+        row = await fetch_one(
+            """
+            SELECT rp.id, u.id, u.full_name, u.photo, rp.score
+            FROM room_participants rp
+            JOIN users u ON rp.user_id = u.id
+            WHERE rp.room_id = %s AND rp.user_id = %s
+            """,
+            (room_state.room_id, user_id),
+        )
+        if not row:
+            return None
+        participant = room_state.add_participant(RoomParticipant(*row))
+        membership.add(room_state.room_id, user_id, participant.participant_id)
+        return participant
+
+    async def show_question(self, room_code: str, question_index: int):
+        room_state = await self.get(room_code)
+        if room_state is None:
+            return {"error": "Invalid room code"}
+
+        question = room_state.get_question(question_index=question_index)
+        if question is None:
+            return {"error": "Question not found"}
+
+        previous = room_state.current_question
+        if previous is not None and previous is not question:
+            self._close_question(room_state, previous)
+
+        shown_at = datetime.now(timezone.utc)
+        if room_state.show_question(question, shown_at):
+            # One row per question; written straight away so that a worker
+            # taking the room over can find the clock
+            await execute(
+                "INSERT INTO room_questions (room_id, question_id, shown_at) VALUES (%s, %s, %s)",
+                (room_state.room_id, question.id, shown_at),
+            )
+
+        return {
+            "question_id": question.id,
+            "question_index": question.index,
+            "duration": question.duration,
+            "points": question.points,
+            "shown_at": room_state.question_shown_at[question.id].isoformat(),
+        }
+
+    async def close_question(self, room_code: str, question_id=None, question_index=None):
+        room_state = await self.get(room_code)
+        if room_state is None:
+            return None
+
+        question = room_state.get_question(question_id, question_index)
+        if question is None:
+            question = room_state.current_question
+        if question is not None:
+            self._close_question(room_state, question)
+        return question
+
+    def _close_question(self, room_state: RoomState, question: RoomQuestion):
+        room_state.close_question(question)
+        timer = room_state.close_timers.pop(question.id, None)
+        if timer is not None:
+            timer.cancel()
+        self._score_question(room_state, question)
+
+    def _score_question(self, room_state: RoomState, question: RoomQuestion):
+        scored = room_state.score_question(question)
+        if not scored:
+            return
+
+        for record in scored:
+            answer_log.submit(record)
+        if self.on_scored is not None:
+            self.on_scored(room_state)
+
+    def _schedule_close(self, room_state: RoomState, question: RoomQuestion, shown_at):
+        # The room's owner closes the question itself once the window has
+        # passed, even if the host never closes it (manual mode)
+        if question.id in room_state.close_timers:
+            return
+        deadline = (
+            (question.duration or 0)
+            + ANSWER_GRACE_PERIOD_MS / 1000
+            - (datetime.now(timezone.utc) - shown_at).total_seconds()
+        )
+        room_state.close_timers[question.id] = self.timer_wheel.schedule(
+            max(0.0, deadline), self._expire_question, room_state, question
+        )
+
+    async def _expire_question(self, room_state: RoomState, question: RoomQuestion):
+        room_state.close_timers.pop(question.id, None)
+        if self.rooms.get(room_state.room_code) is room_state:
+            self._close_question(room_state, question)
+
+    async def _question_shown_at(self, room_state: RoomState, question: RoomQuestion):
+        shown_at = room_state.question_shown_at.get(question.id)
+        if shown_at is not None:
+            return shown_at
+
+        # The room may have moved here from a worker that showed it
+        row = await fetch_one(
+            "SELECT MIN(shown_at) FROM room_questions WHERE room_id = %s AND question_id = %s",
+            (room_state.room_id, question.id),
+        )
+        if not row or row[0] is None:
+            return None
+        shown_at = as_utc(row[0])
+        room_state.question_shown_at[question.id] = shown_at
+        return shown_at
+
+    async def submit_answer(
+        self,
+        room_code: str,
+        user_id: int,
+        selected_option,
+        received_at: datetime,
+        question_id=None,
+        question_index=None,
+    ):
+        if isinstance(selected_option, bool) or not isinstance(selected_option, int):
+            # Scored and written to an integer column; callers coerce first
+            return {"error": "selected_option must be an integer"}
+
+        room_state = await self.get(room_code)
+        if room_state is None:
+            return {"error": "Invalid room code"}
+
+        participant = await self.get_participant(room_state, user_id)
+        if participant is None:
+            return {"error": "User not participant in room"}
+
+        question = room_state.get_question(question_id, question_index)
+        if question is None:
+            return {"error": "Question not found"}
+
+        shown_at = await self._question_shown_at(room_state, question)
+        if shown_at is None:
+            return {"error": "Question not open"}
+        if question.id in room_state.closed_questions or not answer_window_open(
+            question, shown_at, received_at
+        ):
+            return {"error": "Answer window closed"}
+
+        if not room_state.buffer_answer(
+            participant, question, selected_option, received_at
+        ):
+            return {"error": "Question already answered"}
+
+        # Logged unscored (and spooled) before the ack, so an accepted answer
+        # survives a crash; the scored record follows when the question closes
+        answer_log.submit(
+            AnswerRecord(
+                room_state.room_id,
+                participant.participant_id,
+                question.id,
+                selected_option,
+                None,
+                None,
+                received_at,
+            )
+        )
+        self._schedule_close(room_state, question, shown_at)
+
+        # Correctness and points are revealed when the question closes
+        return {"question_id": question.id, "accepted": True}
+
+    async def drain(self):
+        for room_code in list(self.rooms):
+            self.drop(room_code)
+        await answer_log.drain()
+
+
+room_engine = RoomEngine(TimerWheel(SCHEDULER_TICK_MS / 1000))
@@ -0,0 +1,55 @@
+from collections import namedtuple
+
+# Project Imports
+from database.async_db import fetch_one
+from services.lru_cache import LRUCache, MISSING
+from helper.config import (
+    ROOM_CACHE_SIZE,
+    ROOM_CACHE_TTL,
+    ROOM_CACHE_NEGATIVE_TTL,
+)
+
+RoomInfo = namedtuple("RoomInfo", ["room_id", "quiz_id", "created_by"])
+
+ROOM_LOOKUP_QUERY = "SELECT id, quiz_id, created_by FROM rooms WHERE room_code = %s"
+
+
+class RoomResolver:
+    """Maps room codes to their (room_id, quiz_id, created_by) row.
+
+    Room rows never change after creation, so hits are served from memory.
+    Unknown codes are cached as None for a much shorter TTL, because a code
+    that misses here may have just been created on another worker.
+    """
+
+    def __init__(self, max_size: int, ttl: float, negative_ttl: float):
+        self.cache = LRUCache(max_size, ttl, name="room_codes")
+        self.negative_ttl = negative_ttl
+
+    def _store(self, room_code: str, row):
+        if row:
+            room = RoomInfo(*row)
+            self.cache.set(room_code, room)
+            return room
+        self.cache.set(room_code, None, ttl=self.negative_ttl)
+        return None
+
+    async def resolve(self, room_code: str):
+        room = self.cache.get(room_code)
+        if room is not MISSING:
+            return room
+        return self._store(room_code, await fetch_one(ROOM_LOOKUP_QUERY, (room_code,)))
+
+    def resolve_sync(self, cursor, room_code: str):
+        # For sync handlers, reusing the cursor they already hold
+        room = self.cache.get(room_code)
+        if room is not MISSING:
+            return room
+        cursor.execute(ROOM_LOOKUP_QUERY, (room_code,))
+        return self._store(room_code, cursor.fetchone())
+
+    def prime(self, room_code: str, room_id: int, quiz_id: int, created_by: int):
+        self.cache.set(room_code, RoomInfo(room_id, quiz_id, created_by))
+
+
+room_resolver = RoomResolver(ROOM_CACHE_SIZE, ROOM_CACHE_TTL, ROOM_CACHE_NEGATIVE_TTL)
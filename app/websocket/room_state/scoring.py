@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+# Project Imports
+from helper.config import ANSWER_GRACE_PERIOD_MS
+
+
+def as_utc(value: datetime) -> datetime:
+    # Naive timestamps read back from the database are UTC; the clock
+    # compares them with timezone-aware receive times
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def answer_window_open(question, shown_at: datetime, received_at: datetime) -> bool:
+    elapsed = (received_at - shown_at).total_seconds()
+    return elapsed <= (question.duration or 0) + ANSWER_GRACE_PERIOD_MS / 1000
+
+
+def score_answers(question, shown_at: datetime, answers) -> list[tuple[bool, int]]:
+    """Scores a batch of (selected_option, received_at) answers to one question.
+
+    Correct answers earn the question's full points when given the instant
+    it was shown, falling linearly to half points at the end of its
+    duration; wrong answers earn nothing. Timing comes only from the
+    server's clock.
+    """
+    correct_option = str(question.correct_option)
+    points = int(question.points or 0)
+    duration = float(question.duration or 0)
+
+    results = []
+    for selected_option, received_at in answers:
+        if str(selected_option) != correct_option:
+            results.append((False, 0))
+            continue
+
+        if duration > 0:
+            elapsed = (received_at - shown_at).total_seconds()
+            fraction = min(max(elapsed / duration, 0.0), 1.0)
+            results.append((True, round(points * (1 - fraction / 2))))
+        else:
+            results.append((True, points))
+
+    return results
@@ -0,0 +1,89 @@
+import asyncio
+import math
+
+
+class TimerHandle:
+    __slots__ = ("callback", "args", "rounds", "cancelled", "wheel")
+
+    def __init__(self, wheel, callback, args, rounds):
+        self.wheel = wheel
+        self.callback = callback
+        self.args = args
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled = True
+            self.wheel._active -= 1
+
+
+class TimerWheel:
+    """Hashed timing wheel driven by a single asyncio task.
+
+    Every room's timers land in one of ``slots`` buckets, so thousands of
+    rooms cost one sleeping task instead of one per timer. Delays are
+    rounded up to whole ticks; timers further out than one revolution wait
+    out the extra rounds in their bucket. The task stops when no timers
+    are left and restarts on the next schedule.
+    """
+
+    def __init__(self, tick: float, slots: int = 512):
+        self.tick = tick
+        self.slots: list[list[TimerHandle]] = [[] for _ in range(slots)]
+        self._cursor = 0
+        self._active = 0
+        self._task = None
+
+    def __len__(self):
+        return self._active
+
+    def schedule(self, delay: float, callback, *args) -> TimerHandle:
+        # callback is a coroutine function, run in its own task when due
+        ticks = max(1, math.ceil(delay / self.tick))
+        handle = TimerHandle(self, callback, args, (ticks - 1) // len(self.slots))
+        self.slots[(self._cursor + ticks) % len(self.slots)].append(handle)
+        self._active += 1
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        return handle
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+
+        while self._active > 0:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+            # Catch up on every tick that elapsed, so a busy loop does not
+            # make timers drift
+            while next_tick <= loop.time():
+                next_tick += self.tick
+                self._advance()
+
+    def _advance(self):
+        self._cursor = (self._cursor + 1) % len(self.slots)
+        bucket = self.slots[self._cursor]
+        if not bucket:
+            return
+
+        waiting = []
+        for handle in bucket:
+            if handle.cancelled:
+                continue
+            if handle.rounds > 0:
+                handle.rounds -= 1
+                waiting.append(handle)
+                continue
+
+            self._active -= 1
+            handle.cancelled = True
+            asyncio.ensure_future(self._fire(handle))
+        self.slots[self._cursor] = waiting
+
+    async def _fire(self, handle: TimerHandle):
+        try:
+            await handle.callback(*handle.args)
+        except Exception as e:
+            print("Timer Wheel Error:", e)
@@ -1,13 +1,136 @@
 from fastapi import WebSocket
 from typing import Optional
+from uuid import uuid4
+import asyncio
+import json
+
+# Project Imports
+from services.json_encoder import dumps_text
+from app.websocket.pubsub.backends import room_channel, worker_channel
+from helper.config import (
+    WS_SEND_QUEUE_SIZE,
+    WS_SEND_TIMEOUT,
+    WS_SLOW_CONSUMER_POLICY,
+)
+
+
+class ConnectionSender:
+    """Bounded outbound queue drained by a dedicated writer task.
+
+    Broadcasting only enqueues, so a slow socket never holds up the rest of
+    the room; what happens when its queue is full depends on the policy.
+    """
+
+    def __init__(self, manager, websocket: WebSocket):
+        self.manager = manager
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WS_SEND_QUEUE_SIZE)
+        self.dropped = 0
+        self.task = asyncio.ensure_future(self._run())
+
+    def enqueue(self, frame: str) -> bool:
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        if WS_SLOW_CONSUMER_POLICY == "disconnect":
+            self.manager.drop_slow_consumer(self.websocket)
+            return False
+
+        # "drop_oldest": shed the stalest frame; delta clients see the
+        # sequence gap and resync with a snapshot
+        try:
+            self.queue.get_nowait()
+            self.dropped += 1
+        except asyncio.QueueEmpty:
+            pass
+        self.queue.put_nowait(frame)
+        return True
+
+    async def _run(self):
+        while True:
+            frame = await self.queue.get()
+            try:
+                await asyncio.wait_for(
+                    self.websocket.send_text(frame), timeout=WS_SEND_TIMEOUT
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.manager.drop_slow_consumer(self.websocket)
+                return
+
+    def close(self):
+        if not self.task.done() and self.task is not asyncio.current_task():
+            self.task.cancel()
 
 
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: dict[str, list[WebSocket]] = {}
+        self.active_connections: dict[str, set[WebSocket]] = {}
         self.room_users: dict[str, dict[int, dict]] = {}
         self.websocket_to_guest: dict[WebSocket, tuple[str, str, int]] = {}
         self.user_to_websocket: dict[int, WebSocket] = {}
+        # (room_code, user_id) -> that user's sockets in the room; the set's
+        # size is the refcount deciding when the user leaves room_users
+        self.user_connections: dict[tuple[str, int], set[WebSocket]] = {}
+        self.leaderboard_modes: dict[WebSocket, str] = {}
+        self.senders: dict[WebSocket, ConnectionSender] = {}
+
+        # Cross-worker fan-out; frames this worker publishes are delivered
+        # locally right away and skipped when they come back from the bus
+        self.worker_id = uuid4().hex
+        self.bus = None
+        self._bus_tasks: set[asyncio.Task] = set()
+        self._heartbeat = None
+        # Receives messages addressed to this worker alone (room owner calls)
+        self.on_direct_message = None
+
+    async def start_bus(self, backend):
+        self.bus = backend
+        await backend.start(self._on_bus_message, self.worker_id)
+        await backend.subscribe(worker_channel(self.worker_id))
+        for room_code in self.active_connections:
+            await backend.subscribe(room_channel(room_code))
+        self._heartbeat = asyncio.ensure_future(self._presence_heartbeat())
+
+    async def stop_bus(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        if self.bus is not None:
+            await self.bus.close()
+            self.bus = None
+
+    async def _presence_heartbeat(self):
+        # Keeps this worker's presence entries from expiring while it is up
+        while True:
+            await asyncio.sleep(self.bus.presence_ttl / 3)
+            try:
+                if self.room_users:
+                    await self.bus.refresh_presence(list(self.room_users))
+            except Exception as e:
+                print("PubSub Heartbeat Error:", e)
+
+    def _run_bus_task(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._bus_tasks.add(task)
+        task.add_done_callback(self._bus_tasks.discard)
+
+    async def _on_bus_message(self, channel: str, message: str):
+        if channel == worker_channel(self.worker_id):
+            if self.on_direct_message is not None:
+                await self.on_direct_message(json.loads(message))
+            return
+
+        envelope = json.loads(message)
+        if envelope.get("origin") == self.worker_id:
+            return
+        self._deliver_local(
+            envelope["room"], envelope.get("audience", "all"), envelope["frame"]
+        )
 
     async def connect(
         self,
@@ -16,10 +139,15 @@ class ConnectionManager:
         guest_name: str,
         user_id: int,
         user_photo: str,
+        leaderboard_mode: str = "full",
     ):
         await websocket.accept()
 
-        self.active_connections.setdefault(room_code, []).append(websocket)
+        if room_code not in self.active_connections and self.bus is not None:
+            await self.bus.subscribe(room_channel(room_code))
+
+        self.active_connections.setdefault(room_code, set()).add(websocket)
+        self.user_connections.setdefault((room_code, user_id), set()).add(websocket)
 
         if room_code not in self.room_users:
             self.room_users[room_code] = {}
@@ -32,62 +160,190 @@ class ConnectionManager:
 
         self.websocket_to_guest[websocket] = (guest_name, room_code, user_id)
         self.user_to_websocket[user_id] = websocket
+        self.leaderboard_modes[websocket] = leaderboard_mode
+        self.senders[websocket] = ConnectionSender(self, websocket)
+
+        if self.bus is not None:
+            await self.bus.add_presence(
+                room_code, user_id, self.room_users[room_code][user_id]
+            )
 
         await self.broadcast_user_list(room_code)
 
     def disconnect(self, websocket: WebSocket):
+        sender = self.senders.pop(websocket, None)
+        if sender is not None:
+            sender.close()
+
         guest_info = self.websocket_to_guest.pop(websocket, None)
+        self.leaderboard_modes.pop(websocket, None)
         if not guest_info:
             return
 
         guest_name, room_code, user_id = guest_info
 
-        if room_code in self.active_connections:
-            try:
-                self.active_connections[room_code].remove(websocket)
-            except ValueError:
-                pass
+        room_connections = self.active_connections.get(room_code)
+        if room_connections is not None:
+            room_connections.discard(websocket)
+            if not room_connections:
+                del self.active_connections[room_code]
+                if self.bus is not None:
+                    self._run_bus_task(self.bus.unsubscribe(room_channel(room_code)))
 
-        still_connected = any(
-            uid == user_id and room == room_code
-            for ws, (name, room, uid) in self.websocket_to_guest.items()
-        )
-        if not still_connected:
-            if room_code in self.room_users:
-                self.room_users[room_code].pop(user_id, None)
+        user_key = (room_code, user_id)
+        remaining = self.user_connections.get(user_key)
+        if remaining is not None:
+            remaining.discard(websocket)
+            if not remaining:
+                del self.user_connections[user_key]
+                remaining = None
+
+        if remaining is None:
+            # Presence is kept per worker; the user leaves this worker's
+            # entry with their last socket here
+            if self.bus is not None:
+                self._run_bus_task(self.bus.remove_presence(room_code, user_id))
+            room_users = self.room_users.get(room_code)
+            if room_users is not None:
+                room_users.pop(user_id, None)
+                if not room_users:
+                    del self.room_users[room_code]
 
-        to_remove = [
-            uid for uid, ws in self.user_to_websocket.items() if ws == websocket
-        ]
-        for uid in to_remove:
-            del self.user_to_websocket[uid]
+        if self.user_to_websocket.get(user_id) is websocket:
+            if remaining:
+                self.user_to_websocket[user_id] = next(iter(remaining))
+            else:
+                del self.user_to_websocket[user_id]
+
+    def drop_slow_consumer(self, websocket: WebSocket):
+        if websocket not in self.senders:
+            return
+        self.disconnect(websocket)
+        # Closing makes the endpoint's receive loop exit through its normal
+        # disconnect path, which refreshes the room's user list
+        asyncio.ensure_future(self._close_quietly(websocket))
+
+    async def _close_quietly(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=1013), timeout=WS_SEND_TIMEOUT)
+        except Exception:
+            pass
+
+    async def send_to_worker(self, worker_id: str, message: dict):
+        await self.bus.publish(worker_channel(worker_id), dumps_text(message))
+
+    async def room_is_empty(self, room_code: str) -> bool:
+        # No sockets for the room on any worker
+        if self.active_connections.get(room_code):
+            return False
+        if self.bus is None:
+            return True
+        if self._bus_tasks:
+            await asyncio.gather(*list(self._bus_tasks), return_exceptions=True)
+        return not await self.bus.get_presence(room_code)
 
     async def broadcast_user_list(self, room_code: str):
-        users_dict = self.room_users.get(room_code, {})
-        users = list(users_dict.values())
+        if self.bus is not None:
+            # Let pending presence removals land before reading the room
+            if self._bus_tasks:
+                await asyncio.gather(*list(self._bus_tasks), return_exceptions=True)
+            users = await self.bus.get_presence(room_code)
+        else:
+            users_dict = self.room_users.get(room_code, {})
+            users = list(users_dict.values())
         await self.broadcast("user_list", room_code, data=users)
 
     async def broadcast(
         self, message_type: str, room_code: str, data: Optional[dict] = None
     ):
-        payload = {"type": message_type, "data": data or {}}
-        connections = self.active_connections.get(room_code, [])
-        to_remove = []
-        for connection in connections:
+        await self._fan_out(room_code, message_type, data)
+
+    def _deliver_local(self, room_code: str, audience: str, frame: str):
+        for connection in list(self.active_connections.get(room_code, ())):
+            if (
+                audience != "all"
+                and self.leaderboard_modes.get(connection, "full") != audience
+            ):
+                continue
+            sender = self.senders.get(connection)
+            if sender is not None:
+                sender.enqueue(frame)
+
+    async def _fan_out(
+        self, room_code: str, message_type: str, data=None, audience: str = "all"
+    ):
+        frame = dumps_text({"type": message_type, "data": data or {}})
+        self._deliver_local(room_code, audience, frame)
+
+        if self.bus is not None:
+            envelope = dumps_text(
+                {
+                    "origin": self.worker_id,
+                    "room": room_code,
+                    "audience": audience,
+                    "frame": frame,
+                }
+            )
             try:
-                await connection.send_json(payload)
-            except Exception:
-                to_remove.append(connection)
-        for connection in to_remove:
-            self.disconnect(connection)
+                await self.bus.publish(room_channel(room_code), envelope)
+            except Exception as e:
+                print("PubSub Publish Error:", e)
+
+    async def _send_many(self, connections, message_type: str, data=None):
+        if not connections:
+            return
+
+        # Encoded once and the same frame handed to every socket
+        frame = dumps_text({"type": message_type, "data": data or {}})
+        for connection in list(connections):
+            sender = self.senders.get(connection)
+            if sender is not None:
+                sender.enqueue(frame)
+
+    async def send(self, websocket: WebSocket, message_type: str, data=None):
+        await self._send_many([websocket], message_type, data)
 
     async def send_personal_dashboard(self, user_id: int, dashboard_data: list):
         websocket = self.user_to_websocket.get(user_id)
         if websocket:
-            try:
-                await websocket.send_json({"type": "dashboard", "data": dashboard_data})
-            except Exception:
-                self.disconnect(websocket)
+            await self.send(websocket, "dashboard", dashboard_data)
+
+    def has_full_leaderboard_clients(self, room_code: str) -> bool:
+        if self.bus is not None and self.bus.distributed:
+            return True
+        return any(
+            self.leaderboard_modes.get(connection, "full") == "full"
+            for connection in self.active_connections.get(room_code, ())
+        )
+
+    async def send_leaderboard(
+        self,
+        room_code: str,
+        leaderboard_data: list,
+        leaderboard_update: tuple[str, dict] | None = None,
+    ):
+        if leaderboard_update is None:
+            await self.broadcast("leaderboard", room_code, data=leaderboard_data)
+            return
+
+        if self.has_full_leaderboard_clients(room_code):
+            await self._fan_out(
+                room_code, "leaderboard", leaderboard_data, audience="full"
+            )
+        message_type, data = leaderboard_update
+        await self._fan_out(room_code, message_type, data, audience="delta")
+
+    async def send_leaderboard_snapshot(self, websocket: WebSocket, snapshot: dict):
+        await self.send(websocket, "leaderboard_snapshot", snapshot)
+
+    async def broadcast_leaderboard_snapshot(self, room_code: str, snapshot: dict):
+        await self._fan_out(
+            room_code, "leaderboard_snapshot", snapshot, audience="delta"
+        )
+
+    def queue_depths(self) -> list[int]:
+        # Frames waiting per connection, across every room on this worker
+        return [sender.queue.qsize() for sender in list(self.senders.values())]
+
 
-    async def send_leaderboard(self, room_code: str, leaderboard_data: list):
-        await self.broadcast("leaderboard", room_code, data=leaderboard_data)
+manager = ConnectionManager()
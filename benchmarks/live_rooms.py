@@ -0,0 +1,505 @@
+"""Load test for live quiz rooms.
+
+    python -m benchmarks.live_rooms benchmarks/scenarios/smoke.json
+    python -m benchmarks.live_rooms benchmarks/scenarios/classroom.json --url http://127.0.0.1:8000
+
+Seeds benchmark users, a quiz and its rooms straight into the database
+configured in .env, starts uvicorn on api.index:app (unless --url points at
+a server that is already running against the same database), connects every
+simulated player over /room/{room_code} and lets the question scheduler run
+the quiz. Everything that was seeded is deleted afterwards unless --keep is
+given.
+
+Player think times and answers come from the scenario's seed, so two runs
+of a scenario send the same traffic.
+"""
+
+from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from uuid import uuid4
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+# Project Imports
+from database.connect_db import connect_database
+from services.jwt_handler import get_access_token
+from services.room_code import room_code_generator
+from helper.config import ACCESS_TOKEN_EXPIRY, DEFAULT_COVER_PHOTO_URL
+
+SCENARIO_DEFAULTS = {
+    "seed": 0,
+    "rooms": 1,
+    "players_per_room": 10,
+    "questions": 5,
+    "question_duration": 10,
+    "points": 10,
+    "answer_delay_ms": [500, 5000],
+    "correct_ratio": 0.5,
+    "leaderboard_mode": "delta",
+    "connect_batch": 100,
+    "server_env": {},
+}
+
+
+def load_scenario(path: str) -> dict:
+    with open(path) as scenario_file:
+        scenario = {**SCENARIO_DEFAULTS, **json.load(scenario_file)}
+    scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+    return scenario
+
+
+class SeededRun:
+    """Rows created for one benchmark run, tagged with a run id."""
+
+    def __init__(self, scenario: dict):
+        self.scenario = scenario
+        self.run_id = uuid4().hex[:8]
+        self.user_ids: list[int] = []
+        self.quiz_id = None
+        self.questions: list[tuple[int, int, int]] = []
+        self.rooms: list[dict] = []
+
+    def seed(self):
+        scenario = self.scenario
+        rng = random.Random(scenario["seed"])
+        room_count = scenario["rooms"]
+        per_room = scenario["players_per_room"]
+        now = datetime.now(timezone.utc)
+
+        connection = connect_database()
+        cursor = connection.cursor()
+        try:
+            # One host per room, then every player
+            total_users = room_count * (per_room + 1)
+            user_rows = execute_values(
+                cursor,
+                """
+                INSERT INTO users (full_name, username, email, hashed_password, is_verified, created_at)
+                VALUES %s RETURNING id
+                """,
+                [
+                    (
+                        f"Bench {n}",
+                        f"bench_{self.run_id}_{n}",
+                        f"bench-{self.run_id}-{n}@quizit.invalid",
+                        "!",
+                        True,
+                        now,
+                    )
+                    for n in range(total_users)
+                ],
+                page_size=1000,
+                fetch=True,
+            )
+            self.user_ids = [row[0] for row in user_rows]
+            host_ids = self.user_ids[:room_count]
+            player_ids = self.user_ids[room_count:]
+
+            cursor.execute(
+                """
+                INSERT INTO quizzes (cover_photo, title, description, is_published, created_at, creator_id)
+                VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
+                """,
+                (
+                    DEFAULT_COVER_PHOTO_URL,
+                    f"Benchmark {self.run_id}",
+                    scenario["name"],
+                    False,
+                    now,
+                    host_ids[0],
+                ),
+            )
+            self.quiz_id = cursor.fetchone()[0]
+
+            question_rows = []
+            for index in range(1, scenario["questions"] + 1):
+                correct_option = rng.randrange(4)
+                question_rows.append(
+                    (
+                        f"Question {index}",
+                        index,
+                        json.dumps(["A", "B", "C", "D"]),
+                        correct_option,
+                        scenario["points"],
+                        scenario["question_duration"],
+                        self.quiz_id,
+                    )
+                )
+            inserted = execute_values(
+                cursor,
+                """
+                INSERT INTO quiz_questions
+                (question, question_index, options, correct_option, points, duration, quiz_id)
+                VALUES %s RETURNING id, question_index, correct_option
+                """,
+                question_rows,
+                fetch=True,
+            )
+            self.questions = [tuple(row) for row in inserted]
+
+            for room_number, host_id in enumerate(host_ids):
+                room_code = room_code_generator()
+                cursor.execute(
+                    "INSERT INTO rooms (room_code, quiz_id, created_by) VALUES (%s, %s, %s) RETURNING id",
+                    (room_code, self.quiz_id, host_id),
+                )
+                room_id = cursor.fetchone()[0]
+                players = player_ids[room_number * per_room : (room_number + 1) * per_room]
+                execute_values(
+                    cursor,
+                    "INSERT INTO room_participants (room_id, user_id, joined_at) VALUES %s",
+                    [(room_id, player_id, now) for player_id in players],
+                    page_size=1000,
+                )
+                self.rooms.append(
+                    {
+                        "room_id": room_id,
+                        "room_code": room_code,
+                        "host_id": host_id,
+                        "players": players,
+                    }
+                )
+
+            connection.commit()
+
+        except Exception:
+            connection.rollback()
+            raise
+
+        finally:
+            cursor.close()
+            connection.close()
+
+    def cleanup(self):
+        room_ids = [room["room_id"] for room in self.rooms]
+        connection = connect_database()
+        cursor = connection.cursor()
+        try:
+            if room_ids:
+                for table in ("room_answers", "room_questions", "room_participants"):
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE room_id = ANY(%s)", (room_ids,)
+                    )
+                cursor.execute("DELETE FROM rooms WHERE id = ANY(%s)", (room_ids,))
+            if self.quiz_id is not None:
+                cursor.execute(
+                    "DELETE FROM quiz_questions WHERE quiz_id = %s", (self.quiz_id,)
+                )
+                cursor.execute("DELETE FROM quizzes WHERE id = %s", (self.quiz_id,))
+            if self.user_ids:
+                cursor.execute(
+                    "DELETE FROM users WHERE id = ANY(%s)", (self.user_ids,)
+                )
+            connection.commit()
+
+        except Exception as e:
+            connection.rollback()
+            print("Benchmark Cleanup Error:", e)
+
+        finally:
+            cursor.close()
+            connection.close()
+
+
+def database_statement_count() -> tuple[str, int]:
+    # pg_stat_statements counts statements; without it, fall back to
+    # transactions on this database, which is a coarser proxy
+    connection = connect_database()
+    cursor = connection.cursor()
+    try:
+        try:
+            cursor.execute(
+                """
+                SELECT COALESCE(SUM(calls), 0) FROM pg_stat_statements
+                WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+                """
+            )
+            return "statements", int(cursor.fetchone()[0])
+        except Exception:
+            connection.rollback()
+            cursor.execute(
+                """
+                SELECT xact_commit + xact_rollback FROM pg_stat_database
+                WHERE datname = current_database()
+                """
+            )
+            return "transactions", int(cursor.fetchone()[0])
+
+    finally:
+        cursor.close()
+        connection.close()
+
+
+class Stats:
+    def __init__(self):
+        self.ack_latencies: list[float] = []
+        self.fanout_latencies: list[float] = []
+        self.messages_received = 0
+        self.messages_sent = 0
+        self.answers_acked = 0
+        self.answer_errors = 0
+        self.connect_failures = 0
+        self.players_finished = 0
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[position]
+
+
+async def play(
+    ws_url: str,
+    room_code: str,
+    user_id: int,
+    scenario: dict,
+    answer_key: dict,
+    stats: Stats,
+    connected: asyncio.Event,
+    connected_count: list,
+):
+    token = get_access_token({"id": user_id}, ACCESS_TOKEN_EXPIRY)
+    rng = random.Random(f"{scenario['seed']}:{room_code}:{user_id}")
+    delay_min, delay_max = scenario["answer_delay_ms"]
+    sent_at = {}
+
+    async def answer(websocket, question_id: int):
+        await asyncio.sleep(rng.uniform(delay_min, delay_max) / 1000)
+        if rng.random() < scenario["correct_ratio"]:
+            selected_option = answer_key[question_id]
+        else:
+            selected_option = (answer_key[question_id] + rng.randrange(1, 4)) % 4
+
+        sent_at[question_id] = time.perf_counter()
+        await websocket.send(
+            json.dumps(
+                {
+                    "type": "answer",
+                    "data": {
+                        "question_id": question_id,
+                        "selected_option": selected_option,
+                    },
+                }
+            )
+        )
+        stats.messages_sent += 1
+
+    url = f"{ws_url}/room/{room_code}?token={token}&leaderboard={scenario['leaderboard_mode']}"
+    try:
+        websocket = await websockets.connect(url, max_queue=None)
+    except Exception:
+        stats.connect_failures += 1
+        connected_count[0] -= 1
+        if connected_count[0] == 0:
+            connected.set()
+        return
+
+    answer_tasks = []
+    try:
+        connected_count[0] -= 1
+        if connected_count[0] == 0:
+            connected.set()
+
+        async for frame in websocket:
+            stats.messages_received += 1
+            message = json.loads(frame)
+            message_type = message.get("type")
+            data = message.get("data") or {}
+
+            if message_type == "question":
+                shown_at = datetime.fromisoformat(data["shown_at"])
+                stats.fanout_latencies.append(
+                    (datetime.now(timezone.utc) - shown_at).total_seconds()
+                )
+                answer_tasks.append(
+                    asyncio.ensure_future(answer(websocket, data["question_id"]))
+                )
+
+            elif message_type == "answer_ack":
+                question_id = data.get("question_id")
+                if "error" in data or question_id not in sent_at:
+                    stats.answer_errors += 1
+                    continue
+                stats.ack_latencies.append(
+                    time.perf_counter() - sent_at.pop(question_id)
+                )
+                stats.answers_acked += 1
+
+            elif message_type == "quiz_finished":
+                stats.players_finished += 1
+                break
+
+    except websockets.ConnectionClosed:
+        pass
+
+    finally:
+        for task in answer_tasks:
+            task.cancel()
+        await websocket.close()
+
+
+async def run_rooms(base_url: str, run: SeededRun, stats: Stats) -> float:
+    scenario = run.scenario
+    ws_url = base_url.replace("http", "ws", 1)
+    answer_key = {question_id: correct for question_id, _, correct in run.questions}
+
+    players = [
+        (room["room_code"], player_id)
+        for room in run.rooms
+        for player_id in room["players"]
+    ]
+    connected = asyncio.Event()
+    connected_count = [len(players)]
+    tasks = []
+
+    batch = max(1, scenario["connect_batch"])
+    for start in range(0, len(players), batch):
+        for room_code, player_id in players[start : start + batch]:
+            tasks.append(
+                asyncio.ensure_future(
+                    play(
+                        ws_url,
+                        room_code,
+                        player_id,
+                        scenario,
+                        answer_key,
+                        stats,
+                        connected,
+                        connected_count,
+                    )
+                )
+            )
+        await asyncio.sleep(0.05)
+
+    await asyncio.wait_for(connected.wait(), timeout=120)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        for room in run.rooms:
+            token = get_access_token({"id": room["host_id"]}, ACCESS_TOKEN_EXPIRY)
+            response = await client.post(
+                f"/room/start-quiz/{room['room_code']}",
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            response.raise_for_status()
+
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+def start_server(port: int, scenario: dict):
+    env = {**os.environ, **scenario["server_env"]}
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "api.index:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("Benchmark server did not start")
+
+
+def build_report(scenario: dict, stats: Stats, elapsed: float, db_delta) -> dict:
+    counter_kind, counter_delta = db_delta
+    answers = stats.answers_acked or 1
+    return {
+        "scenario": scenario["name"],
+        "rooms": scenario["rooms"],
+        "players": scenario["rooms"] * scenario["players_per_room"],
+        "elapsed_s": round(elapsed, 2),
+        "answers_acked": stats.answers_acked,
+        "answer_errors": stats.answer_errors,
+        "connect_failures": stats.connect_failures,
+        "players_finished": stats.players_finished,
+        "answer_ack_ms": {
+            name: round(percentile(stats.ack_latencies, fraction) * 1000, 2)
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))
+        },
+        "fanout_ms": {
+            name: round(percentile(stats.fanout_latencies, fraction) * 1000, 2)
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))
+        },
+        "messages_per_s": {
+            "received": round(stats.messages_received / elapsed, 1) if elapsed else 0,
+            "sent": round(stats.messages_sent / elapsed, 1) if elapsed else 0,
+        },
+        f"db_{counter_kind}_per_answer": round(counter_delta / answers, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live quiz room load test")
+    parser.add_argument("scenario", help="Path to a scenario JSON file")
+    parser.add_argument("--url", help="Use an already running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--output", help="Also write the report as JSON to this path")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded rows")
+    args = parser.parse_args()
+
+    scenario = load_scenario(args.scenario)
+    run = SeededRun(scenario)
+    run.seed()
+
+    process = None
+    try:
+        if args.url:
+            base_url = args.url.rstrip("/")
+        else:
+            process, base_url = start_server(args.port, scenario)
+
+        stats = Stats()
+        counter_kind, counter_before = database_statement_count()
+        elapsed = asyncio.run(run_rooms(base_url, run, stats))
+        # Let the write-behind answer log reach the database before counting
+        time.sleep(2)
+        _, counter_after = database_statement_count()
+
+        report = build_report(
+            scenario, stats, elapsed, (counter_kind, counter_after - counter_before)
+        )
+        print(json.dumps(report, indent=2))
+        if args.output:
+            with open(args.output, "w") as output:
+                json.dump(report, output, indent=2)
+
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        if not args.keep:
+            run.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+from dotenv import load_dotenv
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import aiopg
+
+# Project Imports
+from database.query_stats import AsyncInstrumentedCursor
+from helper.config import (
+    ASYNC_DATABASE_POOL_MIN_SIZE,
+    ASYNC_DATABASE_POOL_MAX_SIZE,
+    DATABASE_POOL_MAX_IDLE,
+    DATABASE_POOL_TIMEOUT,
+)
+
+load_dotenv()
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+async def get_async_pool() -> aiopg.Pool:
+    global _pool
+
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await aiopg.create_pool(
+                    minsize=ASYNC_DATABASE_POOL_MIN_SIZE,
+                    maxsize=ASYNC_DATABASE_POOL_MAX_SIZE,
+                    timeout=DATABASE_POOL_TIMEOUT,
+                    pool_recycle=DATABASE_POOL_MAX_IDLE,
+                    database=os.getenv("DATABASE_NAME"),
+                    user=os.getenv("DATABASE_USER"),
+                    password=os.getenv("DATABASE_PASSWORD"),
+                    host=os.getenv("DATABASE_HOST"),
+                    port=os.getenv("DATABASE_PORT"),
+                )
+
+    return _pool
+
+
+@asynccontextmanager
+async def async_cursor():
+    # aiopg connections run in autocommit mode; use async_transaction for writes
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        async with connection.cursor() as cursor:
+            yield AsyncInstrumentedCursor(cursor)
+
+
+@asynccontextmanager
+async def async_transaction():
+    # Commits when the block exits cleanly, rolls back if it raises
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        async with connection.cursor() as cursor:
+            async with cursor.begin():
+                yield AsyncInstrumentedCursor(cursor)
+
+
+async def fetch_one(query: str, params: tuple | None = None):
+    async with async_cursor() as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchone()
+
+
+async def fetch_all(query: str, params: tuple | None = None):
+    async with async_cursor() as cursor:
+        await cursor.execute(query, params)
+        return await cursor.fetchall()
+
+
+async def execute(query: str, params: tuple | None = None) -> int:
+    async with async_transaction() as cursor:
+        await cursor.execute(query, params)
+        return cursor.rowcount
+
+
+def async_pool_stats() -> dict:
+    if _pool is None:
+        return {"initialized": False}
+    return {
+        "initialized": True,
+        "min_size": _pool.minsize,
+        "max_size": _pool.maxsize,
+        "size": _pool.size,
+        "idle": _pool.freesize,
+        "in_use": _pool.size - _pool.freesize,
+    }
+
+
+async def close_async_pool():
+    global _pool
+
+    async with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            await _pool.wait_closed()
+            _pool = None
@@ -1,17 +1,60 @@
 from dotenv import load_dotenv
 import os
-import psycopg2
+import threading
+
+# Project Imports
+from database.pool import ConnectionPool
+from helper.config import (
+    DATABASE_POOL_MIN_SIZE,
+    DATABASE_POOL_MAX_SIZE,
+    DATABASE_POOL_MAX_IDLE,
+    DATABASE_POOL_TIMEOUT,
+    DATABASE_POOL_HEALTH_CHECK_AFTER,
+)
 
 load_dotenv()
 
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    min_size=DATABASE_POOL_MIN_SIZE,
+                    max_size=DATABASE_POOL_MAX_SIZE,
+                    max_idle=DATABASE_POOL_MAX_IDLE,
+                    timeout=DATABASE_POOL_TIMEOUT,
+                    health_check_after=DATABASE_POOL_HEALTH_CHECK_AFTER,
+                    database=os.getenv("DATABASE_NAME"),
+                    user=os.getenv("DATABASE_USER"),
+                    password=os.getenv("DATABASE_PASSWORD"),
+                    host=os.getenv("DATABASE_HOST"),
+                    port=os.getenv("DATABASE_PORT"),
+                )
+
+    return _pool
+
 
 def connect_database():
-    connect = psycopg2.connect(
-        database=os.getenv("DATABASE_NAME"),
-        user=os.getenv("DATABASE_USER"),
-        password=os.getenv("DATABASE_PASSWORD"),
-        host=os.getenv("DATABASE_HOST"),
-        port=os.getenv("DATABASE_PORT"),
-    )
-
-    return connect
+    # Borrows a pooled connection; calling .close() on it returns it to the pool
+    return get_pool().getconn()
+
+
+def pool_stats() -> dict:
+    if _pool is None:
+        return {"initialized": False}
+    return {"initialized": True, **_pool.stats()}
+
+
+def close_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
@@ -0,0 +1,4 @@
+-- Lets the write-behind answer log skip answers that are already stored
+-- (spool replay after a crash) without scanning room_answers.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_room_answers_room_participant_question
+    ON room_answers (room_id, participant_id, question_id);
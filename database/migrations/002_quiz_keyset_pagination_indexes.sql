@@ -0,0 +1,17 @@
+-- Keyset pagination on (created_at, id): the catalogue, a creator's quizzes
+-- and the per-quiz counts are read in index order instead of sorting every
+-- matching row before LIMIT.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quizzes_created_at_id
+    ON quizzes (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quizzes_creator_created_at_id
+    ON quizzes (creator_id, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_favourites_user_quiz
+    ON user_favourites (user_id, quiz_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_quiz_questions_quiz_index
+    ON quiz_questions (quiz_id, question_index);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_rooms_quiz
+    ON rooms (quiz_id);
@@ -0,0 +1,7 @@
+-- GET /user/ pages through users newest first on (created_at, id) and checks
+-- each listed user against the viewer's follows in the same statement.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_created_at_id
+    ON users (created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_follows_follower_following
+    ON follows (follower_id, following_id);
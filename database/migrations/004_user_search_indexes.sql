@@ -0,0 +1,16 @@
+-- User search (GET /search-users). Trigram GIN indexes serve substring and
+-- fuzzy matches on three or more characters; the text_pattern_ops btrees
+-- serve the anchored prefix path used for shorter terms.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_full_name_trgm
+    ON users USING gin (LOWER(full_name) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_username_trgm
+    ON users USING gin (LOWER(username) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_full_name_prefix
+    ON users (LOWER(full_name) text_pattern_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_username_prefix
+    ON users (LOWER(username) text_pattern_ops);
@@ -0,0 +1,17 @@
+-- One stored answer per participant and question. The write-behind answer
+-- log inserts with ON CONFLICT DO NOTHING against this index, so a replayed
+-- spool or two workers flushing the same answer cannot both store it.
+-- Duplicates left by earlier concurrent flushes are removed first, keeping
+-- the first stored row.
+DELETE FROM room_answers AS later
+USING room_answers AS earlier
+WHERE later.room_id = earlier.room_id
+  AND later.participant_id = earlier.participant_id
+  AND later.question_id = earlier.question_id
+  AND later.ctid > earlier.ctid;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_room_answers_room_participant_question
+    ON room_answers (room_id, participant_id, question_id);
+
+-- Superseded by the unique index above (migration 001)
+DROP INDEX CONCURRENTLY IF EXISTS idx_room_answers_room_participant_question;
@@ -0,0 +1,3 @@
+-- Answers are stored when they are accepted and scored when their question
+-- closes; is_correct stays NULL in between.
+ALTER TABLE room_answers ALTER COLUMN is_correct DROP NOT NULL;
@@ -0,0 +1,4 @@
+-- When a room's quiz started running on the server's schedule; NULL when
+-- the host drives it by hand or it has finished. A worker that takes a
+-- room over resumes the schedule from this and room_questions.shown_at.
+ALTER TABLE rooms ADD COLUMN IF NOT EXISTS schedule_started_at TIMESTAMPTZ;
@@ -0,0 +1,282 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+# Project Imports
+from database.query_stats import InstrumentedCursor
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class PooledConnection:
+    """psycopg2 connection borrowed from a ConnectionPool.
+
+    Behaves like the raw connection, except that close() hands it back to the
+    pool instead of tearing down the socket. As a context manager it commits
+    on success and rolls back on an exception, like psycopg2's ``with conn``,
+    and then returns the connection to the pool.
+    """
+
+    def __init__(self, pool, raw_connection):
+        self._pool = pool
+        self._raw = raw_connection
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._raw.cursor(*args, **kwargs))
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        self._pool.putconn(self._raw)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if not self._raw.closed:
+                if exc_type is None:
+                    self._raw.commit()
+                else:
+                    self._raw.rollback()
+        finally:
+            self.close()
+
+
+class ConnectionPool:
+    def __init__(
+        self,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_idle: float = 300.0,
+        timeout: float = 30.0,
+        health_check_after: float = 30.0,
+        reap_interval: float = 60.0,
+        **connect_kwargs,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Invalid pool size configuration")
+
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.reap_interval = reap_interval
+        self.connect_kwargs = connect_kwargs
+
+        self._lock = threading.Condition()
+        self._idle: deque[tuple[extensions.connection, float]] = deque()
+        self._size = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+        self._prefilled = False
+        self._reaper = None
+
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def _open(self):
+        return psycopg2.connect(**self.connect_kwargs)
+
+    def _discard(self, raw_connection):
+        self._discarded += 1
+        try:
+            raw_connection.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, raw_connection, idle_since: float) -> bool:
+        if raw_connection.closed:
+            return False
+        if time.monotonic() - idle_since < self.health_check_after:
+            return True
+        try:
+            cursor = raw_connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            raw_connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _prefill(self):
+        self._prefilled = True
+        while self._size < self.min_size:
+            self._size += 1
+            try:
+                raw_connection = self._open()
+            except Exception:
+                self._size -= 1
+                raise
+            self._idle.append((raw_connection, time.monotonic()))
+
+        if self._reaper is None and self.reap_interval > 0:
+            self._reaper = threading.Thread(
+                target=self._reap_loop, name="db-pool-reaper", daemon=True
+            )
+            self._reaper.start()
+
+    def getconn(self, timeout: float | None = None) -> PooledConnection:
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            raw_connection = None
+            idle_since = 0.0
+            should_open = False
+
+            with self._lock:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if not self._prefilled:
+                    self._prefill()
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {timeout}s waiting for a database connection"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._lock.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+                if self._idle:
+                    raw_connection, idle_since = self._idle.pop()
+                else:
+                    self._size += 1
+                    should_open = True
+                self._in_use += 1
+
+            if should_open:
+                try:
+                    raw_connection = self._open()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._lock.notify()
+                    raise
+            elif not self._is_healthy(raw_connection, idle_since):
+                self._discard(raw_connection)
+                with self._lock:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._lock.notify()
+                continue
+
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._checkouts += 1
+                self._checkout_time_total += elapsed
+                self._checkout_time_max = max(self._checkout_time_max, elapsed)
+
+            return PooledConnection(self, raw_connection)
+
+    def putconn(self, raw_connection):
+        keep = not raw_connection.closed and not self._closed
+
+        if keep:
+            try:
+                if raw_connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    raw_connection.rollback()
+            except Exception:
+                keep = False
+
+        with self._lock:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((raw_connection, time.monotonic()))
+            else:
+                self._size -= 1
+            self._lock.notify()
+
+        if not keep:
+            self._discard(raw_connection)
+
+    @contextmanager
+    def connection(self, timeout: float | None = None):
+        connection = self.getconn(timeout)
+        with connection:
+            yield connection
+
+    def reap_idle(self):
+        now = time.monotonic()
+        expired = []
+
+        with self._lock:
+            kept = deque()
+            while self._idle:
+                raw_connection, idle_since = self._idle.popleft()
+                if (
+                    self._size - len(expired) > self.min_size
+                    and now - idle_since > self.max_idle
+                ):
+                    expired.append(raw_connection)
+                else:
+                    kept.append((raw_connection, idle_since))
+            self._idle = kept
+            self._size -= len(expired)
+
+        for raw_connection in expired:
+            self._discard(raw_connection)
+
+        return len(expired)
+
+    def _reap_loop(self):
+        while not self._closed:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap_idle()
+            except Exception:
+                pass
+
+    def closeall(self):
+        with self._lock:
+            self._closed = True
+            idle = [raw_connection for raw_connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._lock.notify_all()
+
+        for raw_connection in idle:
+            self._discard(raw_connection)
+
+    def stats(self) -> dict:
+        with self._lock:
+            average = (
+                self._checkout_time_total / self._checkouts if self._checkouts else 0.0
+            )
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "checkout_timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "checkout_latency_avg_ms": round(average * 1000, 3),
+                "checkout_latency_max_ms": round(self._checkout_time_max * 1000, 3),
+            }
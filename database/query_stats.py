@@ -0,0 +1,217 @@
+from contextvars import ContextVar
+import time
+
+_current_stats: ContextVar = ContextVar("request_query_stats", default=None)
+
+
+class RequestQueryStats:
+    """Database work done while serving one request."""
+
+    __slots__ = ("count", "total_time", "rows", "slowest_query", "slowest_time")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.rows = 0
+        self.slowest_query = None
+        self.slowest_time = 0.0
+
+    def record(self, query, duration: float):
+        self.count += 1
+        self.total_time += duration
+        if duration >= self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_query = query
+
+    def add_rows(self, rows: int):
+        self.rows += rows
+
+
+def begin_request_stats() -> tuple[RequestQueryStats, object]:
+    stats = RequestQueryStats()
+    return stats, _current_stats.set(stats)
+
+
+def end_request_stats(token):
+    _current_stats.reset(token)
+
+
+def current_request_stats():
+    return _current_stats.get()
+
+
+def normalize_query(query) -> str:
+    if isinstance(query, bytes):
+        query = query.decode(errors="replace")
+    return " ".join(str(query).split())
+
+
+def _count_rows(result) -> int:
+    if result is None:
+        return 0
+    if isinstance(result, tuple):
+        return 1
+    return len(result)
+
+
+class InstrumentedCursor:
+    """psycopg2 cursor that reports its statements to the current request.
+
+    Outside a request (startup, background tasks) it only adds an attribute
+    lookup to each call.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def execute(self, query, params=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return self._cursor.execute(query, params)
+
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, params)
+        finally:
+            stats.record(query, time.perf_counter() - started)
+
+    def executemany(self, query, params_seq):
+        stats = _current_stats.get()
+        if stats is None:
+            return self._cursor.executemany(query, params_seq)
+
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, params_seq)
+        finally:
+            stats.record(query, time.perf_counter() - started)
+
+    def _fetch(self, method, *args):
+        result = getattr(self._cursor, method)(*args)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add_rows(_count_rows(result))
+        return result
+
+    def fetchone(self):
+        return self._fetch("fetchone")
+
+    def fetchmany(self, size=None):
+        if size is None:
+            return self._fetch("fetchmany")
+        return self._fetch("fetchmany", size)
+
+    def fetchall(self):
+        return self._fetch("fetchall")
+
+
+class AsyncInstrumentedCursor:
+    """aiopg counterpart of InstrumentedCursor."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    async def execute(self, query, params=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return await self._cursor.execute(query, params)
+
+        started = time.perf_counter()
+        try:
+            return await self._cursor.execute(query, params)
+        finally:
+            stats.record(query, time.perf_counter() - started)
+
+    async def _fetch(self, method, *args):
+        result = await getattr(self._cursor, method)(*args)
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add_rows(_count_rows(result))
+        return result
+
+    async def fetchone(self):
+        return await self._fetch("fetchone")
+
+    async def fetchmany(self, size=None):
+        if size is None:
+            return await self._fetch("fetchmany")
+        return await self._fetch("fetchmany", size)
+
+    async def fetchall(self):
+        return await self._fetch("fetchall")
+
+
+class RouteQueryStats:
+    __slots__ = (
+        "requests",
+        "queries",
+        "max_queries",
+        "db_time",
+        "rows",
+        "slowest_query",
+        "slowest_time",
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.slowest_query = None
+        self.slowest_time = 0.0
+
+    def add(self, stats: RequestQueryStats):
+        self.requests += 1
+        self.queries += stats.count
+        self.max_queries = max(self.max_queries, stats.count)
+        self.db_time += stats.total_time
+        self.rows += stats.rows
+        if stats.slowest_query is not None and stats.slowest_time >= self.slowest_time:
+            self.slowest_time = stats.slowest_time
+            self.slowest_query = stats.slowest_query
+
+    def as_dict(self) -> dict:
+        requests = self.requests or 1
+        return {
+            "requests": self.requests,
+            "queries_per_request": round(self.queries / requests, 2),
+            "max_queries": self.max_queries,
+            "db_time_ms_per_request": round(self.db_time * 1000 / requests, 2),
+            "rows_per_request": round(self.rows / requests, 2),
+            "slowest_query_ms": round(self.slowest_time * 1000, 2),
+            "slowest_query": (
+                normalize_query(self.slowest_query) if self.slowest_query else None
+            ),
+        }
+
+
+route_query_stats: dict[str, RouteQueryStats] = {}
+
+
+def record_route_stats(route: str, stats: RequestQueryStats):
+    route_stats = route_query_stats.get(route)
+    if route_stats is None:
+        route_stats = route_query_stats[route] = RouteQueryStats()
+    route_stats.add(stats)
+
+
+def route_stats_summary() -> dict:
+    return {
+        route: stats.as_dict() for route, stats in sorted(route_query_stats.items())
+    }
@@ -33,6 +33,112 @@ FORGOT_PASSWORD_EXPIRY = 5
 # Default Quiz Cover Photo
 DEFAULT_COVER_PHOTO_URL = os.getenv("DEFAULT_COVER_PHOTO_URL")
 
+# Ops Endpoints (/metrics, /pool-stats, /query-stats)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")  # Bearer token; empty disables them
+
 # QuizIt URL
 QUIZIT_URL = os.getenv("QUIZIT_URL")
 ANOTHER_URL = os.getenv("ANOTHER_URL", "http://localhost:8081")
+
+# Database Connection Pool
+DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "1"))
+DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", "10"))
+DATABASE_POOL_MAX_IDLE = float(os.getenv("DATABASE_POOL_MAX_IDLE", "300"))  # Seconds
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))  # Seconds
+DATABASE_POOL_HEALTH_CHECK_AFTER = float(
+    os.getenv("DATABASE_POOL_HEALTH_CHECK_AFTER", "30")
+)  # Seconds idle before a connection is pinged on checkout
+ASYNC_DATABASE_POOL_MIN_SIZE = int(os.getenv("ASYNC_DATABASE_POOL_MIN_SIZE", "1"))
+ASYNC_DATABASE_POOL_MAX_SIZE = int(os.getenv("ASYNC_DATABASE_POOL_MAX_SIZE", "10"))
+
+# Live Quiz Leaderboard
+LEADERBOARD_SNAPSHOT_INTERVAL = int(
+    os.getenv("LEADERBOARD_SNAPSHOT_INTERVAL", "20")
+)  # Delta updates between full snapshots
+LEADERBOARD_FLUSH_INTERVAL_MS = int(
+    os.getenv("LEADERBOARD_FLUSH_INTERVAL_MS", "150")
+)  # Window over which leaderboard pushes are coalesced per room
+
+# WebSocket Fan-out
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))  # Frames per socket
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))  # Seconds
+WS_SLOW_CONSUMER_POLICY = os.getenv(
+    "WS_SLOW_CONSUMER_POLICY", "drop_oldest"
+)  # "drop_oldest" or "disconnect"
+
+# WebSocket Pub/Sub ("memory", "redis" or "fakeredis")
+PUBSUB_BACKEND = os.getenv("PUBSUB_BACKEND", "memory")
+PUBSUB_URL = os.getenv("PUBSUB_URL", "redis://localhost:6379/0")
+PUBSUB_PRESENCE_TTL = float(
+    os.getenv("PUBSUB_PRESENCE_TTL", "30")
+)  # Seconds a worker's room presence outlives its last heartbeat
+ROOM_OWNER_TTL = float(
+    os.getenv("ROOM_OWNER_TTL", "15")
+)  # Seconds a worker's claim on a live room outlives its last heartbeat
+ROOM_OWNER_CALL_TIMEOUT = float(
+    os.getenv("ROOM_OWNER_CALL_TIMEOUT", "5")
+)  # Seconds to wait for the owning worker to answer a forwarded call
+
+# Answer Write-Behind Log
+ANSWER_LOG_BATCH_SIZE = int(os.getenv("ANSWER_LOG_BATCH_SIZE", "200"))
+ANSWER_LOG_FLUSH_INTERVAL_MS = int(os.getenv("ANSWER_LOG_FLUSH_INTERVAL_MS", "500"))
+ANSWER_LOG_SPOOL_PATH = os.getenv("ANSWER_LOG_SPOOL_PATH", "")  # Empty disables spooling
+ANSWER_LOG_SPOOL_FSYNC = os.getenv("ANSWER_LOG_SPOOL_FSYNC", "true").lower() == "true"
+ANSWER_LOG_MAX_RETRIES = int(
+    os.getenv("ANSWER_LOG_MAX_RETRIES", "10")
+)  # Failed writes before an answer is dead-lettered
+ANSWER_LOG_MAX_PENDING = int(
+    os.getenv("ANSWER_LOG_MAX_PENDING", "100000")
+)  # Buffered answers; the oldest beyond this are dead-lettered
+ANSWER_LOG_DEAD_LETTER_PATH = os.getenv(
+    "ANSWER_LOG_DEAD_LETTER_PATH", ""
+)  # Empty logs dead-lettered answers to stdout
+
+# Answer Key Cache
+ANSWER_KEY_CACHE_SIZE = int(os.getenv("ANSWER_KEY_CACHE_SIZE", "256"))  # Quizzes
+ANSWER_KEY_CACHE_TTL = float(
+    os.getenv("ANSWER_KEY_CACHE_TTL", "30")
+)  # Seconds another worker's quiz edit can go unseen
+
+# Room Code Resolver Cache
+ROOM_CACHE_SIZE = int(os.getenv("ROOM_CACHE_SIZE", "4096"))  # Room codes
+ROOM_CACHE_TTL = float(os.getenv("ROOM_CACHE_TTL", "3600"))  # Seconds
+ROOM_CACHE_NEGATIVE_TTL = float(
+    os.getenv("ROOM_CACHE_NEGATIVE_TTL", "5")
+)  # Seconds an unknown room code stays cached
+
+# Room Membership Index
+MEMBERSHIP_CACHE_SIZE = int(
+    os.getenv("MEMBERSHIP_CACHE_SIZE", "100000")
+)  # (room, user) pairs
+
+# Server-side Question Clock
+ANSWER_GRACE_PERIOD_MS = int(
+    os.getenv("ANSWER_GRACE_PERIOD_MS", "500")
+)  # Accepted past a question's duration to absorb network delay
+
+# Question Scheduler
+SCHEDULER_TICK_MS = int(os.getenv("SCHEDULER_TICK_MS", "100"))  # Timer wheel resolution
+QUESTION_INTERMISSION_MS = int(
+    os.getenv("QUESTION_INTERMISSION_MS", "5000")
+)  # Pause before the first question and between questions
+
+# Query Instrumentation
+DEBUG_QUERY_HEADERS = (
+    os.getenv("DEBUG_QUERY_HEADERS", "false").lower() == "true"
+)  # Adds X-DB-* headers with each response's query stats
+
+# Quiz Detail Cache
+QUIZ_DETAIL_CACHE_SIZE = int(os.getenv("QUIZ_DETAIL_CACHE_SIZE", "1024"))  # Quizzes
+QUIZ_DETAIL_CACHE_TTL = float(os.getenv("QUIZ_DETAIL_CACHE_TTL", "30"))  # Seconds
+
+# Pagination
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))  # Rows per page
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))  # Largest page a client can ask for
+
+# User Search
+USER_SEARCH_CACHE_SIZE = int(os.getenv("USER_SEARCH_CACHE_SIZE", "2048"))  # Search terms
+USER_SEARCH_CACHE_TTL = float(os.getenv("USER_SEARCH_CACHE_TTL", "15"))  # Seconds
+USER_SEARCH_PREFIX_LENGTH = int(
+    os.getenv("USER_SEARCH_PREFIX_LENGTH", "2")
+)  # Terms up to this long use the prefix index instead of trigrams
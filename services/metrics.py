@@ -0,0 +1,92 @@
+from prometheus_client import Counter, Histogram
+import time
+
+# Project Imports
+from services.query_stats_middleware import route_path
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "quizit_http_request_duration_seconds",
+    "HTTP request latency",
+    ["router", "method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "quizit_http_requests_total",
+    "HTTP requests served",
+    ["router", "method", "route", "status"],
+)
+ANSWER_PROCESSING_DURATION = Histogram(
+    "quizit_answer_processing_seconds",
+    "Time to validate and buffer one submitted answer",
+    ["transport"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+ANSWERS = Counter(
+    "quizit_answers_total",
+    "Submitted answers by outcome",
+    ["transport", "outcome"],
+)
+
+ROUTER_PREFIXES = (
+    ("/auth", "auth"),
+    ("/quiz", "quiz"),
+    ("/user", "user"),
+    ("/room", "room"),
+)
+
+
+def router_name(path: str) -> str:
+    for prefix, name in ROUTER_PREFIXES:
+        if path == prefix or path.startswith(prefix + "/"):
+            return name
+    return "features"
+
+
+def observe_answer(transport: str, started: float, result: dict):
+    ANSWER_PROCESSING_DURATION.labels(transport).observe(time.perf_counter() - started)
+    ANSWERS.labels(transport, "rejected" if "error" in result else "accepted").inc()
+
+
+class MetricsMiddleware:
+    """Records latency and status of every HTTP request per route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            router = router_name(scope["path"])
+            route = route_path(scope)
+            HTTP_REQUEST_DURATION.labels(router, scope["method"], route).observe(
+                time.perf_counter() - started
+            )
+            HTTP_REQUESTS.labels(router, scope["method"], route, str(status)).inc()
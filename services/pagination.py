@@ -0,0 +1,46 @@
+from fastapi import HTTPException
+from datetime import datetime
+import base64
+import json
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    # Call before opening a connection: handlers turn anything raised
+    # inside their try block into a 500
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset(order: str, after, created_column="q.created_at", id_column="q.id"):
+    """Filter and ORDER BY for one page of a (created_at, id) keyset.
+
+    Returns (condition, params, order_by); id breaks ties between rows
+    created in the same instant so no row is skipped or repeated.
+    """
+    direction = "DESC" if order.lower() == "desc" else "ASC"
+    order_by = f"{created_column} {direction}, {id_column} {direction}"
+    if after is None:
+        return "TRUE", (), order_by
+
+    comparison = "<" if direction == "DESC" else ">"
+    return f"({created_column}, {id_column}) {comparison} (%s, %s)", after, order_by
+
+
+def split_page(rows, limit: int, created_index: int, id_index: int = 0):
+    # Queries fetch limit + 1 rows; the extra one only says another page exists
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[created_index], last[id_index])
@@ -0,0 +1,77 @@
+# Project Imports
+from database.query_stats import (
+    begin_request_stats,
+    end_request_stats,
+    normalize_query,
+    record_route_stats,
+)
+from helper.config import DEBUG_QUERY_HEADERS
+
+
+def route_path(scope) -> str:
+    # Route template rather than the raw path, so /quiz/1 and /quiz/2 are
+    # aggregated together
+    endpoint = scope.get("endpoint")
+    app = scope.get("app")
+    if endpoint is None or app is None:
+        return "unmatched"
+
+    paths = getattr(app.state, "endpoint_paths", None)
+    if paths is None:
+        paths = {}
+        for route in app.routes:
+            if getattr(route, "endpoint", None) is not None:
+                paths.setdefault(route.endpoint, route.path)
+        app.state.endpoint_paths = paths
+    return paths.get(endpoint, endpoint.__name__)
+
+
+def route_name(scope) -> str:
+    return f"{scope['method']} {route_path(scope)}"
+
+
+class QueryStatsMiddleware:
+    """Counts the database work done by every HTTP request.
+
+    Totals are aggregated per route; with DEBUG_QUERY_HEADERS on, each
+    response also carries its own numbers in X-DB-* headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = begin_request_stats()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start" and DEBUG_QUERY_HEADERS:
+                headers = list(message.get("headers", []))
+                headers.extend(
+                    [
+                        (b"x-db-query-count", str(stats.count).encode()),
+                        (b"x-db-time-ms", f"{stats.total_time * 1000:.2f}".encode()),
+                        (b"x-db-rows", str(stats.rows).encode()),
+                        (b"x-db-slowest-ms", f"{stats.slowest_time * 1000:.2f}".encode()),
+                    ]
+                )
+                if stats.slowest_query is not None:
+                    headers.append(
+                        (
+                            b"x-db-slowest-query",
+                            normalize_query(stats.slowest_query)[:200].encode(
+                                "latin-1", "replace"
+                            ),
+                        )
+                    )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            end_request_stats(token)
+            record_route_stats(route_name(scope), stats)
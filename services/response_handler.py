@@ -1,10 +1,11 @@
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import Depends, status, HTTPException
+import hmac
 
 # Project Imports
 from .jwt_handler import verify_token
 from jose import jwt
-from helper.config import JWT_SECRET_KEY, JWT_ALGORITHM
+from helper.config import JWT_SECRET_KEY, JWT_ALGORITHM, METRICS_TOKEN
 
 
 security = HTTPBearer()
@@ -25,6 +26,20 @@ def verify_bearer_token(
     return payload
 
 
+def verify_metrics_token(
+    token: HTTPAuthorizationCredentials = Depends(security),
+):
+    # Ops endpoints are for the scraper, not for users: they take a static
+    # token of their own and stay hidden until one is configured
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    if not hmac.compare_digest(token.credentials, METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Invalid token"
+        )
+
+
 def verify_bearer_token_manual(token: str) -> dict:
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, JWT_ALGORITHM)
@@ -0,0 +1,43 @@
+import asyncio
+
+from app.websocket.room_state import answer_keys as answer_keys_module
+from app.websocket.room_state.answer_keys import AnswerKeyCache
+
+
+def test_load_racing_an_edit_is_not_cached(monkeypatch):
+    release = None
+    loads = []
+
+    async def fetch_all(query, params):
+        loads.append(params)
+        await release.wait()
+        return [(1, 0, len(loads), 100, 20)]
+
+    monkeypatch.setattr(answer_keys_module, "fetch_all", fetch_all)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        cache = AnswerKeyCache(8, ttl=60)
+
+        loading = asyncio.ensure_future(cache.get(5))
+        await asyncio.sleep(0)
+        cache.invalidate(5)  # edited while the load was reading
+        release.set()
+        assert await loading == ((1, 0, 1, 100, 20),)
+
+        assert await cache.get(5) == ((1, 0, 2, 100, 20),)
+        assert await cache.get(5) == ((1, 0, 2, 100, 20),)
+        assert len(loads) == 2
+        assert not cache._stale
+
+        cache.invalidate(5)  # nothing in flight: nothing to remember
+        assert not cache._stale
+
+    asyncio.run(scenario())
+
+
+def test_entries_expire_after_the_ttl():
+    cache = AnswerKeyCache(8, ttl=0)
+    cache.cache.set(5, ((1, 0, 1, 100, 20),))
+    assert cache.cache.get(5, None) is None
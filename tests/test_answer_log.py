@@ -0,0 +1,224 @@
+import asyncio
+import fcntl
+import glob
+import json
+import os
+from datetime import datetime, timezone
+
+import psycopg2
+import pytest
+
+from app.websocket.room_state.answer_log import AnswerRecord, AnswerWriteBehind
+
+
+def answer(participant_id: int, question_id: int = 1) -> AnswerRecord:
+    return AnswerRecord(
+        1, participant_id, question_id, 0, True, 10, datetime.now(timezone.utc)
+    )
+
+
+def make_log(spool_path, **options) -> AnswerWriteBehind:
+    log = AnswerWriteBehind(10, 60, str(spool_path), **options)
+    log.written = []
+
+    async def write_batch(records):
+        log.written.extend(records)
+
+    log._write_batch = write_batch
+    return log
+
+
+def spool_segments(spool_path) -> list:
+    return sorted(
+        path for path in glob.glob(f"{spool_path}.*") if not path.endswith(".lock")
+    )
+
+
+def spooled_participants(spool_path) -> list:
+    participants = []
+    for segment in spool_segments(spool_path):
+        with open(segment) as spool:
+            participants.extend(
+                AnswerRecord.from_json(line).participant_id
+                for line in spool
+                if line.strip()
+            )
+    return sorted(participants)
+
+
+@pytest.fixture
+def spool_path(tmp_path):
+    return tmp_path / "answers.spool"
+
+
+def test_answer_submitted_mid_flush_stays_spooled(spool_path):
+    async def scenario():
+        log = make_log(spool_path)
+        log.submit(answer(1))
+
+        flushing = asyncio.ensure_future(log.flush())
+        await asyncio.sleep(0)  # flush is parked on the spool fsync
+        log.submit(answer(2))
+        await flushing
+
+        assert [record.participant_id for record in log.written] == [1]
+        assert [record.participant_id for record in log._buffer] == [2]
+        assert spooled_participants(spool_path) == [2]
+        await log.drain()
+
+    asyncio.run(scenario())
+
+
+def write_segment(path, *participants):
+    with open(path, "w") as segment:
+        for participant_id in participants:
+            segment.write(answer(participant_id).to_json() + "\n")
+
+
+def test_replay_adopts_dead_workers_and_leaves_live_ones(spool_path):
+    write_segment(f"{spool_path}.111.000000000000", 1)
+    open(f"{spool_path}.111.lock", "w").close()  # nobody holds it: dead
+    write_segment(f"{spool_path}.222.000000000000", 2)
+    live_lock = open(f"{spool_path}.222.lock", "w")
+    fcntl.flock(live_lock, fcntl.LOCK_EX)
+    write_segment(f"{spool_path}.000000000007", 3)  # unnamespaced, older format
+
+    async def scenario():
+        log = make_log(spool_path)
+        await log.start()
+        try:
+            assert sorted(record.participant_id for record in log._buffer) == [1, 3]
+            own = f"{spool_path}.{os.getpid()}."
+            assert all(segment.startswith(own) for segment in log._spool_segments)
+            assert spooled_participants(spool_path) == [1, 2, 3]
+
+            await log.flush()
+            assert spool_segments(spool_path) == [f"{spool_path}.222.000000000000"]
+        finally:
+            await log.drain()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        live_lock.close()
+
+    assert not os.path.exists(f"{spool_path}.111.lock")
+    assert os.path.exists(f"{spool_path}.222.lock")
+    assert not os.path.exists(f"{spool_path}.{os.getpid()}.lock")
+
+
+def test_restart_replays_own_leftover_segments(spool_path):
+    write_segment(f"{spool_path}.{os.getpid()}.000000000003", 1, 2)
+
+    async def scenario():
+        log = make_log(spool_path)
+        await log.start()
+        assert [record.participant_id for record in log._buffer] == [1, 2]
+
+        log.submit(answer(3))  # new segment numbered after the leftover
+        assert log._spool_segments[-1].endswith(".000000000004")
+
+        await log.flush()
+        assert [record.participant_id for record in log.written] == [1, 2, 3]
+        assert spool_segments(spool_path) == []
+        await log.drain()
+
+    asyncio.run(scenario())
+
+
+def test_transient_failure_keeps_the_batch_spooled_for_retry(spool_path):
+    outage = [psycopg2.OperationalError("connection refused")]
+
+    async def scenario():
+        log = make_log(spool_path)
+        written = log._write_batch
+
+        async def write_batch(records):
+            if outage:
+                raise outage.pop()
+            await written(records)
+
+        log._write_batch = write_batch
+        log.submit(answer(1))
+        log.submit(answer(2))
+
+        await log.flush()
+        assert log.written == []
+        assert [record.attempts for record in log._buffer] == [1, 1]
+        assert log.failed_flushes == 1
+        assert log._retry_delay() == 30.0  # backing off, capped
+        assert spooled_participants(spool_path) == [1, 2]
+
+        await log.flush()
+        assert [record.participant_id for record in log.written] == [1, 2]
+        assert log._consecutive_failures == 0
+        assert spool_segments(spool_path) == []
+        await log.drain()
+
+    asyncio.run(scenario())
+
+
+def test_rejected_batch_is_retried_per_record_and_the_bad_one_dead_lettered(
+    spool_path, tmp_path
+):
+    dead_letter_path = tmp_path / "dead.jsonl"
+
+    async def scenario():
+        log = make_log(spool_path, dead_letter_path=str(dead_letter_path))
+        written = log._write_batch
+
+        async def write_batch(records):
+            if any(record.participant_id == 2 for record in records):
+                raise ValueError("invalid input value")
+            await written(records)
+
+        log._write_batch = write_batch
+        for participant_id in (1, 2, 3):
+            log.submit(answer(participant_id))
+
+        await log.flush()
+        assert [record.participant_id for record in log.written] == [1, 3]
+        assert log.pending == 0
+        assert log.dead_lettered == 1
+        await log.drain()
+
+    asyncio.run(scenario())
+
+    with open(dead_letter_path) as dead_letter:
+        entries = [json.loads(line) for line in dead_letter]
+    assert [entry["record"]["participant_id"] for entry in entries] == [2]
+    assert entries[0]["error"] == "invalid input value"
+
+
+def test_records_are_dead_lettered_after_max_retries(spool_path):
+    async def scenario():
+        log = make_log(spool_path, max_retries=2)
+
+        async def write_batch(records):
+            raise psycopg2.OperationalError("connection refused")
+
+        log._write_batch = write_batch
+        log.submit(answer(1))
+
+        await log.flush()
+        assert log.pending == 1
+        await log.flush()
+        assert log.pending == 0
+        assert log.dead_lettered == 1
+        assert spooled_participants(spool_path) == []
+        await log.drain()
+
+    asyncio.run(scenario())
+
+
+def test_full_buffer_dead_letters_the_oldest_answers():
+    async def scenario():
+        log = AnswerWriteBehind(2, 60, max_pending=3)
+        for participant_id in range(1, 6):
+            log.submit(answer(participant_id))
+
+        assert [record.participant_id for record in log._buffer] == [3, 4, 5]
+        assert log.dead_lettered == 2
+        log._flusher.cancel()
+
+    asyncio.run(scenario())
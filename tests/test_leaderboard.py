@@ -0,0 +1,61 @@
+from app.websocket.room_state.leaderboard import RankedLeaderboard
+
+
+def make_board(*scores) -> RankedLeaderboard:
+    board = RankedLeaderboard()
+    for participant_id, score in enumerate(scores, start=1):
+        board.add(participant_id, score)
+    board.mark_synced()
+    return board
+
+
+def test_ranks_order_by_score_then_participant_id():
+    board = make_board(10, 30, 10, 20)
+
+    assert list(board.ranked()) == [(1, 2, 30), (2, 4, 20), (3, 1, 10), (4, 3, 10)]
+    assert board.rank(3) == 4
+    assert board.rank(99) is None
+    assert len(board) == 4 and 2 in board
+
+
+def test_changes_cover_only_entries_that_moved_or_rescored():
+    board = make_board(40, 30, 20, 10)
+
+    board.update(3, 35)  # overtakes participant 2
+
+    assert board.changes() == [(2, 3, 35), (3, 2, 30)]
+    assert board.changes() == []
+    assert not board.dirty
+
+
+def test_unchanged_score_is_not_a_change():
+    board = make_board(40, 30)
+
+    board.update(1, 40)
+
+    assert not board.dirty
+    assert board.changes() == []
+
+
+def test_new_and_removed_entries_shift_the_ranks_below_them():
+    board = make_board(40, 30, 20)
+
+    board.add(4, 35)
+    assert board.changes() == [(2, 4, 35), (3, 2, 30), (4, 3, 20)]
+
+    board.remove(1)
+    assert board.changes() == [(1, 4, 35), (2, 2, 30), (3, 3, 20)]
+    assert 1 not in board
+
+
+def test_mark_synced_resets_the_baseline():
+    board = make_board(40, 30)
+    board.update(2, 50)
+
+    board.mark_synced()
+
+    assert board.changes() == []
+    board.update(1, 45)  # still second, but the score itself is news
+    assert board.changes() == [(2, 1, 45)]
+    board.update(1, 60)
+    assert board.changes() == [(1, 1, 60), (2, 2, 50)]
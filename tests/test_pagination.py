@@ -0,0 +1,72 @@
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from services.pagination import decode_cursor, encode_cursor, keyset, split_page
+
+CREATED_AT = datetime(2024, 1, 1, 12, 0, 0, 123456, tzinfo=timezone.utc)
+
+
+def raw_cursor(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trips_without_padding():
+    cursor = encode_cursor(CREATED_AT, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (CREATED_AT, 42)
+    assert decode_cursor(None) is None
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "!!!",
+        raw_cursor("not-json"),
+        raw_cursor("null"),
+        raw_cursor('["2024-01-01T12:00:00"]'),
+        raw_cursor('["yesterday", 1]'),
+        raw_cursor('["2024-01-01T12:00:00", "x"]'),
+    ],
+)
+def test_malformed_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+def test_first_page_has_no_condition():
+    assert keyset("desc", None) == (
+        "TRUE",
+        (),
+        "q.created_at DESC, q.id DESC",
+    )
+
+
+def test_later_pages_continue_past_the_cursor_in_either_direction():
+    after = (CREATED_AT, 42)
+
+    assert keyset("DESC", after) == (
+        "(q.created_at, q.id) < (%s, %s)",
+        after,
+        "q.created_at DESC, q.id DESC",
+    )
+    assert keyset("asc", after, "r.created_at", "r.id") == (
+        "(r.created_at, r.id) > (%s, %s)",
+        after,
+        "r.created_at ASC, r.id ASC",
+    )
+
+
+def test_split_page_only_hands_out_a_cursor_when_more_rows_exist():
+    rows = [(row_id, "title", CREATED_AT) for row_id in (5, 4, 3)]
+
+    assert split_page(rows, 3, created_index=2) == (rows, None)
+
+    page, cursor = split_page(rows, 2, created_index=2)
+    assert page == rows[:2]
+    assert decode_cursor(cursor) == (CREATED_AT, 4)
@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+from psycopg2 import extensions
+
+from database.pool import ConnectionPool, PoolTimeout
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        if self.connection.broken:
+            raise RuntimeError("server closed the connection")
+        self.connection.status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self):
+        return self.status
+
+    def close(self):
+        self.closed = 1
+
+
+def make_pool(**options) -> ConnectionPool:
+    options.setdefault("reap_interval", 0)
+    pool = ConnectionPool(**options)
+    pool.opened = []
+
+    def open_connection():
+        connection = FakeConnection()
+        pool.opened.append(connection)
+        return connection
+
+    pool._open = open_connection
+    return pool
+
+
+def test_with_block_commits_on_success_and_returns_the_connection():
+    pool = make_pool(min_size=0, max_size=1)
+
+    with pool.getconn() as connection:
+        connection.cursor().execute("INSERT INTO t VALUES (1)")
+
+    raw = pool.opened[0]
+    assert (raw.commits, raw.rollbacks) == (1, 0)
+    assert pool.stats()["in_use"] == 0
+    assert pool.stats()["idle"] == 1
+
+
+def test_with_block_rolls_back_on_error():
+    pool = make_pool(min_size=0, max_size=1)
+
+    with pytest.raises(ValueError):
+        with pool.getconn() as connection:
+            connection.cursor().execute("INSERT INTO t VALUES (1)")
+            raise ValueError("boom")
+
+    raw = pool.opened[0]
+    assert (raw.commits, raw.rollbacks) == (0, 1)
+    assert pool.stats()["idle"] == 1
+
+
+def test_returned_connection_is_reused_and_left_idle():
+    pool = make_pool(min_size=0, max_size=2)
+
+    first = pool.getconn()
+    first.cursor().execute("SELECT 1")  # transaction left open
+    first.close()
+    first.close()  # a second close is a no-op
+
+    second = pool.getconn()
+    assert second._raw is pool.opened[0]
+    assert pool.opened[0].status == extensions.TRANSACTION_STATUS_IDLE
+    assert pool.stats()["in_use"] == 1
+    second.close()
+
+
+def test_checkout_waits_for_a_free_connection_then_times_out():
+    pool = make_pool(min_size=0, max_size=1, timeout=0.2)
+    held = pool.getconn()
+
+    releaser = threading.Timer(0.05, held.close)
+    releaser.start()
+    started = time.monotonic()
+    waited = pool.getconn()
+    assert time.monotonic() - started < 0.2
+
+    with pytest.raises(PoolTimeout):
+        pool.getconn(timeout=0.05)
+    assert pool.stats()["checkout_timeouts"] == 1
+    waited.close()
+
+
+def test_stale_idle_connection_is_replaced_when_it_fails_the_health_check():
+    pool = make_pool(min_size=0, max_size=1, health_check_after=0)
+    pool.getconn().close()
+    pool.opened[0].broken = True
+
+    connection = pool.getconn()
+
+    assert connection._raw is pool.opened[1]
+    assert pool.opened[0].closed
+    assert pool.stats()["discarded"] == 1
+    connection.close()
+
+
+def test_reaper_keeps_min_size_connections():
+    pool = make_pool(min_size=1, max_size=3, max_idle=0)
+    connections = [pool.getconn() for _ in range(3)]
+    for connection in connections:
+        connection.close()
+
+    assert pool.reap_idle() == 2
+    assert pool.stats()["size"] == 1
@@ -0,0 +1,276 @@
+import asyncio
+import json
+
+import pytest
+
+from app.websocket.pubsub import backends
+from app.websocket.pubsub.room_owner import RoomOwnerRouter
+from app.websocket.websocket_manager.ws_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, frame: str):
+        self.frames.append(json.loads(frame))
+
+    async def close(self, code=None):
+        pass
+
+    def received(self, message_type: str) -> list:
+        return [frame["data"] for frame in self.frames if frame["type"] == message_type]
+
+
+@pytest.fixture(autouse=True)
+def fresh_fake_server():
+    backends._fake_server = None
+    yield
+    backends._fake_server = None
+
+
+async def start_workers(count: int, presence_ttl: float = 30.0):
+    workers = []
+    for _ in range(count):
+        worker = ConnectionManager()
+        await worker.start_bus(backends.create_backend("fakeredis", None, presence_ttl))
+        workers.append(worker)
+    return workers
+
+
+async def stop_workers(workers):
+    for worker in workers:
+        for websocket in list(worker.senders):
+            worker.disconnect(websocket)
+        if worker.bus is not None:
+            await worker.stop_bus()
+
+
+async def settle(seconds: float = 0.1):
+    # Lets the bus reader tasks and per-socket senders drain
+    await asyncio.sleep(seconds)
+
+
+async def presence_ids(worker, room_code: str) -> list:
+    return sorted(user["id"] for user in await worker.bus.get_presence(room_code))
+
+
+def test_broadcast_reaches_sockets_on_other_workers_once():
+    async def scenario():
+        first, second = await start_workers(2)
+        try:
+            alice, bob = FakeWebSocket(), FakeWebSocket()
+            await first.connect(alice, "room1", "alice", 1, None)
+            await second.connect(bob, "room1", "bob", 2, None)
+            await settle()
+
+            await first.broadcast("chat", "room1", "alice: hi")
+            await settle()
+
+            assert alice.received("chat") == ["alice: hi"]
+            assert bob.received("chat") == ["alice: hi"]
+        finally:
+            await stop_workers([first, second])
+
+    asyncio.run(scenario())
+
+
+def test_leaderboard_audiences_are_kept_across_workers():
+    async def scenario():
+        first, second = await start_workers(2)
+        try:
+            full, delta = FakeWebSocket(), FakeWebSocket()
+            await first.connect(full, "room1", "alice", 1, None, "full")
+            await second.connect(delta, "room1", "bob", 2, None, "delta")
+            await settle()
+
+            await first.send_leaderboard(
+                "room1",
+                [{"id": 1, "totalPoints": 10}],
+                ("leaderboard_delta", {"seq": 1, "members": [], "changes": []}),
+            )
+            await settle()
+
+            assert full.received("leaderboard") == [[{"id": 1, "totalPoints": 10}]]
+            assert full.received("leaderboard_delta") == []
+            assert delta.received("leaderboard") == []
+            assert delta.received("leaderboard_delta") == [
+                {"seq": 1, "members": [], "changes": []}
+            ]
+        finally:
+            await stop_workers([first, second])
+
+    asyncio.run(scenario())
+
+
+def test_presence_is_shared_and_counts_each_users_sockets():
+    async def scenario():
+        first, second = await start_workers(2)
+        try:
+            alice, bob, bob_again = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+            await first.connect(alice, "room1", "alice", 1, None)
+            await second.connect(bob, "room1", "bob", 2, None)
+            await second.connect(bob_again, "room1", "bob", 2, None)
+            assert await presence_ids(first, "room1") == [1, 2]
+
+            second.disconnect(bob_again)
+            await second.broadcast_user_list("room1")
+            assert await presence_ids(first, "room1") == [1, 2]
+
+            second.disconnect(bob)
+            await second.broadcast_user_list("room1")
+            assert await presence_ids(first, "room1") == [1]
+            await settle()
+            assert [user["id"] for user in alice.received("user_list")[-1]] == [1]
+        finally:
+            await stop_workers([first, second])
+
+    asyncio.run(scenario())
+
+
+def test_presence_of_a_crashed_worker_expires():
+    async def scenario():
+        survivor, crashed = await start_workers(2, presence_ttl=0.3)
+        try:
+            await survivor.connect(FakeWebSocket(), "room1", "alice", 1, None)
+            await crashed.connect(FakeWebSocket(), "room1", "bob", 2, None)
+            assert await presence_ids(survivor, "room1") == [1, 2]
+
+            # No cleanup and no more heartbeats, as if the process died
+            crashed._heartbeat.cancel()
+            crashed.bus._reader.cancel()
+            await settle(0.6)
+
+            assert await presence_ids(survivor, "room1") == [1]
+        finally:
+            crashed.bus = None
+            await stop_workers([survivor, crashed])
+
+    asyncio.run(scenario())
+
+
+def test_clean_shutdown_removes_the_workers_presence():
+    async def scenario():
+        first, second = await start_workers(2)
+        try:
+            await first.connect(FakeWebSocket(), "room1", "alice", 1, None)
+            await second.connect(FakeWebSocket(), "room1", "bob", 2, None)
+
+            await second.stop_bus()
+
+            assert await presence_ids(first, "room1") == [1]
+        finally:
+            await stop_workers([first, second])
+
+    asyncio.run(scenario())
+
+
+def owner_routers(workers, timeout: float = 1.0):
+    routers = []
+    for worker in workers:
+        router = RoomOwnerRouter(worker, ttl=5.0, timeout=timeout)
+
+        @router.handler("whoami")
+        async def whoami(room_code, payload, worker=worker):
+            return {"worker": worker.worker_id, "echo": payload.get("echo")}
+
+        routers.append(router)
+    return routers
+
+
+def test_room_calls_run_on_the_worker_that_claimed_the_room():
+    async def scenario():
+        workers = await start_workers(3)
+        try:
+            routers = owner_routers(workers)
+            owner = workers[0].worker_id
+
+            result = await routers[0].call("room1", "whoami")
+            assert result == {"worker": owner, "echo": None}
+            for router in routers[1:]:
+                result = await router.call("room1", "whoami", {"echo": 7})
+                assert result == {"worker": owner, "echo": 7}
+
+            # Other rooms are claimed independently
+            result = await routers[2].call("room2", "whoami")
+            assert result["worker"] == workers[2].worker_id
+        finally:
+            await stop_workers(workers)
+
+    asyncio.run(scenario())
+
+
+def test_released_room_is_claimed_by_the_next_caller():
+    async def scenario():
+        workers = await start_workers(2)
+        try:
+            first, second = owner_routers(workers)
+            await first.call("room1", "whoami")
+            await first.release("room1")
+
+            result = await second.call("room1", "whoami")
+            assert result["worker"] == workers[1].worker_id
+            result = await first.call("room1", "whoami")
+            assert result["worker"] == workers[1].worker_id
+        finally:
+            await stop_workers(workers)
+
+    asyncio.run(scenario())
+
+
+def test_unreachable_owner_times_out_with_an_error():
+    async def scenario():
+        workers = await start_workers(2)
+        try:
+            first, second = owner_routers(workers, timeout=0.2)
+            await first.call("room1", "whoami")
+
+            # The claim outlives the worker until its TTL runs out
+            workers[0].bus._reader.cancel()
+
+            assert await second.call("room1", "whoami") == {
+                "error": "Room owner did not respond"
+            }
+        finally:
+            await stop_workers(workers)
+
+    asyncio.run(scenario())
+
+
+def test_single_in_process_worker_runs_calls_locally():
+    async def scenario():
+        worker = ConnectionManager()
+        await worker.start_bus(backends.create_backend("memory"))
+        try:
+            (router,) = owner_routers([worker])
+            result = await router.call("room1", "whoami")
+            assert result["worker"] == worker.worker_id
+            assert "room1" not in backends.InProcessBackend._owners
+        finally:
+            await stop_workers([worker])
+
+    asyncio.run(scenario())
+
+
+def test_claim_is_renewed_only_by_its_owner():
+    async def scenario():
+        first, second = await start_workers(2)
+        try:
+            key = f"{backends.room_channel('room1')}:owner"
+            assert await first.bus.claim_owner("room1", 5.0) == first.worker_id
+
+            await first.bus.client.pexpire(key, 1000)
+            assert await first.bus.claim_owner("room1", 5.0) == first.worker_id
+            assert await first.bus.client.pttl(key) > 1000
+
+            # The claim moved on (expired and was taken): no longer renewed
+            await first.bus.client.set(key, second.worker_id, px=1000)
+            assert await first.bus.claim_owner("room1", 5.0) == second.worker_id
+            assert await first.bus.client.pttl(key) <= 1000
+        finally:
+            await stop_workers([first, second])
+
+    asyncio.run(scenario())
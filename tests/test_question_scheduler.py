@@ -0,0 +1,154 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.websocket.room_state.question_scheduler import QuestionScheduler
+from app.websocket.room_state.room_engine import RoomQuestion, RoomState
+from app.websocket.room_state.timer_wheel import TimerWheel
+
+SHOWN_AT = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+class RecordingWheel:
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, delay, callback, *args):
+        self.scheduled.append((delay, callback.__name__))
+        return FakeHandle()
+
+
+class FakeHandle:
+    def cancel(self):
+        pass
+
+
+async def noop(*args):
+    pass
+
+
+def make_scheduler():
+    wheel = RecordingWheel()
+    scheduler = QuestionScheduler(None, wheel, 5.0, 1.0, noop, noop, noop)
+    return scheduler, wheel
+
+
+def make_room(shown=None, started_at=SHOWN_AT) -> RoomState:
+    questions = [RoomQuestion(10 + index, index, 0, 100, 20) for index in range(3)]
+    return RoomState(1, "room1", 1, 99, questions, [], shown or {}, started_at)
+
+
+def test_resume_waits_out_the_intermission_before_the_first_question():
+    scheduler, wheel = make_scheduler()
+    room = make_room()
+
+    assert scheduler.resume(room, SHOWN_AT + timedelta(seconds=2))
+
+    assert wheel.scheduled == [(3.0, "_show_next")]
+    assert scheduler.timelines["room1"].position == -1
+
+
+def test_resume_reopens_the_question_still_on_screen():
+    scheduler, wheel = make_scheduler()
+    room = make_room({10: SHOWN_AT, 11: SHOWN_AT + timedelta(seconds=30)})
+
+    assert scheduler.resume(room, SHOWN_AT + timedelta(seconds=40))
+
+    timeline = scheduler.timelines["room1"]
+    assert (timeline.position, timeline.open) == (1, True)
+    assert room.current_question.id == 11
+    assert wheel.scheduled == [(11.0, "_close")]
+
+
+def test_resume_moves_on_from_a_question_that_already_closed():
+    scheduler, wheel = make_scheduler()
+    room = make_room({10: SHOWN_AT})
+
+    assert scheduler.resume(room, SHOWN_AT + timedelta(seconds=23))
+
+    assert scheduler.timelines["room1"].position == 0
+    assert not scheduler.timelines["room1"].open
+    assert wheel.scheduled == [(3.0, "_show_next")]
+
+
+def test_resume_leaves_rooms_without_a_schedule_alone():
+    scheduler, wheel = make_scheduler()
+
+    assert not scheduler.resume(make_room(started_at=None))
+    assert not scheduler.is_running("room1")
+    assert wheel.scheduled == []
+
+
+class FakeEngine:
+    def __init__(self, *durations):
+        self.durations = durations
+        self.calls = []
+
+    async def show_question(self, room_code, question_index):
+        self.calls.append(("show", question_index))
+        return {"index": question_index, "duration": self.durations[question_index]}
+
+    async def close_question(self, room_code, question_index=None):
+        self.calls.append(("close", question_index))
+        return {"index": question_index}
+
+
+def test_scheduler_runs_a_room_through_every_question():
+    async def scenario():
+        engine = FakeEngine(0.02, 0.02, 0.02)
+        events = []
+
+        async def on_question(room_code, question):
+            events.append(("question", question["index"]))
+
+        async def on_close(room_code, question):
+            events.append(("close", question["index"]))
+
+        async def on_finish(room_code):
+            events.append(("finish", room_code))
+
+        scheduler = QuestionScheduler(
+            engine,
+            TimerWheel(0.01, slots=16),
+            0.02,
+            0.01,
+            on_question,
+            on_close,
+            on_finish,
+        )
+        assert scheduler.start(make_room(), delay=0.01)
+        assert not scheduler.start(make_room())
+
+        await asyncio.sleep(0.5)
+
+        assert engine.calls == [
+            ("show", 0),
+            ("close", 0),
+            ("show", 1),
+            ("close", 1),
+            ("show", 2),
+            ("close", 2),
+        ]
+        assert events[-1] == ("finish", "room1")
+        assert not scheduler.is_running("room1")
+
+    asyncio.run(scenario())
+
+
+def test_host_can_close_a_question_early_and_stop_the_room():
+    async def scenario():
+        engine = FakeEngine(10, 10, 10)
+        scheduler = QuestionScheduler(
+            engine, TimerWheel(0.01, slots=16), 10, 0, noop, noop, noop
+        )
+        scheduler.start(make_room(), delay=0.01)
+        await asyncio.sleep(0.05)
+
+        await scheduler.close_now("room1")
+        await scheduler.close_now("room1")  # already closed: nothing to do
+        scheduler.stop("room1")
+
+        assert engine.calls == [("show", 0), ("close", 0)]
+        assert not scheduler.is_running("room1")
+        assert len(scheduler.wheel) == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,182 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from app.websocket.room_state import room_engine as engine_module
+from app.websocket.room_state.room_engine import (
+    RoomEngine,
+    RoomParticipant,
+    RoomQuestion,
+    RoomState,
+)
+
+SHOWN_AT = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def make_room(*questions) -> RoomState:
+    return RoomState(
+        1,
+        "room1",
+        1,
+        99,
+        list(questions),
+        [RoomParticipant(1, 10, "Ada", None), RoomParticipant(2, 20, "Bo", None)],
+        {question.id: SHOWN_AT for question in questions},
+    )
+
+
+def test_answers_are_scored_together_when_the_question_closes():
+    question = RoomQuestion(7, 0, 2, 100, 10)
+    room = make_room(question)
+
+    assert room.buffer_answer(room.participants[10], question, 2, SHOWN_AT)
+    assert room.buffer_answer(
+        room.participants[20], question, 1, SHOWN_AT + timedelta(seconds=5)
+    )
+    # Nothing counts until the question closes
+    assert room.participants[10].score == 0
+
+    scored = room.score_question(question)
+
+    assert [(r.participant_id, r.is_correct, r.awarded) for r in scored] == [
+        (1, True, 100),
+        (2, False, 0),
+    ]
+    assert room.participants[10].score == 100
+    assert room.leaderboard()[0]["id"] == 10
+    assert room.score_question(question) == []
+
+
+def test_second_answer_to_a_question_is_refused():
+    question = RoomQuestion(7, 0, 2, 100, 10)
+    room = make_room(question)
+
+    assert room.buffer_answer(room.participants[10], question, 1, SHOWN_AT)
+    assert not room.buffer_answer(room.participants[10], question, 2, SHOWN_AT)
+    assert [r.selected_option for r in room.score_question(question)] == [1]
+
+
+def test_restored_answers_block_repeats_and_unscored_ones_are_held_back():
+    question = RoomQuestion(7, 0, 2, 100, 10)
+    room = make_room(question)
+
+    room.restore_answers(
+        [
+            (1, 7, 2, SHOWN_AT, None),  # accepted by the previous owner
+            (2, 7, 1, SHOWN_AT, False),  # already scored
+        ]
+    )
+
+    assert not room.buffer_answer(room.participants[10], question, 2, SHOWN_AT)
+    assert not room.buffer_answer(room.participants[20], question, 2, SHOWN_AT)
+    scored = room.score_question(question)
+    assert [(r.participant_id, r.awarded) for r in scored] == [(1, 100)]
+
+
+class RecordingWheel:
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule(self, delay, callback, *args):
+        self.scheduled.append((callback.__name__, args[-1].id))
+        return FakeHandle()
+
+
+class FakeHandle:
+    def cancel(self):
+        pass
+
+
+class FakeAnswerLog:
+    def __init__(self):
+        self.records = []
+
+    def submit(self, record):
+        self.records.append(record)
+
+
+async def no_row(query, params=None):
+    return None
+
+
+def make_engine(monkeypatch, room=None):
+    answer_log = FakeAnswerLog()
+    monkeypatch.setattr(engine_module, "answer_log", answer_log)
+    monkeypatch.setattr(engine_module, "fetch_one", no_row)
+    engine = RoomEngine(RecordingWheel())
+    if room is not None:
+        engine.rooms[room.room_code] = room
+    return engine, answer_log
+
+
+def submit(engine, user_id, selected_option, received_at=SHOWN_AT, **question):
+    question = question or {"question_id": 7}
+    return asyncio.run(
+        engine.submit_answer("room1", user_id, selected_option, received_at, **question)
+    )
+
+
+def test_accepted_answer_is_logged_unscored_and_the_close_armed(monkeypatch):
+    room = make_room(RoomQuestion(7, 0, 2, 100, 10))
+    engine, answer_log = make_engine(monkeypatch, room)
+
+    assert submit(engine, 10, 2) == {"question_id": 7, "accepted": True}
+    assert submit(engine, 10, 1) == {"error": "Question already answered"}
+
+    [record] = answer_log.records
+    assert (record.participant_id, record.is_correct, record.awarded) == (1, None, None)
+    assert engine.timer_wheel.scheduled == [("_expire_question", 7)]
+
+    asyncio.run(engine.close_question("room1", question_id=7))
+    assert [r.awarded for r in answer_log.records] == [None, 100]
+    assert room.participants[10].score == 100
+
+
+def test_submit_answer_refuses_what_it_cannot_score(monkeypatch):
+    room = make_room(RoomQuestion(7, 0, 2, 100, 10), RoomQuestion(8, 1, 0, 100, 10))
+    del room.question_shown_at[8]  # not on screen yet
+    engine, answer_log = make_engine(monkeypatch, room)
+
+    assert submit(engine, 10, True) == {
+        "error": "selected_option must be an integer"
+    }
+    assert submit(engine, 30, 2) == {"error": "User not participant in room"}
+    assert submit(engine, 10, 2, question_id=9) == {"error": "Question not found"}
+    assert submit(engine, 10, 2, question_index=1) == {"error": "Question not open"}
+    assert submit(engine, 10, 2, SHOWN_AT + timedelta(seconds=60)) == {
+        "error": "Answer window closed"
+    }
+    assert answer_log.records == []
+
+
+def test_loading_a_room_restores_answers_taken_by_the_previous_owner(monkeypatch):
+    engine, answer_log = make_engine(monkeypatch)
+    loaded = []
+    engine.on_loaded = loaded.append
+
+    class Resolver:
+        async def resolve(self, room_code):
+            return (1, 1, 99)
+
+    class AnswerKeys:
+        async def get(self, quiz_id):
+            return [(7, 0, 2, 100, 10)]
+
+    async def fetch_all(query, params=None):
+        if "room_participants" in query:
+            return [(1, 10, "Ada", None, 0), (2, 20, "Bo", None, 0)]
+        if "room_questions" in query:
+            return [(7, SHOWN_AT.replace(tzinfo=None))]
+        return [(1, 7, 2, SHOWN_AT, None)]
+
+    monkeypatch.setattr(engine_module, "room_resolver", Resolver())
+    monkeypatch.setattr(engine_module, "answer_keys", AnswerKeys())
+    monkeypatch.setattr(engine_module, "fetch_all", fetch_all)
+
+    room = asyncio.run(engine.load("room1"))
+
+    assert loaded == [room]
+    assert room.question_shown_at[7] == SHOWN_AT
+    assert engine.timer_wheel.scheduled == [("_expire_question", 7)]
+    assert submit(engine, 10, 1) == {"error": "Question already answered"}
+    scored = room.score_question(room.questions_by_id[7])
+    assert [(r.participant_id, r.awarded) for r in scored] == [(1, 100)]
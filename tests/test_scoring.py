@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+
+from app.websocket.room_state import scoring
+from app.websocket.room_state.room_engine import RoomQuestion
+from app.websocket.room_state.scoring import answer_window_open, as_utc, score_answers
+
+SHOWN_AT = datetime(2024, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def after(seconds: float) -> datetime:
+    return SHOWN_AT + timedelta(seconds=seconds)
+
+
+def test_correct_answers_decay_linearly_to_half_points():
+    question = RoomQuestion(7, 0, 2, 100, 10)
+
+    results = score_answers(
+        question, SHOWN_AT, [(2, after(0)), (2, after(5)), (2, after(10))]
+    )
+
+    assert results == [(True, 100), (True, 75), (True, 50)]
+
+
+def test_early_and_late_answers_are_clamped():
+    question = RoomQuestion(7, 0, 2, 100, 10)
+
+    results = score_answers(question, SHOWN_AT, [(2, after(-1)), (2, after(12))])
+
+    assert results == [(True, 100), (True, 50)]
+
+
+def test_wrong_answers_earn_nothing_and_options_compare_as_strings():
+    question = RoomQuestion(7, 0, "2", 100, 10)
+
+    results = score_answers(question, SHOWN_AT, [(1, after(1)), (2, after(1))])
+
+    assert results == [(False, 0), (True, 95)]
+
+
+def test_untimed_question_awards_full_points():
+    question = RoomQuestion(7, 0, 2, 100, 0)
+
+    assert score_answers(question, SHOWN_AT, [(2, after(30))]) == [(True, 100)]
+
+
+def test_answer_window_allows_the_grace_period(monkeypatch):
+    monkeypatch.setattr(scoring, "ANSWER_GRACE_PERIOD_MS", 500)
+    question = RoomQuestion(7, 0, 2, 100, 10)
+
+    assert answer_window_open(question, SHOWN_AT, after(10.5))
+    assert not answer_window_open(question, SHOWN_AT, after(10.6))
+
+
+def test_naive_timestamps_are_read_as_utc():
+    naive = datetime(2024, 1, 1, 12, 0)
+    aware = datetime(2024, 1, 1, 13, 0, tzinfo=timezone(timedelta(hours=1)))
+
+    assert as_utc(naive) == SHOWN_AT
+    assert as_utc(naive).tzinfo is timezone.utc
+    assert as_utc(aware) is aware
+    assert as_utc(None) is None
@@ -0,0 +1,83 @@
+import asyncio
+
+from app.websocket.room_state.timer_wheel import TimerWheel
+
+
+def test_timers_fire_in_delay_order_and_the_wheel_goes_idle():
+    async def scenario():
+        wheel = TimerWheel(0.01, slots=8)
+        fired = []
+
+        async def record(name):
+            fired.append(name)
+
+        wheel.schedule(0.05, record, "late")
+        wheel.schedule(0.01, record, "early")
+        assert len(wheel) == 2
+
+        await asyncio.sleep(0.15)
+        assert fired == ["early", "late"]
+        assert len(wheel) == 0
+        assert wheel._task.done()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_timer_never_fires():
+    async def scenario():
+        wheel = TimerWheel(0.01, slots=8)
+        fired = []
+
+        async def record(name):
+            fired.append(name)
+
+        handle = wheel.schedule(0.03, record, "cancelled")
+        wheel.schedule(0.05, record, "kept")
+        handle.cancel()
+        handle.cancel()  # a second cancel is a no-op
+        assert len(wheel) == 1
+
+        await asyncio.sleep(0.15)
+        assert fired == ["kept"]
+
+    asyncio.run(scenario())
+
+
+def test_delays_beyond_one_revolution_wait_out_extra_rounds():
+    async def scenario():
+        wheel = TimerWheel(0.01, slots=4)
+        fired = []
+
+        async def record(name):
+            fired.append(name)
+
+        # Both land in the same bucket; the second goes round twice more
+        wheel.schedule(0.02, record, "first")
+        wheel.schedule(0.10, record, "third round")
+
+        await asyncio.sleep(0.05)
+        assert fired == ["first"]
+        await asyncio.sleep(0.12)
+        assert fired == ["first", "third round"]
+
+    asyncio.run(scenario())
+
+
+def test_failing_callback_does_not_stop_the_wheel():
+    async def scenario():
+        wheel = TimerWheel(0.01, slots=8)
+        fired = []
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        async def record(name):
+            fired.append(name)
+
+        wheel.schedule(0.01, fail)
+        wheel.schedule(0.03, record, "after")
+
+        await asyncio.sleep(0.12)
+        assert fired == ["after"]
+
+    asyncio.run(scenario())